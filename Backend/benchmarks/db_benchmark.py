@@ -0,0 +1,215 @@
+# Concurrent read/write benchmark for the database layer.
+#
+#   python -m benchmarks.db_benchmark --users 2000 --resumes-per-user 5 --seconds 10
+#
+# Seeds a scratch SQLite file and runs reader and writer threads against it
+# twice. The baseline run uses the old engine: default pragmas (rollback
+# journal, synchronous=FULL) and no resumes.user_id / match_results indexes.
+# The tuned run uses database.create_db_engine (WAL, synchronous=NORMAL, mmap)
+# with the model indexes. A final run drives the tuned database through
+# AsyncSession when aiosqlite is installed. Reported: reads/writes per second,
+# p50/p95 latency and "database is locked" errors.
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from database import Base, create_db_engine, engine_options
+from models import JobDescription, JobMatchResult, Resume, User
+
+ADDED_INDEXES = ("ix_resumes_user_id", "ix_match_results_resume_job_prompt")
+
+
+def seed(engine, users: int, resumes_per_user: int, jobs: int):
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add_all(User(id=i, full_name=f"user {i}", email=f"u{i}@example.com", phone_number=str(i),
+                        hashed_password="x") for i in range(1, users + 1))
+        db.add_all(JobDescription(id=j, job_title=f"job {j}", description=f"job {j}", description_hash=str(j))
+                   for j in range(1, jobs + 1))
+        db.flush()
+        resume_id = 0
+        for user_id in range(1, users + 1):
+            for _ in range(resumes_per_user):
+                resume_id += 1
+                db.add(Resume(id=resume_id, user_id=user_id, file_path=f"r{resume_id}.pdf",
+                              extracted_text="x" * 2000, skills=["python", "sql"], projects=[], education=[],
+                              experience=[]))
+        db.commit()
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * pct))] * 1000, 3)
+
+
+def summarize(name, reads, writes, errors, seconds):
+    return {
+        "config": name,
+        "reads_per_sec": round(len(reads) / seconds, 1),
+        "writes_per_sec": round(len(writes) / seconds, 1),
+        "read_p50_ms": percentile(reads, 0.5),
+        "read_p95_ms": percentile(reads, 0.95),
+        "write_p50_ms": percentile(writes, 0.5),
+        "write_p95_ms": percentile(writes, 0.95),
+        "locked_errors": errors,
+    }
+
+
+def run_threads(name, engine, readers, writers, seconds, users, jobs):
+    Session = sessionmaker(bind=engine)
+    max_resume = Session().execute(select(func.max(Resume.id))).scalar()
+    reads, writes, errors = [], [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def reader():
+        rng = random.Random()
+        local = []
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            with Session() as db:
+                db.execute(select(Resume.id, Resume.file_path).where(Resume.user_id == rng.randint(1, users))).all()
+                db.execute(select(JobMatchResult.result).where(
+                    JobMatchResult.resume_id == rng.randint(1, max_resume),
+                    JobMatchResult.job_id == rng.randint(1, jobs))).all()
+            local.append(time.perf_counter() - started)
+        with lock:
+            reads.extend(local)
+
+    def writer():
+        rng = random.Random()
+        local = []
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                with Session() as db:
+                    db.add(JobMatchResult(resume_id=rng.randint(1, max_resume), job_id=rng.randint(1, jobs),
+                                          match_score=rng.random() * 100, prompt_version="bench",
+                                          result={"match_score": 50}))
+                    db.commit()
+                local.append(time.perf_counter() - started)
+            except OperationalError:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            writes.extend(local)
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return summarize(name, reads, writes, errors[0], seconds)
+
+
+async def run_async(url, readers, writers, seconds, users, jobs):
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from database import async_database_url, _set_sqlite_pragmas
+    from sqlalchemy import event
+
+    async_url = async_database_url(url)
+    engine = create_async_engine(async_url, **engine_options(async_url))
+    event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    async with Session() as db:
+        max_resume = (await db.execute(select(func.max(Resume.id)))).scalar()
+
+    reads, writes, errors = [], [], [0]
+    deadline = time.perf_counter() + seconds
+
+    async def reader():
+        rng = random.Random()
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            async with Session() as db:
+                (await db.execute(select(Resume.id, Resume.file_path)
+                                  .where(Resume.user_id == rng.randint(1, users)))).all()
+                (await db.execute(select(JobMatchResult.result).where(
+                    JobMatchResult.resume_id == rng.randint(1, max_resume),
+                    JobMatchResult.job_id == rng.randint(1, jobs)))).all()
+            reads.append(time.perf_counter() - started)
+
+    async def writer():
+        rng = random.Random()
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                async with Session() as db:
+                    db.add(JobMatchResult(resume_id=rng.randint(1, max_resume), job_id=rng.randint(1, jobs),
+                                          match_score=rng.random() * 100, prompt_version="bench",
+                                          result={"match_score": 50}))
+                    await db.commit()
+                writes.append(time.perf_counter() - started)
+            except OperationalError:
+                errors[0] += 1
+
+    await asyncio.gather(*[reader() for _ in range(readers)], *[writer() for _ in range(writers)])
+    await engine.dispose()
+    return summarize("tuned_async", reads, writes, errors[0], seconds)
+
+
+def prepare(path, tuned, args):
+    url = f"sqlite:///{path}"
+    if tuned:
+        engine = create_db_engine(url)
+    else:
+        # What database.py used to build
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    if not tuned:
+        with engine.begin() as conn:
+            for name in ADDED_INDEXES:
+                conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    seed(engine, args.users, args.resumes_per_user, args.jobs)
+    return url, engine
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark concurrent reads/writes against the database layer")
+    arg_parser.add_argument("--users", type=int, default=2000)
+    arg_parser.add_argument("--resumes-per-user", type=int, default=5)
+    arg_parser.add_argument("--jobs", type=int, default=50)
+    arg_parser.add_argument("--readers", type=int, default=8)
+    arg_parser.add_argument("--writers", type=int, default=2)
+    arg_parser.add_argument("--seconds", type=float, default=10)
+    arg_parser.add_argument("--skip-async", action="store_true")
+    args = arg_parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, tuned in (("baseline", False), ("tuned", True)):
+            url, engine = prepare(os.path.join(workdir, f"{name}.db"), tuned, args)
+            results.append(run_threads(name, engine, args.readers, args.writers, args.seconds,
+                                       args.users, args.jobs))
+            engine.dispose()
+
+        if not args.skip_async:
+            try:
+                import aiosqlite  # noqa: F401
+                import sqlalchemy.ext.asyncio  # noqa: F401
+            except ImportError:
+                print("aiosqlite/greenlet are not installed; skipping the async run", file=sys.stderr)
+            else:
+                results.append(asyncio.run(run_async(url, args.readers, args.writers, args.seconds,
+                                                     args.users, args.jobs)))
+
+    print(json.dumps(results, indent=2))
+    base, tuned = results[0], results[1]
+    if base["reads_per_sec"]:
+        print(f"tuned/baseline reads: {tuned['reads_per_sec'] / base['reads_per_sec']:.2f}x, "
+              f"writes: {tuned['writes_per_sec'] / max(base['writes_per_sec'], 0.1):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# Compare embedding backends: throughput (docs/sec) and retrieval agreement with fp32.
+#
+#   python -m benchmarks.embedding_benchmark --backends torch onnx --docs 500
+#
+# The corpus is built from resumes in the database (via merge_all); if there are
+# fewer than --docs rows it is padded with synthetic resumes. Recall@k is the
+# overlap between each backend's top-k and the fp32 torch model's top-k for the
+# same job-description queries.
+from resume_scores.embeddings import build_embedding_model
+import argparse
+import json
+import random
+import time
+import numpy as np
+
+SKILLS = ["Python", "Java", "Go", "Kubernetes", "Docker", "React", "TypeScript", "SQL", "PostgreSQL",
+          "AWS", "GCP", "PyTorch", "TensorFlow", "FastAPI", "Django", "Spark", "Kafka", "Redis",
+          "Terraform", "Node.js", "C++", "Rust", "Scikit-learn", "Pandas", "LangChain", "MongoDB"]
+
+QUERIES = [
+    "Backend engineer with Python, FastAPI and PostgreSQL experience",
+    "Machine learning engineer: PyTorch, model deployment, AWS",
+    "Frontend developer skilled in React and TypeScript",
+    "Platform engineer with Kubernetes, Terraform and Go",
+    "Data engineer building Spark and Kafka pipelines",
+    "Full stack developer Node.js, MongoDB, React",
+]
+
+
+def synthetic_resume(rng: random.Random) -> str:
+    skills = rng.sample(SKILLS, rng.randint(4, 10))
+    projects = "\n\n".join(
+        f"Project {i}:\nBuilt a service using {', '.join(rng.sample(skills, min(3, len(skills))))}\n"
+        f"Tech Stack: {', '.join(rng.sample(skills, min(2, len(skills))))}"
+        for i in range(rng.randint(1, 3))
+    )
+    return f"Skills: {', '.join(skills)}\nProjects:\n{projects}"
+
+
+def load_corpus(n_docs: int, seed: int):
+    texts = []
+    try:
+        from database import SessionLocal
+        from models import Resume
+        from resume_scores.chroma_db import merge_all
+        with SessionLocal() as db:
+            for resume in db.query(Resume).limit(n_docs):
+                doc = merge_all(resume)
+                if doc:
+                    texts.append(doc.page_content)
+    except Exception as e:
+        print(f"Could not load resumes from the database ({e}); using synthetic corpus")
+    rng = random.Random(seed)
+    while len(texts) < n_docs:
+        texts.append(synthetic_resume(rng))
+    return texts
+
+
+def encode(model, texts, batch_size):
+    started = time.perf_counter()
+    vectors = []
+    for i in range(0, len(texts), batch_size):
+        vectors.extend(model.embed_documents(texts[i:i + batch_size]))
+    elapsed = time.perf_counter() - started
+    return np.asarray(vectors, dtype=np.float32), elapsed
+
+
+def top_k(doc_vectors, query_vectors, k):
+    scores = query_vectors @ doc_vectors.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark embedding backends")
+    arg_parser.add_argument("--backends", nargs="+", default=["torch", "onnx"])
+    arg_parser.add_argument("--device", default="cpu")
+    arg_parser.add_argument("--docs", type=int, default=500)
+    arg_parser.add_argument("--batch-size", type=int, default=32)
+    arg_parser.add_argument("--k", type=int, default=10)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    texts = load_corpus(args.docs, args.seed)
+    reference = build_embedding_model(backend="torch", device=args.device)
+    ref_docs, _ = encode(reference, texts[:8], args.batch_size)  # warm up
+    ref_docs, _ = encode(reference, texts, args.batch_size)
+    ref_queries = np.asarray(reference.embed_documents(QUERIES), dtype=np.float32)
+    ref_top = top_k(ref_docs, ref_queries, args.k)
+
+    report = {"docs": len(texts), "k": args.k, "backends": {}}
+    for backend in args.backends:
+        model = reference if backend == "torch" else build_embedding_model(backend=backend, device=args.device)
+        encode(model, texts[:8], args.batch_size)
+        doc_vectors, elapsed = encode(model, texts, args.batch_size)
+        query_vectors = np.asarray(model.embed_documents(QUERIES), dtype=np.float32)
+        candidate_top = top_k(doc_vectors, query_vectors, args.k)
+        recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(ref_top, candidate_top)])
+        report["backends"][backend] = {
+            "docs_per_sec": round(len(texts) / elapsed, 1),
+            "seconds": round(elapsed, 3),
+            f"recall_at_{args.k}_vs_fp32": round(float(recall), 4),
+            "mean_cosine_vs_fp32": round(float(np.mean(np.sum(doc_vectors * ref_docs, axis=1))), 4),
+        }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
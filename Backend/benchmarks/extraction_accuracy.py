@@ -0,0 +1,173 @@
+# Field-level accuracy and latency of the rule-based extractor against LLM output.
+#
+#   python -m benchmarks.extraction_accuracy
+#   python -m benchmarks.extraction_accuracy --files ./resumes --live
+#
+# By default the corpus is the on-disk extraction cache: every upload left a
+# <hash>.txt (parsed text) and <hash>.json (the LLM's extraction) there, so the
+# LLM answers serve as the reference without new calls. --files parses a
+# directory of PDF/DOCX resumes instead and, with --live, asks the LLM for the
+# reference. For each field the report gives how often the rules resolved it
+# with confidence, their accuracy on those documents (the ones that would skip
+# the LLM) and on all documents, plus rule latency and the share of documents
+# that need no LLM call at all.
+import argparse
+import json
+import os
+import re
+import statistics
+import time
+from llm_models.extraction_cache import EXTRACTION_CACHE_DIR
+from llm_models.rule_extractor import FIELDS, rule_extract
+from llm_models.text_normalizer import prepare_resume_text
+
+
+def load_cache_corpus(cache_dir):
+    corpus = []
+    for name in sorted(os.listdir(cache_dir)):
+        if not name.endswith(".txt"):
+            continue
+        json_path = os.path.join(cache_dir, name[:-4] + ".json")
+        if not os.path.exists(json_path):
+            continue
+        with open(os.path.join(cache_dir, name), encoding="utf-8") as f:
+            text = f.read()
+        with open(json_path, encoding="utf-8") as f:
+            reference = json.load(f)
+        # Entries written before normalization hold raw parser text
+        corpus.append((name[:-4], prepare_resume_text([text])[0], reference))
+    return corpus
+
+
+def load_file_corpus(directory, live):
+    from llm_models.document_parser import parse_resume_text
+    from llm_models.extractor import extract_with_llm
+
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        if name.split(".")[-1].lower() not in ("pdf", "docx"):
+            continue
+        with open(os.path.join(directory, name), "rb") as f:
+            text, _ = parse_resume_text(name, f.read())
+        corpus.append((name, text, extract_with_llm(text) if live else None))
+    return corpus
+
+
+def _norm(value):
+    return re.sub(r"[^a-z0-9%.+#]+", " ", str(value or "").lower()).strip()
+
+
+def similar(a, b):
+    a, b = set(_norm(a).split()), set(_norm(b).split())
+    if not a and not b:
+        return True
+    return bool(a and b) and len(a & b) / len(a | b) >= 0.5
+
+
+def set_f1(predicted, reference):
+    predicted = {_norm(x) for x in predicted or []} - {""}
+    reference = {_norm(x) for x in reference or []} - {""}
+    if not predicted and not reference:
+        return 1.0
+    if not predicted or not reference:
+        return 0.0
+    overlap = len(predicted & reference)
+    return 2 * overlap / (len(predicted) + len(reference))
+
+
+def entry_score(predicted, reference, key, subfields):
+    # Pair each reference entry with the most similar predicted one on `key`,
+    # then count matching subfields; extra or missing entries count as misses
+    predicted = [p for p in predicted or [] if isinstance(p, dict)]
+    reference = [r for r in reference or [] if isinstance(r, dict)]
+    if not predicted and not reference:
+        return 1.0
+    matched, used = 0.0, set()
+    for ref in reference:
+        candidates = [i for i, p in enumerate(predicted) if i not in used and similar(p.get(key), ref.get(key))]
+        if not candidates:
+            continue
+        used.add(candidates[0])
+        pred = predicted[candidates[0]]
+        for subfield in subfields:
+            if subfield == "tech_stack":
+                matched += set_f1(pred.get(subfield), ref.get(subfield))
+            else:
+                matched += similar(pred.get(subfield), ref.get(subfield))
+    return matched / (max(len(predicted), len(reference)) * len(subfields))
+
+
+def field_score(field, predicted, reference):
+    if field == "name":
+        return float(_norm(predicted) == _norm(reference))
+    if field == "skills":
+        return set_f1(predicted, reference)
+    if field == "education":
+        return entry_score(predicted, reference, "institution", ("institution", "degree", "years", "cgpa"))
+    if field == "experience":
+        return entry_score(predicted, reference, "company", ("company", "role", "years"))
+    return entry_score(predicted, reference, "project_name", ("project_name", "tech_stack"))
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * pct))], 3) if values else None
+
+
+def evaluate(corpus):
+    latencies, fully_resolved = [], 0
+    per_field = {field: {"resolved": 0, "scores_resolved": [], "scores_all": []} for field in FIELDS}
+    for _, text, reference in corpus:
+        started = time.perf_counter()
+        predicted, confident = rule_extract(text)
+        latencies.append((time.perf_counter() - started) * 1000)
+        fully_resolved += all(confident.values())
+        for field in FIELDS:
+            stats = per_field[field]
+            stats["resolved"] += confident[field]
+            if reference is None:
+                continue
+            score = field_score(field, predicted.get(field), reference.get(field))
+            stats["scores_all"].append(score)
+            if confident[field]:
+                stats["scores_resolved"].append(score)
+
+    n = len(corpus)
+    return {
+        "documents": n,
+        "rules_p50_ms": percentile(latencies, 0.5),
+        "rules_p95_ms": percentile(latencies, 0.95),
+        "fully_resolved": round(fully_resolved / n, 3) if n else 0.0,
+        "llm_calls_avoided": fully_resolved,
+        "fields": {
+            field: {
+                "resolved_rate": round(stats["resolved"] / n, 3) if n else 0.0,
+                "accuracy_when_resolved": round(statistics.mean(stats["scores_resolved"]), 3)
+                                          if stats["scores_resolved"] else None,
+                "accuracy_all": round(statistics.mean(stats["scores_all"]), 3) if stats["scores_all"] else None,
+            }
+            for field, stats in per_field.items()
+        },
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Compare rule-based extraction with LLM extraction")
+    arg_parser.add_argument("--cache-dir", default=EXTRACTION_CACHE_DIR)
+    arg_parser.add_argument("--files", default=None, help="directory of PDF/DOCX resumes to use instead")
+    arg_parser.add_argument("--live", action="store_true", help="with --files, get reference output from the LLM")
+    args = arg_parser.parse_args()
+
+    if args.files:
+        corpus = load_file_corpus(args.files, args.live)
+    elif os.path.isdir(args.cache_dir):
+        corpus = load_cache_corpus(args.cache_dir)
+    else:
+        corpus = []
+    if not corpus:
+        raise SystemExit("No documents found; upload some resumes first or pass --files")
+    print(json.dumps(evaluate(corpus), indent=2))
+
+
+if __name__ == "__main__":
+    main()
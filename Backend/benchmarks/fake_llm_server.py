@@ -0,0 +1,125 @@
+# A local stand-in for the Groq chat completions API that enforces its own rate
+# limit and injects failures, for exercising the LLM gateway without a key.
+#
+#   python -m benchmarks.fake_llm_server --port 8099 --rpm 120 --burst 10 --error-rate 0.05
+#   GROQ_BASE_URL=http://127.0.0.1:8099 GROQ_API_KEY=fake uvicorn main:app
+#
+# Serves POST /openai/v1/chat/completions in the OpenAI format the groq SDK
+# expects. Requests over --rpm (a token bucket holding --burst requests) get a
+# 429 with Retry-After; --error-rate of the rest get a 500/503. Answers are
+# the same canned JSON as the in-process fake model (llm_models/fake_llm.py),
+# with usage counted at ~4 chars a token.
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from llm_models.fake_llm import answer
+
+
+class FakeLLM:
+    def __init__(self, rpm: int, burst: int, error_rate: float, latency_ms: float):
+        self.rate = rpm / 60.0
+        self.capacity = float(max(1, burst))
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self.error_rate = error_rate
+        self.latency = latency_ms / 1000
+        self.lock = threading.Lock()
+        self.counts = {"requests": 0, "ok": 0, "rate_limited": 0, "server_errors": 0}
+
+    def admit(self) -> float:
+        # 0 if the request may go ahead, else seconds until it could
+        with self.lock:
+            now = time.monotonic()
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+            self.counts["requests"] += 1
+            if self.level >= 1:
+                self.level -= 1
+                return 0.0
+            self.counts["rate_limited"] += 1
+            return (1 - self.level) / self.rate
+
+    def count(self, key: str):
+        with self.lock:
+            self.counts[key] += 1
+
+
+def make_handler(llm: FakeLLM):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def reply(self, status: int, body: dict, headers: dict = None):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            self.reply(200, llm.counts)
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if not self.path.endswith("/chat/completions"):
+                return self.reply(404, {"error": {"message": "not found"}})
+            wait = llm.admit()
+            if wait:
+                return self.reply(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                                  {"retry-after": f"{wait:.2f}"})
+            time.sleep(llm.latency)
+            if random.random() < llm.error_rate:
+                llm.count("server_errors")
+                return self.reply(random.choice((500, 503)), {"error": {"message": "Injected failure"}})
+
+            prompt = "\n".join(str(m.get("content", "")) for m in request.get("messages", []))
+            content = json.dumps(answer(prompt))
+            prompt_tokens, completion_tokens = len(prompt) // 4, len(content) // 4
+            llm.count("ok")
+            self.reply(200, {
+                "id": f"chatcmpl-{random.getrandbits(48):x}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "fake"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens},
+            })
+
+    return Handler
+
+
+def start(port: int = 0, rpm: int = 120, burst: int = 10, error_rate: float = 0.0, latency_ms: float = 50):
+    # Serve on a background thread; returns (server, llm). server.server_address has the port.
+    llm = FakeLLM(rpm, burst, error_rate, latency_ms)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(llm))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, llm
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Fake Groq chat completions server with rate limits")
+    arg_parser.add_argument("--port", type=int, default=8099)
+    arg_parser.add_argument("--rpm", type=int, default=120)
+    arg_parser.add_argument("--burst", type=int, default=10)
+    arg_parser.add_argument("--error-rate", type=float, default=0.0)
+    arg_parser.add_argument("--latency-ms", type=float, default=50)
+    args = arg_parser.parse_args()
+    server, _ = start(args.port, args.rpm, args.burst, args.error_rate, args.latency_ms)
+    print(f"Fake LLM server on http://127.0.0.1:{server.server_address[1]} (GET / for counters)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
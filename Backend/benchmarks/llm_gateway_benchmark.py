@@ -0,0 +1,100 @@
+# Throughput and failure rate of LLM calls against a rate-limited provider:
+# direct ChatGroq calls against the same calls through the LLM gateway.
+#
+#   python -m benchmarks.llm_gateway_benchmark --calls 120 --rpm 300 --burst 10 --error-rate 0.05
+#
+# Each mode gets a fresh fake provider (benchmarks/fake_llm_server.py) that
+# allows --rpm requests/min with a --burst bucket, answers 429 + Retry-After
+# beyond that and fails --error-rate of requests with a 500/503. "direct" is a
+# ChatGroq with no retries; "sdk_retries" is how the app used to call it (the
+# SDK's default two retries); "gateway" is get_llm()'s wrapper, with its request
+# bucket set to the provider's limit. All modes fire --calls recruiter-style
+# scoring prompts through score_concurrently at --concurrency, each with a
+# --timeout deadline. Reported: calls that succeeded, 429s the provider sent,
+# wall time and successful calls per minute against the provider ceiling.
+import argparse
+import asyncio
+import json
+import logging
+import time
+from benchmarks.fake_llm_server import start
+from langchain_core.output_parsers import SimpleJsonOutputParser
+from langchain_core.prompts import PromptTemplate
+
+MODES = ("direct", "sdk_retries", "gateway")
+
+prompt = PromptTemplate(
+    template="Job Description:\n{job_description}\n\nResume:\n{resume_text}\n\n"
+             'Return only JSON: {{"match_score": 0-100, "summary": "..."}}',
+    input_variables=["job_description", "resume_text"],
+)
+
+RESUME = ("Software Engineer at Acme Corp, 2021-Present. Built REST APIs with FastAPI and PostgreSQL. "
+          "Skills: Python, Go, SQL, Docker, Kubernetes, AWS. B.Tech Computer Science, CGPA 8.7. ") * 6
+
+
+def build_llm(mode: str, base_url: str, args):
+    from langchain_groq import ChatGroq
+    from llm_models.gateway import GatewayChatModel, LLMGateway
+
+    retries = 2 if mode == "sdk_retries" else 0
+    model = ChatGroq(api_key="fake", model="fake-model", base_url=base_url, max_retries=retries)
+    if mode != "gateway":
+        return model
+    return GatewayChatModel(model, LLMGateway(rpm=args.rpm, tpm=0, burst_seconds=args.burst * 60 / args.rpm,
+                                              deadline_seconds=args.timeout))
+
+
+async def run_mode(mode: str, args):
+    from resume_scores.concurrent_scoring import score_concurrently
+
+    server, provider = start(rpm=args.rpm, burst=args.burst, error_rate=args.error_rate,
+                             latency_ms=args.latency_ms)
+    try:
+        llm = build_llm(mode, f"http://127.0.0.1:{server.server_address[1]}", args)
+        chain = prompt | llm | SimpleJsonOutputParser()
+
+        async def score(i):
+            return await chain.ainvoke({"job_description": f"Backend engineer #{i}", "resume_text": RESUME})
+
+        started = time.perf_counter()
+        outcomes = await score_concurrently(range(args.calls), score, args.concurrency, args.timeout)
+        elapsed = time.perf_counter() - started
+    finally:
+        server.shutdown()
+
+    succeeded = sum(1 for o in outcomes if not o["error"])
+    return {
+        "mode": mode,
+        "calls": args.calls,
+        "succeeded": succeeded,
+        "failed": args.calls - succeeded,
+        "provider_requests": provider.counts["requests"],
+        "provider_429s": provider.counts["rate_limited"],
+        "provider_5xx": provider.counts["server_errors"],
+        "wall_seconds": round(elapsed, 2),
+        "successes_per_min": round(succeeded / elapsed * 60, 1),
+        "provider_ceiling_per_min": args.rpm,
+        "gateway": llm.gateway.snapshot() if mode == "gateway" else None,
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark LLM calls against a rate-limited fake provider")
+    arg_parser.add_argument("--calls", type=int, default=120)
+    arg_parser.add_argument("--concurrency", type=int, default=16)
+    arg_parser.add_argument("--rpm", type=int, default=300, help="provider requests/min")
+    arg_parser.add_argument("--burst", type=int, default=10, help="provider burst, in requests")
+    arg_parser.add_argument("--error-rate", type=float, default=0.05)
+    arg_parser.add_argument("--latency-ms", type=float, default=50)
+    arg_parser.add_argument("--timeout", type=float, default=60, help="per-call deadline in seconds")
+    arg_parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    args = arg_parser.parse_args()
+
+    # Every failed call logs a warning; the report has the counts
+    logging.disable(logging.WARNING)
+    print(json.dumps([asyncio.run(run_mode(mode, args)) for mode in args.modes], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+# End-to-end load test of the main API paths, offline and repeatable.
+#
+#   python -m benchmarks.load_test --requests 100 --concurrency 8 --output load_test.json
+#   python -m benchmarks.load_test --baseline benchmarks/load_baseline.json --max-regression 0.25
+#
+# Runs the app in-process against a scratch directory (database, Chroma store,
+# extraction cache; the real ones are never touched) and drives it through
+# httpx's ASGI transport. LLM_BACKEND=fake and EMBEDDING_BACKEND=fake replace
+# Groq and the e5 model with deterministic stand-ins (--llm-latency-ms and
+# --llm-error-rate shape the fake LLM), so no key, network or model download is
+# needed. Users, a recruiter and an admin are registered and --seed-resumes
+# synthetic resumes (benchmarks/synthetic_resumes.py, alternating PDF/DOCX)
+# uploaded before anything is timed.
+#
+# Scenarios: login, upload, get_score, match_best_resumes and admin_listings.
+# Each sends its requests at --concurrency and reports throughput and
+# p50/p95/p99 latency; the JSON goes to stdout and --output. With --baseline
+# the run is compared against an earlier one and the script exits 1 when a
+# scenario's p95 or throughput is more than --max-regression worse, or its
+# error rate rose, which lets CI gate on it.
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+SCENARIOS = ("login", "upload", "get_score", "match_best_resumes", "admin_listings")
+PASSWORD = "load-test-password"
+MAX_ERROR_SAMPLES = 3
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * pct))] * 1000, 2) if values else None
+
+
+def summarize(latencies, statuses, elapsed, error_samples=()):
+    errors = sum(1 for status in statuses if status >= 400)
+    return {
+        "requests": len(statuses),
+        "errors": errors,
+        "error_rate": round(errors / len(statuses), 4) if statuses else 0.0,
+        "throughput_rps": round(len(statuses) / elapsed, 2) if elapsed else None,
+        "p50_ms": percentile(latencies, 0.5),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2) if latencies else None,
+        # A few distinct failures, so a red CI run says what broke
+        "error_samples": sorted(error_samples)[:MAX_ERROR_SAMPLES],
+    }
+
+
+async def drive(count, concurrency, send):
+    # send(i) -> response; returns the scenario summary
+    latencies, statuses, error_samples = [], [], set()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await send(i)
+                status = response.status_code
+                if status >= 400:
+                    error_samples.add(f"{status} {response.text[:200]}")
+            except Exception as e:
+                status = 599
+                error_samples.add(f"{status} {type(e).__name__}: {e}")
+            latencies.append(time.perf_counter() - started)
+            statuses.append(status)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    return summarize(latencies, statuses, time.perf_counter() - started, error_samples)
+
+
+async def register(client, index, email, role):
+    response = await client.post("/auth/register", json={
+        "full_name": email.split("@")[0], "email": email, "phone_number": f"555{index:07d}",
+        "password": PASSWORD, "role": role})
+    response.raise_for_status()
+    login = await client.post("/auth/login", data={"username": email, "password": PASSWORD})
+    login.raise_for_status()
+    return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+
+async def run(args):
+    import httpx
+    import main
+    from benchmarks.synthetic_resumes import job_description, resume_file
+
+    # Generated up front so rendering isn't timed
+    files = [resume_file(i, ("pdf", "docx")[i % 2], args.seed)
+             for i in range(args.seed_resumes + args.requests)]
+    results = {}
+
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=300) as client:
+            users = [await register(client, i, f"user{i}@example.com", "user") for i in range(args.users)]
+            recruiter = await register(client, args.users, "recruiter@example.com", "recruiter")
+            admin = await register(client, args.users + 1, "admin@example.com", "admin")
+
+            resume_ids = []
+
+            async def upload(i):
+                name, data = files[i]
+                response = await client.post("/user/upload_resume", headers=users[i % len(users)],
+                                             files={"file": (name, data)})
+                if response.status_code == 201:
+                    resume_ids.append(response.json()["id"])
+                return response
+
+            seeding = await drive(args.seed_resumes, args.concurrency, upload)
+            if not resume_ids:
+                raise SystemExit(f"Seeding uploads failed: {seeding}")
+
+            async def login(i):
+                return await client.post("/auth/login", data={
+                    "username": f"user{i % args.users}@example.com", "password": PASSWORD})
+
+            async def get_score(i):
+                return await client.post(f"/user/get_score/{resume_ids[i % len(resume_ids)]}",
+                                         json={"job_description": job_description(i % args.job_descriptions,
+                                                                                  args.seed)})
+
+            async def match_best_resumes(i):
+                return await client.post("/recruiter/match-best-resumes", headers=recruiter,
+                                         json={"job_description": job_description(i % args.job_descriptions,
+                                                                                   args.seed),
+                                               "threshold": 0})
+
+            async def admin_listings(i):
+                path = "/admin/all-users" if i % 2 else "/admin/resumes/"
+                return await client.get(path, headers=admin, params={"limit": 50})
+
+            scenarios = {
+                "login": (login, args.requests),
+                "upload": (lambda i: upload(args.seed_resumes + i), args.requests),
+                "get_score": (get_score, args.requests),
+                "match_best_resumes": (match_best_resumes, args.match_requests),
+                "admin_listings": (admin_listings, args.requests),
+            }
+            for name in args.scenarios:
+                send, count = scenarios[name]
+                results[name] = await drive(count, args.concurrency, send)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "requests": args.requests,
+            "match_requests": args.match_requests,
+            "concurrency": args.concurrency,
+            "seed_resumes": args.seed_resumes,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_error_rate": args.llm_error_rate,
+            "bcrypt_rounds": args.bcrypt_rounds,
+        },
+        "scenarios": results,
+    }
+
+
+def compare(current, baseline, max_regression):
+    # Returns a list of human-readable regressions (empty when the run is within bounds)
+    regressions = []
+    for name, base in baseline.get("scenarios", {}).items():
+        now = current["scenarios"].get(name)
+        if now is None:
+            continue
+        if base.get("p95_ms") and now.get("p95_ms") and now["p95_ms"] > base["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {now['p95_ms']}ms vs baseline {base['p95_ms']}ms")
+        if (base.get("throughput_rps") and now.get("throughput_rps")
+                and now["throughput_rps"] < base["throughput_rps"] * (1 - max_regression)):
+            regressions.append(f"{name}: throughput {now['throughput_rps']}/s vs baseline {base['throughput_rps']}/s")
+        if now["error_rate"] > base.get("error_rate", 0.0) + 0.01:
+            regressions.append(f"{name}: error rate {now['error_rate']} vs baseline {base.get('error_rate', 0.0)}")
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Offline end-to-end load test with a fake LLM and embeddings")
+    arg_parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=SCENARIOS)
+    arg_parser.add_argument("--requests", type=int, default=100, help="requests per scenario")
+    arg_parser.add_argument("--match-requests", type=int, default=10, help="requests for match_best_resumes")
+    arg_parser.add_argument("--concurrency", type=int, default=8)
+    arg_parser.add_argument("--users", type=int, default=10)
+    arg_parser.add_argument("--seed-resumes", type=int, default=30)
+    arg_parser.add_argument("--job-descriptions", type=int, default=5)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--llm-latency-ms", type=float, default=200)
+    arg_parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    arg_parser.add_argument("--bcrypt-rounds", type=int, default=4)
+    arg_parser.add_argument("--output", default=None, help="also write the results here")
+    arg_parser.add_argument("--baseline", default=None, help="results JSON to compare against")
+    arg_parser.add_argument("--max-regression", type=float, default=0.25)
+    args = arg_parser.parse_args()
+
+    # Settings are read at import time, so set them before the app is imported
+    os.environ.update({
+        "LLM_BACKEND": "fake",
+        "EMBEDDING_BACKEND": "fake",
+        "LLM_FAKE_LATENCY_MS": str(args.llm_latency_ms),
+        "LLM_FAKE_ERROR_RATE": str(args.llm_error_rate),
+        "LLM_FAKE_SEED": str(args.seed),
+        # The fake provider has no quota; the scheduler still orders the calls
+        "LLM_RPM": "0",
+        "LLM_TPM": "0",
+        "BCRYPT_ROUNDS": str(args.bcrypt_rounds),
+        "FAST_STARTUP": "1",
+    })
+    os.environ.setdefault("SECRET_KEY", "load-test")
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'load_test.db')}"
+        os.chdir(workdir)
+        results = asyncio.run(run(args))
+
+    report = json.dumps(results, indent=2)
+    print(report)
+    if output:
+        with open(output, "w") as f:
+            f.write(report + "\n")
+    if baseline_path:
+        with open(baseline_path) as f:
+            regressions = compare(results, json.load(f), args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# Login throughput: logins/sec and latency percentiles at a given concurrency.
+#
+#   python -m benchmarks.login_benchmark --users 50 --logins 400 --concurrency 32 --rounds 12
+#
+# Runs the app in-process against a scratch database (the real
+# resume_analyzer.db is never touched) and drives POST /auth/login through
+# httpx's ASGI transport. While the logins run, a probe hits /health/live
+# every 50ms; its latency shows whether hashing is stalling the event loop.
+# --rehash-from seeds the users at a different cost so the first login of
+# each user also pays for the transparent rehash.
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * pct))] * 1000, 2) if values else None
+
+
+async def run(args):
+    import httpx
+    import main
+    from database import SessionLocal
+    from executors import AUTH_POOL_SIZE
+    from models import User
+    from passlib.context import CryptContext
+
+    seed_context = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=args.rehash_from or args.rounds)
+    password = "benchmark-password"
+    seed_hash = seed_context.hash(password)
+
+    latencies, probes, failures = [], [], 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+    done = asyncio.Event()
+
+    # Startup runs the migrations, so seed once the lifespan has started
+    async with main.app.router.lifespan_context(main.app):
+        with SessionLocal() as db:
+            db.add_all(User(full_name=f"user {i}", email=f"bench{i}@example.com", phone_number=f"555{i:07d}",
+                            hashed_password=seed_hash) for i in range(args.users))
+            db.commit()
+
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def login(i):
+                nonlocal failures
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await client.post("/auth/login", data={
+                        "username": f"bench{i % args.users}@example.com", "password": password})
+                    latencies.append(time.perf_counter() - started)
+                    if response.status_code != 200:
+                        failures += 1
+
+            async def probe():
+                while not done.is_set():
+                    started = time.perf_counter()
+                    await client.get("/health/live")
+                    probes.append(time.perf_counter() - started)
+                    await asyncio.sleep(0.05)
+
+            # Warm the hashing pool so process start-up isn't counted
+            await login(0)
+            latencies.clear()
+
+            probe_task = asyncio.create_task(probe())
+            started = time.perf_counter()
+            await asyncio.gather(*(login(i) for i in range(args.logins)))
+            elapsed = time.perf_counter() - started
+            done.set()
+            await probe_task
+
+    return {
+        "logins": args.logins,
+        "concurrency": args.concurrency,
+        "bcrypt_rounds": args.rounds,
+        "seeded_rounds": args.rehash_from or args.rounds,
+        "auth_pool_size": AUTH_POOL_SIZE,
+        "failures": failures,
+        "logins_per_sec": round(args.logins / elapsed, 1),
+        "p50_ms": percentile(latencies, 0.5),
+        "p99_ms": percentile(latencies, 0.99),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2),
+        "probe_p50_ms": percentile(probes, 0.5),
+        "probe_p99_ms": percentile(probes, 0.99),
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark /auth/login throughput and latency")
+    arg_parser.add_argument("--users", type=int, default=50)
+    arg_parser.add_argument("--logins", type=int, default=400)
+    arg_parser.add_argument("--concurrency", type=int, default=32)
+    arg_parser.add_argument("--rounds", type=int, default=12, help="BCRYPT_ROUNDS for the app")
+    arg_parser.add_argument("--rehash-from", type=int, default=None,
+                            help="seed users at this cost to exercise rehash-on-login")
+    arg_parser.add_argument("--pool-size", type=int, default=None, help="AUTH_POOL_SIZE for the app")
+    args = arg_parser.parse_args()
+
+    # Settings are read at import time, so set them before the app is imported
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    os.environ.setdefault("SECRET_KEY", "login-benchmark")
+    os.environ["FAST_STARTUP"] = "1"
+    if args.pool_size:
+        os.environ["AUTH_POOL_SIZE"] = str(args.pool_size)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'login_benchmark.db')}"
+        os.chdir(workdir)
+        print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# Offline evaluation of candidate retrieval: how many LLM calls does hybrid
+# retrieval save compared with the fixed dense top-k, and at what top-N recall?
+#
+#   python -m benchmarks.retrieval_eval --top-n 5 10
+#   python -m benchmarks.retrieval_eval --labels labels.jsonl
+#
+# Ground truth comes from LLM scores already cached in match_results (resumes
+# scoring >= --relevance-threshold for a job are relevant, ranked by score), or
+# from a JSONL file with {"job_description": ..., "relevant_resume_ids": [...]}
+# where the list order is the ideal ranking. Recall@N is the share of the N best
+# resumes that retrieval hands to the LLM stage.
+from database import SessionLocal
+from models import JobDescription, JobMatchResult
+from resume_scores.hybrid_retriever import hybrid_retrieve
+import argparse
+import json
+import statistics
+
+
+def load_labels(path, db, relevance_threshold, min_relevant):
+    if path:
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    labels = []
+    for job in db.query(JobDescription).all():
+        rows = db.query(JobMatchResult).filter(
+            JobMatchResult.job_id == job.id,
+            JobMatchResult.match_score >= relevance_threshold
+        ).order_by(JobMatchResult.match_score.desc()).all()
+        relevant = list(dict.fromkeys(r.resume_id for r in rows))
+        if len(relevant) >= min_relevant:
+            labels.append({"job_description": job.description, "relevant_resume_ids": relevant})
+    return labels
+
+
+def recall_at(relevant, candidates, n):
+    ideal = relevant[:n]
+    return len(set(ideal) & set(candidates)) / len(ideal) if ideal else 0.0
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Evaluate hybrid vs dense candidate retrieval")
+    arg_parser.add_argument("--labels", default=None)
+    arg_parser.add_argument("--top-n", type=int, nargs="+", default=[5, 10])
+    arg_parser.add_argument("--dense-k", type=int, default=100)
+    arg_parser.add_argument("--relevance-threshold", type=float, default=70)
+    arg_parser.add_argument("--min-relevant", type=int, default=1)
+    args = arg_parser.parse_args()
+
+    from routers.recruiter import filter_top_resumes_with_chroma
+
+    with SessionLocal() as db:
+        labels = load_labels(args.labels, db, args.relevance_threshold, args.min_relevant)
+        if not labels:
+            print("No labelled jobs found; score some jobs first or pass --labels")
+            return
+
+        results = {"dense": {"calls": []}, "hybrid": {"calls": []}}
+        for n in args.top_n:
+            for mode in results:
+                results[mode][f"recall@{n}"] = []
+
+        for label in labels:
+            relevant = label["relevant_resume_ids"]
+            candidates = {
+                "dense": filter_top_resumes_with_chroma(label["job_description"], top_k=args.dense_k),
+                "hybrid": [hit["resume_id"] for hit in hybrid_retrieve(label["job_description"], db)],
+            }
+            for mode, ids in candidates.items():
+                results[mode]["calls"].append(len(ids))
+                for n in args.top_n:
+                    results[mode][f"recall@{n}"].append(recall_at(relevant, ids, n))
+
+    report = {"jobs": len(labels)}
+    for mode, metrics in results.items():
+        report[mode] = {name: round(statistics.mean(values), 4) for name, values in metrics.items()}
+        report[mode]["total_llm_calls"] = sum(metrics["calls"])
+    dense_calls, hybrid_calls = report["dense"]["total_llm_calls"], report["hybrid"]["total_llm_calls"]
+    report["llm_calls_saved"] = dense_calls - hybrid_calls
+    report["llm_calls_saved_pct"] = round(100 * (dense_calls - hybrid_calls) / dense_calls, 1) if dense_calls else 0.0
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# Interactive latency while bulk recruiter rankings compete for the same LLM
+# quota, with and without the LLM work scheduler.
+#
+#   python -m benchmarks.scheduler_benchmark --bulk-calls 60 --recruiters 2 --interactive-calls 20
+#
+# A fake provider (benchmarks/fake_llm_server.py) allows --rpm requests/min.
+# Each recruiter starts a ranking of --bulk-calls scoring calls at once (the
+# way /recruiter/match-best-resumes fans out), and meanwhile single interactive
+# calls arrive every --interactive-interval seconds. "fifo" sends everything
+# straight to the gateway's buckets in arrival order; "scheduled" puts the
+# gateway behind an LLMScheduler. Reported per class: p50/p95 latency, and per
+# recruiter when their last call finished, plus the scheduler's own counters.
+import argparse
+import asyncio
+import json
+import logging
+import time
+from benchmarks.fake_llm_server import start
+from benchmarks.llm_gateway_benchmark import RESUME, prompt
+from langchain_core.output_parsers import SimpleJsonOutputParser
+
+MODES = ("fifo", "scheduled")
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * pct))], 1) if values else None
+
+
+async def run_mode(mode: str, args):
+    from langchain_groq import ChatGroq
+    from llm_models.gateway import GatewayChatModel, LLMGateway
+    from llm_models.scheduler import BULK, INTERACTIVE, LLMScheduler, llm_work
+
+    server, provider = start(rpm=args.rpm, burst=args.burst, latency_ms=args.latency_ms)
+    scheduler = LLMScheduler(slots=args.slots, p95_target_ms=args.p95_target_ms) if mode == "scheduled" else None
+    gateway = LLMGateway(rpm=args.rpm, tpm=0, burst_seconds=args.burst * 60 / args.rpm,
+                         deadline_seconds=args.timeout, scheduler=scheduler)
+    model = ChatGroq(api_key="fake", model="fake-model", max_retries=0,
+                     base_url=f"http://127.0.0.1:{server.server_address[1]}")
+    chain = prompt | GatewayChatModel(model, gateway) | SimpleJsonOutputParser()
+    started = time.perf_counter()
+    latencies = {"interactive": [], "bulk": []}
+    finished = {}
+    errors = {"interactive": 0, "bulk": 0}
+
+    async def one(work_class, tenant, i):
+        call_started = time.perf_counter()
+        try:
+            with llm_work(work_class, tenant):
+                await chain.ainvoke({"job_description": f"Role {tenant}-{i}", "resume_text": RESUME})
+        except Exception:
+            errors[work_class] += 1
+            return
+        latencies[work_class].append((time.perf_counter() - call_started) * 1000)
+        if work_class == BULK:
+            finished[tenant] = round(time.perf_counter() - started, 2)
+
+    async def interactive():
+        tasks = []
+        for i in range(args.interactive_calls):
+            tasks.append(asyncio.create_task(one(INTERACTIVE, f"user{i}", i)))
+            await asyncio.sleep(args.interactive_interval)
+        await asyncio.gather(*tasks)
+
+    try:
+        bulk = [one(BULK, f"recruiter{r}", i) for r in range(args.recruiters) for i in range(args.bulk_calls)]
+        await asyncio.gather(interactive(), *bulk)
+    finally:
+        server.shutdown()
+
+    return {
+        "mode": mode,
+        "wall_seconds": round(time.perf_counter() - started, 2),
+        "interactive_p50_ms": percentile(latencies["interactive"], 0.5),
+        "interactive_p95_ms": percentile(latencies["interactive"], 0.95),
+        "bulk_p50_ms": percentile(latencies["bulk"], 0.5),
+        "bulk_p95_ms": percentile(latencies["bulk"], 0.95),
+        "errors": errors,
+        "recruiter_finished_s": finished,
+        "provider_429s": provider.counts["rate_limited"],
+        "scheduler": scheduler.snapshot() if scheduler else None,
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark interactive LLM latency under bulk load")
+    arg_parser.add_argument("--rpm", type=int, default=600)
+    arg_parser.add_argument("--burst", type=int, default=10)
+    arg_parser.add_argument("--latency-ms", type=float, default=200)
+    arg_parser.add_argument("--slots", type=int, default=8)
+    arg_parser.add_argument("--p95-target-ms", type=float, default=3000)
+    arg_parser.add_argument("--recruiters", type=int, default=2)
+    arg_parser.add_argument("--bulk-calls", type=int, default=60, help="calls per recruiter ranking")
+    arg_parser.add_argument("--interactive-calls", type=int, default=20)
+    arg_parser.add_argument("--interactive-interval", type=float, default=0.5)
+    arg_parser.add_argument("--timeout", type=float, default=120)
+    arg_parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    args = arg_parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    print(json.dumps([asyncio.run(run_mode(mode, args)) for mode in args.modes], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# Measure how long it takes to import the app and run its startup hooks.
+#
+#   python -m benchmarks.startup_benchmark --runs 5 --max-import-seconds 3
+#
+# Each run is a fresh interpreter with FAST_STARTUP=1, so the number is what a
+# worker pays before it can serve (no model warmup). With --max-import-seconds
+# the script exits non-zero when the median import time exceeds the budget,
+# which lets CI catch an eager model load sneaking back into module scope.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import asyncio, json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def boot():
+    async with main.app.router.lifespan_context(main.app):
+        pass
+
+asyncio.run(boot())
+booted = time.perf_counter()
+print(json.dumps({"import_s": imported - started, "startup_s": booted - imported}))
+"""
+
+
+def run_once(env, workdir):
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE], cwd=workdir, env=env,
+                         capture_output=True, text=True, check=True)
+    timings = json.loads(out.stdout.strip().splitlines()[-1])
+
+    # -X importtime writes "self | cumulative | module" lines to stderr
+    imports = []
+    for line in out.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            depth = (len(parts[2]) - len(parts[2].lstrip())) // 2
+            imports.append((int(parts[1]), depth, parts[2].strip()))
+    return timings, imports
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark app import and startup time")
+    arg_parser.add_argument("--runs", type=int, default=5)
+    arg_parser.add_argument("--top", type=int, default=10)
+    arg_parser.add_argument("--max-import-seconds", type=float, default=None)
+    args = arg_parser.parse_args()
+
+    env = dict(os.environ, FAST_STARTUP="1", PYTHONPATH=BACKEND_DIR)
+    env.setdefault("SECRET_KEY", "startup-benchmark")
+
+    # Run from a scratch directory so startup migrations create a throwaway
+    # SQLite file instead of touching the real one
+    with tempfile.TemporaryDirectory() as workdir:
+        # First run compiles bytecode; don't count it
+        run_once(env, workdir)
+        runs = [run_once(env, workdir) for _ in range(args.runs)]
+
+    import_times = [t["import_s"] for t, _ in runs]
+    startup_times = [t["startup_s"] for t, _ in runs]
+    # main itself and the modules it imports directly
+    top_level = sorted((i for i in runs[-1][1] if i[1] <= 1), reverse=True)[:args.top]
+    report = {
+        "runs": args.runs,
+        "import_median_s": round(statistics.median(import_times), 3),
+        "import_max_s": round(max(import_times), 3),
+        "startup_median_s": round(statistics.median(startup_times), 3),
+        "slowest_imports_ms": {name: round(us / 1000, 1) for us, _, name in top_level},
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.max_import_seconds is not None and report["import_median_s"] > args.max_import_seconds:
+        print(f"Import time {report['import_median_s']}s exceeds budget of {args.max_import_seconds}s", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,131 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+import os
+import threading
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./resume_analyzer.db"
+## Engine configuration ##
+# DATABASE_URL selects the backend (SQLite by default; any SQLAlchemy URL such
+# as postgresql://... works). SQLite connections get WAL journaling,
+# synchronous=NORMAL and a memory-mapped read window so readers don't block
+# the writer, and enforce foreign keys so the ON DELETE CASCADE / SET NULL
+# rules in models.py apply (SQLite ignores them unless asked). ASYNC_DATABASE_URL overrides the URL used for AsyncSession,
+# which otherwise swaps in the async driver for the same database.
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL,connect_args={'check_same_thread':False})
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./resume_analyzer.db")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "")
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Seconds before a pooled connection is replaced; -1 keeps connections forever
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_ECHO = os.getenv("DB_ECHO", "0") == "1"
+
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+# Negative values are KiB, per SQLite's cache_size convention
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def is_sqlite(url) -> bool:
+    return make_url(str(url)).get_backend_name() == "sqlite"
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def engine_options(url) -> dict:
+    options = {"echo": DB_ECHO, "pool_pre_ping": True}
+    url = make_url(str(url))
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}
+        if url.database in (None, "", ":memory:"):
+            # An in-memory database only exists on its one connection
+            return options
+    options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+                   pool_timeout=DB_POOL_TIMEOUT, pool_recycle=DB_POOL_RECYCLE)
+    return options
+
+
+def create_db_engine(url: str = SQLALCHEMY_DATABASE_URL, tuned: bool = True):
+    engine = create_engine(url, **engine_options(url))
+    if tuned and is_sqlite(url):
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+
+def async_database_url(url: str = SQLALCHEMY_DATABASE_URL) -> str:
+    if ASYNC_DATABASE_URL:
+        return ASYNC_DATABASE_URL
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {url.drivername}; set ASYNC_DATABASE_URL")
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+engine = create_db_engine(SQLALCHEMY_DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False,autoflush=False,bind=engine)
 
 Base = declarative_base()
 
+_async_lock = threading.Lock()
+_async_engine = None
+_AsyncSessionLocal = None
+
+
+def get_async_engine():
+    # Built on first use so the async driver is only needed when async sessions are
+    global _async_engine, _AsyncSessionLocal
+    with _async_lock:
+        if _async_engine is None:
+            from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+            url = async_database_url()
+            _async_engine = create_async_engine(url, **engine_options(url))
+            if is_sqlite(url):
+                event.listen(_async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+            _AsyncSessionLocal = async_sessionmaker(_async_engine, class_=AsyncSession,
+                                                    autoflush=False, expire_on_commit=False)
+        return _async_engine
+
+
+async def dispose_async_engine():
+    global _async_engine, _AsyncSessionLocal
+    with _async_lock:
+        async_engine, _async_engine, _AsyncSessionLocal = _async_engine, None, None
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        yield db
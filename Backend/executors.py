@@ -0,0 +1,203 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import os
+import threading
+import time
+
+## Dispatch layer for blocking work called from async handlers ##
+# CPU-bound work (document parsing, text normalization) goes to a process pool so it
+# doesn't hold the GIL; I/O-bound work (LLM calls, DB queries, Chroma writes)
+# goes to a thread pool. Password hashing gets its own small process pool so a
+# burst of logins can't starve parsing or stall the event loop. Embedding runs
+# in this process on a dedicated thread pool (one thread by default): torch and
+# onnxruntime release the GIL while encoding, and a single in-process model is
+# the one startup warms, where process pool workers would each load (and keep)
+# their own copy, and open their own CUDA context, on their first upload. Each
+# pool is sized independently.
+
+CPU_POOL_SIZE = int(os.getenv("CPU_POOL_SIZE", str(min(4, os.cpu_count() or 1))))
+IO_POOL_SIZE = int(os.getenv("IO_POOL_SIZE", "32"))
+AUTH_POOL_SIZE = int(os.getenv("AUTH_POOL_SIZE", str(min(2, os.cpu_count() or 1))))
+# Threads sharing the one embedding model; the runtime already parallelises each batch across cores
+EMBED_POOL_SIZE = int(os.getenv("EMBED_POOL_SIZE", "1"))
+
+
+class PoolStats:
+    def __init__(self, name: str, size: int, measures_wait: bool):
+        self.name = name
+        self.size = size
+        # Process pool tasks can't report back when they start, so only the
+        # thread pool splits queue wait from run time
+        self.measures_wait = measures_wait
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+        self.total_wait_s = 0.0
+        self.total_run_s = 0.0
+
+    def queue_depth(self) -> int:
+        if self.measures_wait:
+            return max(0, self.in_flight - self.running)
+        return max(0, self.in_flight - self.size)
+
+    def on_submit(self):
+        with self.lock:
+            self.in_flight += 1
+            self.submitted += 1
+            # Anything beyond the pool size has to wait for a free worker
+            self.max_queue_depth = max(self.max_queue_depth, self.in_flight - self.size)
+
+    def on_done(self, elapsed_s: float, failed: bool):
+        with self.lock:
+            self.in_flight -= 1
+            self.total_run_s += elapsed_s
+            if failed:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            done = self.completed + self.failed
+            return {
+                "size": self.size,
+                "in_flight": self.in_flight,
+                "running": self.running if self.measures_wait else min(self.in_flight, self.size),
+                "queue_depth": self.queue_depth(),
+                "max_queue_depth": self.max_queue_depth,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_wait_ms": (round(self.total_wait_s / done * 1000, 2) if done else 0.0)
+                               if self.measures_wait else None,
+                "avg_latency_ms": round(self.total_run_s / done * 1000, 2) if done else 0.0,
+            }
+
+
+_cpu_stats = PoolStats("cpu", CPU_POOL_SIZE, measures_wait=False)
+_io_stats = PoolStats("io", IO_POOL_SIZE, measures_wait=True)
+_auth_stats = PoolStats("auth", AUTH_POOL_SIZE, measures_wait=False)
+_embed_stats = PoolStats("embed", EMBED_POOL_SIZE, measures_wait=True)
+_pool_lock = threading.Lock()
+_cpu_pool: Optional[ProcessPoolExecutor] = None
+_io_pool: Optional[ThreadPoolExecutor] = None
+_auth_pool: Optional[ProcessPoolExecutor] = None
+_embed_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _get_cpu_pool() -> ProcessPoolExecutor:
+    global _cpu_pool
+    with _pool_lock:
+        if _cpu_pool is None:
+            # spawn rather than fork: forking a process that already initialised CUDA or
+            # holds open SQLite/Chroma handles is unsafe
+            _cpu_pool = ProcessPoolExecutor(max_workers=CPU_POOL_SIZE,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        return _cpu_pool
+
+
+def _get_auth_pool() -> ProcessPoolExecutor:
+    global _auth_pool
+    with _pool_lock:
+        if _auth_pool is None:
+            _auth_pool = ProcessPoolExecutor(max_workers=AUTH_POOL_SIZE,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        return _auth_pool
+
+
+def _get_io_pool() -> ThreadPoolExecutor:
+    global _io_pool
+    with _pool_lock:
+        if _io_pool is None:
+            _io_pool = ThreadPoolExecutor(max_workers=IO_POOL_SIZE, thread_name_prefix="io")
+        return _io_pool
+
+
+def _get_embed_pool() -> ThreadPoolExecutor:
+    global _embed_pool
+    with _pool_lock:
+        if _embed_pool is None:
+            _embed_pool = ThreadPoolExecutor(max_workers=EMBED_POOL_SIZE, thread_name_prefix="embed")
+        return _embed_pool
+
+
+def _timed_in_thread(stats: PoolStats, submitted_at: float, fn: Callable, *args, **kwargs):
+    # Runs inside the worker thread, so the queue wait can be measured exactly
+    with stats.lock:
+        stats.running += 1
+        stats.total_wait_s += time.perf_counter() - submitted_at
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        with stats.lock:
+            stats.running -= 1
+
+
+async def _dispatch(pool: Executor, stats: PoolStats, fn: Callable, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    stats.on_submit()
+    started = time.perf_counter()
+    failed = False
+    try:
+        if isinstance(pool, ThreadPoolExecutor):
+            # Run in a copy of the caller's context (as asyncio.to_thread does) so context
+            # variables such as the LLM deadline and work class carry over into the thread
+            call = functools.partial(contextvars.copy_context().run, _timed_in_thread, stats, started, fn,
+                                     *args, **kwargs)
+        else:
+            call = functools.partial(fn, *args, **kwargs)
+        return await loop.run_in_executor(pool, call)
+    except Exception:
+        failed = True
+        raise
+    finally:
+        stats.on_done(time.perf_counter() - started, failed)
+
+
+async def run_cpu(fn: Callable, *args, **kwargs):
+    # fn and its arguments must be picklable (module-level functions, plain data)
+    return await _dispatch(_get_cpu_pool(), _cpu_stats, fn, *args, **kwargs)
+
+
+async def run_io(fn: Callable, *args, **kwargs):
+    return await _dispatch(_get_io_pool(), _io_stats, fn, *args, **kwargs)
+
+
+async def run_auth(fn: Callable, *args, **kwargs):
+    # Same contract as run_cpu, on the password hashing pool
+    return await _dispatch(_get_auth_pool(), _auth_stats, fn, *args, **kwargs)
+
+
+async def run_embed(fn: Callable, *args, **kwargs):
+    # Encoding with the process-wide embedding model, on its dedicated thread(s)
+    return await _dispatch(_get_embed_pool(), _embed_stats, fn, *args, **kwargs)
+
+
+def executor_stats() -> Dict[str, Dict[str, Any]]:
+    return {"cpu": _cpu_stats.snapshot(), "io": _io_stats.snapshot(), "auth": _auth_stats.snapshot(),
+            "embed": _embed_stats.snapshot()}
+
+
+def shutdown_executors():
+    global _cpu_pool, _io_pool, _auth_pool, _embed_pool
+    with _pool_lock:
+        if _cpu_pool is not None:
+            _cpu_pool.shutdown(wait=False, cancel_futures=True)
+            _cpu_pool = None
+        if _auth_pool is not None:
+            _auth_pool.shutdown(wait=False, cancel_futures=True)
+            _auth_pool = None
+        if _io_pool is not None:
+            _io_pool.shutdown(wait=False, cancel_futures=True)
+            _io_pool = None
+        if _embed_pool is not None:
+            _embed_pool.shutdown(wait=False, cancel_futures=True)
+            _embed_pool = None
@@ -0,0 +1,126 @@
+from database import SessionLocal
+from typing import Any, Callable, Dict
+import asyncio
+import os
+import threading
+import uuid
+
+JOB_SPOOL_DIR = os.getenv("JOB_SPOOL_DIR", "uploaded/jobs")
+
+ProgressFn = Callable[[int, str], None]
+
+_loops = threading.local()
+
+
+# Raised by a handler when retrying cannot help (bad input, missing rows)
+class PermanentJobError(Exception):
+    pass
+
+
+def run_async(coro):
+    # One event loop per worker thread, kept open across jobs: the cached LLM chains hold
+    # async HTTP clients bound to the loop they were first used on, so a fresh asyncio.run()
+    # per job would leave the next job talking to a closed loop
+    loop = getattr(_loops, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = _loops.loop = asyncio.new_event_loop()
+    return loop.run_until_complete(coro)
+
+
+def spool_upload(upload) -> str:
+    # Upload bytes must outlive the request, so they are parked on disk until a worker runs the job
+    os.makedirs(JOB_SPOOL_DIR, exist_ok=True)
+    extension = os.path.splitext(upload.filename)[1].lower()
+    path = os.path.join(JOB_SPOOL_DIR, f"{uuid.uuid4().hex}{extension}")
+    upload.persist(path)
+    return path
+
+
+def handle_upload_resume(payload: Dict[str, Any], progress: ProgressFn) -> Dict[str, Any]:
+    from llm_models.document_parser import DocumentLimitError
+    from resume_scores.ingest import ingest_upload
+    from uploads import SpooledUpload
+
+    spool_path = payload["spool_path"]
+    if not os.path.exists(spool_path):
+        raise PermanentJobError("Uploaded file is no longer available")
+
+    progress(10, "extracting")
+    with SessionLocal() as db, SpooledUpload.from_path(spool_path, payload["filename"]) as upload:
+        try:
+            resume, reused, tokens = ingest_upload(db, payload["user_id"], upload)
+        except ValueError as e:
+            if isinstance(e, DocumentLimitError) or "Unsupported file type" in str(e):
+                raise PermanentJobError(str(e))
+            raise
+        result = {
+            "id": resume.id,
+            "user_id": resume.user_id,
+            "file_path": resume.file_path,
+            "extracted_text": resume.extracted_text or "No name extracted",
+            "skills": resume.skills,
+            "experience": resume.experience,
+            "projects": resume.projects,
+            "education": resume.education,
+            "reused_extraction": reused,
+            "token_stats": tokens,
+        }
+
+    cleanup_upload_resume(payload)
+    return result
+
+
+def cleanup_upload_resume(payload: Dict[str, Any]):
+    try:
+        os.remove(payload["spool_path"])
+    except OSError:
+        pass
+
+
+def handle_score_resume(payload: Dict[str, Any], progress: ProgressFn) -> Dict[str, Any]:
+    from resume_scores.llm_scores import llm_score_user
+
+    progress(10, "scoring")
+    with SessionLocal() as db:
+        llm_result = llm_score_user(job_desc=payload["job_description"], db=db, resume_id=payload["resume_id"])
+    if isinstance(llm_result, dict) and llm_result.get("error"):
+        raise PermanentJobError(llm_result["error"])
+    return {"resume_id": payload["resume_id"], "llm_result": llm_result}
+
+
+def handle_match_best_resumes(payload: Dict[str, Any], progress: ProgressFn) -> Dict[str, Any]:
+    from routers.recruiter import BestResumesRequest, rank_best_resumes
+
+    progress(10, "ranking")
+    with SessionLocal() as db:
+        return run_async(rank_best_resumes(BestResumesRequest(**payload), db))
+
+
+def handle_bulk_ingest(payload: Dict[str, Any], progress: ProgressFn) -> Dict[str, Any]:
+    from resume_scores.bulk_ingest import BULK_BATCH_SIZE, BULK_CHECKPOINT_PATH, BULK_PAGE_SIZE, ingest_all
+    from models import Resume
+
+    with SessionLocal() as db:
+        total = db.query(Resume).count() or 1
+
+    def report(stats):
+        progress(min(99, int(stats["scanned"] * 100 / total)), f"{stats['embedded']} embedded")
+
+    return ingest_all(batch_size=payload.get("batch_size") or BULK_BATCH_SIZE,
+                      page_size=payload.get("page_size") or BULK_PAGE_SIZE,
+                      checkpoint_path=BULK_CHECKPOINT_PATH,
+                      restart=payload.get("restart", False),
+                      progress=report)
+
+
+HANDLERS: Dict[str, Callable[[Dict[str, Any], ProgressFn], Dict[str, Any]]] = {
+    "upload_resume": handle_upload_resume,
+    "score_resume": handle_score_resume,
+    "match_best_resumes": handle_match_best_resumes,
+    "bulk_ingest": handle_bulk_ingest,
+}
+
+# Called once a job has failed for good, to release anything its payload holds on to
+CLEANUPS: Dict[str, Callable[[Dict[str, Any]], None]] = {
+    "upload_resume": cleanup_upload_resume,
+}
@@ -0,0 +1,178 @@
+from sqlalchemy import and_, or_
+from database import SessionLocal
+from models import BackgroundJob, JobStatus
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+import logging
+import os
+import random
+import uuid
+
+## SQLite-backed durable job queue ##
+# Jobs are rows in background_jobs. A worker claims a job by taking a lease on
+# it; if the worker dies the lease expires and another worker picks the job up,
+# so queued and in-flight work survives restarts. The worker running a job
+# renews its lease on a heartbeat, and progress/complete/fail only apply while
+# the caller still holds the lease: a worker whose lease ran out and was taken
+# over gets LeaseLost instead of overwriting the new holder's state.
+
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_BACKOFF_BASE_SECONDS = float(os.getenv("JOB_BACKOFF_BASE_SECONDS", "5"))
+JOB_BACKOFF_MAX_SECONDS = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", "600"))
+
+
+class LeaseLost(Exception):
+    # The job's lease expired and another worker has claimed it since
+    pass
+
+
+def _now() -> datetime:
+    # SQLite DateTime columns are naive, so everything in this table is naive UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def backoff_delay(attempts: int) -> float:
+    delay = min(JOB_BACKOFF_MAX_SECONDS, JOB_BACKOFF_BASE_SECONDS * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def enqueue(kind: str, payload: Dict[str, Any], owner_id: Optional[int] = None,
+            max_attempts: int = JOB_MAX_ATTEMPTS) -> str:
+    now = _now()
+    job = BackgroundJob(
+        id=uuid.uuid4().hex,
+        kind=kind,
+        owner_id=owner_id,
+        status=JobStatus.queued,
+        payload=payload,
+        progress=0,
+        stage="queued",
+        attempts=0,
+        max_attempts=max_attempts,
+        run_after=now,
+        created_at=now,
+        updated_at=now
+    )
+    with SessionLocal() as db:
+        db.add(job)
+        db.commit()
+        return job.id
+
+
+def _claimable(now: datetime):
+    return or_(
+        and_(BackgroundJob.status == JobStatus.queued, BackgroundJob.run_after <= now),
+        # Lease ran out: the worker holding it crashed or was restarted
+        and_(BackgroundJob.status == JobStatus.running, BackgroundJob.lease_expires_at < now)
+    )
+
+
+def claim_next(worker_id: str) -> Optional[Dict[str, Any]]:
+    with SessionLocal() as db:
+        now = _now()
+        candidate = db.query(BackgroundJob.id).filter(_claimable(now)) \
+            .order_by(BackgroundJob.created_at).first()
+        if not candidate:
+            return None
+
+        # Conditional update so two workers racing for the same row can't both win
+        claimed = db.query(BackgroundJob).filter(BackgroundJob.id == candidate.id, _claimable(now)).update({
+            BackgroundJob.status: JobStatus.running,
+            BackgroundJob.locked_by: worker_id,
+            BackgroundJob.lease_expires_at: now + timedelta(seconds=JOB_LEASE_SECONDS),
+            BackgroundJob.attempts: BackgroundJob.attempts + 1,
+            BackgroundJob.stage: "started",
+            BackgroundJob.updated_at: now
+        }, synchronize_session=False)
+        db.commit()
+        if not claimed:
+            return None
+
+        job = db.query(BackgroundJob).filter(BackgroundJob.id == candidate.id).one()
+        return {"id": job.id, "kind": job.kind, "payload": job.payload or {}, "attempts": job.attempts,
+                "max_attempts": job.max_attempts, "owner_id": job.owner_id}
+
+
+def _held_by(job_id: str, worker_id: str):
+    return and_(BackgroundJob.id == job_id, BackgroundJob.status == JobStatus.running,
+                BackgroundJob.locked_by == worker_id)
+
+
+def _update_held(job_id: str, worker_id: str, values: Dict[Any, Any], *conditions):
+    # Applies `values` only while worker_id holds the job's lease; raises LeaseLost otherwise
+    with SessionLocal() as db:
+        updated = db.query(BackgroundJob).filter(_held_by(job_id, worker_id), *conditions) \
+            .update(values, synchronize_session=False)
+        db.commit()
+    if not updated:
+        raise LeaseLost(f"Job {job_id} is no longer leased to {worker_id}")
+
+
+def renew_lease(job_id: str, worker_id: str):
+    now = _now()
+    _update_held(job_id, worker_id, {
+        BackgroundJob.lease_expires_at: now + timedelta(seconds=JOB_LEASE_SECONDS),
+        BackgroundJob.updated_at: now
+    })
+
+
+def set_progress(job_id: str, worker_id: str, progress: int, stage: str):
+    # Reporting progress also renews the lease
+    now = _now()
+    _update_held(job_id, worker_id, {
+        BackgroundJob.progress: max(0, min(100, progress)),
+        BackgroundJob.stage: stage,
+        BackgroundJob.lease_expires_at: now + timedelta(seconds=JOB_LEASE_SECONDS),
+        BackgroundJob.updated_at: now
+    })
+
+
+def complete(job_id: str, worker_id: str, result: Dict[str, Any]):
+    _update_held(job_id, worker_id, {
+        BackgroundJob.status: JobStatus.succeeded,
+        BackgroundJob.result: result,
+        BackgroundJob.error: None,
+        BackgroundJob.progress: 100,
+        BackgroundJob.stage: "done",
+        BackgroundJob.locked_by: None,
+        BackgroundJob.lease_expires_at: None,
+        BackgroundJob.updated_at: _now()
+    })
+
+
+def fail(job_id: str, worker_id: str, error: str, retryable: bool = True) -> bool:
+    # Returns True when the job was rescheduled, False when it failed for good
+    with SessionLocal() as db:
+        job = db.query(BackgroundJob).filter(_held_by(job_id, worker_id)).first()
+        if not job:
+            raise LeaseLost(f"Job {job_id} is no longer leased to {worker_id}")
+        attempts, max_attempts = job.attempts, job.max_attempts
+
+    now = _now()
+    values = {
+        BackgroundJob.error: error,
+        BackgroundJob.locked_by: None,
+        BackgroundJob.lease_expires_at: None,
+        BackgroundJob.updated_at: now
+    }
+    rescheduled = retryable and attempts < max_attempts
+    if rescheduled:
+        delay = backoff_delay(attempts)
+        values.update({BackgroundJob.status: JobStatus.queued, BackgroundJob.stage: f"retrying in {delay:.0f}s",
+                       BackgroundJob.run_after: now + timedelta(seconds=delay)})
+    else:
+        values.update({BackgroundJob.status: JobStatus.failed, BackgroundJob.stage: "failed"})
+    # A re-claim bumps attempts, so matching it too catches a takeover between the read and the write
+    _update_held(job_id, worker_id, values, BackgroundJob.attempts == attempts)
+
+    logging.warning(f"Job {job_id} failed ({'retrying' if rescheduled else 'giving up'}): {error}")
+    return rescheduled
+
+
+def get_job(job_id: str) -> Optional[BackgroundJob]:
+    with SessionLocal() as db:
+        job = db.query(BackgroundJob).filter(BackgroundJob.id == job_id).first()
+        if job:
+            db.expunge(job)
+        return job
@@ -0,0 +1,126 @@
+from jobs import queue
+from jobs.handlers import CLEANUPS, HANDLERS, PermanentJobError
+from llm_models.scheduler import BACKGROUND, llm_work
+from database import engine
+from migrations import run_migrations
+from observability import format_stages, trace_scope
+import argparse
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+
+logging.basicConfig(level=logging.INFO)
+
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+# How often a running job's lease is renewed; well inside JOB_LEASE_SECONDS so a slow renewal can't let it lapse
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", str(queue.JOB_LEASE_SECONDS / 3)))
+
+
+def _heartbeat(job_id: str, worker_id: str, stop: threading.Event, interval: float):
+    while not stop.wait(interval):
+        try:
+            queue.renew_lease(job_id, worker_id)
+        except queue.LeaseLost:
+            logging.warning(f"Worker {worker_id} lost the lease on job {job_id}; another worker has it")
+            return
+        except Exception as e:
+            # A locked or briefly unavailable database; the next beat tries again before the lease runs out
+            logging.warning(f"Renewing the lease on job {job_id} failed: {e}")
+
+
+def run_job(job, worker_id: str, heartbeat_seconds: float = JOB_HEARTBEAT_SECONDS):
+    try:
+        _run_job(job, worker_id, heartbeat_seconds)
+    except queue.LeaseLost as e:
+        # The job was taken over after this worker's lease ran out; its outcome belongs to the new holder
+        logging.warning(f"Discarding the outcome of job {job['id']} ({job['kind']}): {e}")
+
+
+def _run_job(job, worker_id: str, heartbeat_seconds: float):
+    handler = HANDLERS.get(job["kind"])
+    if handler is None:
+        queue.fail(job["id"], worker_id, f"Unknown job kind: {job['kind']}", retryable=False)
+        return
+
+    def progress(percent: int, stage: str):
+        # Raises LeaseLost, which stops a handler that has been taken over at its next report
+        queue.set_progress(job["id"], worker_id, percent, stage)
+
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(job["id"], worker_id, stop, heartbeat_seconds),
+                                 name=f"lease-{job['id']}", daemon=True)
+    heartbeat.start()
+    try:
+        # Queued work yields LLM capacity to requests someone is waiting on; the
+        # trace ties the job's stage timings together the way a request's are
+        with llm_work(BACKGROUND, job["owner_id"]), trace_scope(f"job-{job['id']}") as trace:
+            try:
+                result = handler(job["payload"], progress)
+            finally:
+                if trace.stages:
+                    logging.info(f"trace={trace.id} {job['kind']} {format_stages(trace)}")
+    except queue.LeaseLost:
+        raise
+    except PermanentJobError as e:
+        rescheduled = queue.fail(job["id"], worker_id, str(e), retryable=False)
+    except Exception as e:
+        logging.exception(f"Job {job['id']} ({job['kind']}) raised")
+        rescheduled = queue.fail(job["id"], worker_id, str(e))
+    else:
+        queue.complete(job["id"], worker_id, result)
+        return
+    finally:
+        stop.set()
+        heartbeat.join()
+
+    if not rescheduled and job["kind"] in CLEANUPS:
+        CLEANUPS[job["kind"]](job["payload"])
+
+
+def run_worker(poll_interval: float = JOB_POLL_INTERVAL, max_jobs: int = 0):
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    logging.info(f"Job worker {worker_id} started")
+    processed = 0
+    while not max_jobs or processed < max_jobs:
+        job = queue.claim_next(worker_id)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        logging.info(f"Worker {worker_id} running job {job['id']} ({job['kind']}), attempt {job['attempts']}")
+        run_job(job, worker_id)
+        processed += 1
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Run background job workers")
+    arg_parser.add_argument("--processes", type=int, default=int(os.getenv("JOB_WORKER_PROCESSES", "2")))
+    arg_parser.add_argument("--poll-interval", type=float, default=JOB_POLL_INTERVAL)
+    args = arg_parser.parse_args()
+
+    run_migrations()
+    # Nothing in this process needs the connections migrations opened once the workers are running
+    engine.dispose()
+    if args.processes <= 1:
+        run_worker(args.poll_interval)
+        return
+
+    # spawn rather than fork (as executors.py does for its pools): forked workers would inherit
+    # the pooled SQLite connections run_migrations() just opened
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=run_worker, args=(args.poll_interval,), daemon=True)
+               for _ in range(args.processes)]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+import csv
+import enum
+import io
+import json
+import os
+
+## Keyset pagination, column projection and streaming export for list endpoints ##
+# Pages are ordered by primary key and continue from the last id seen (the
+# cursor), so every page costs the same no matter how deep it is. Only the
+# requested columns are selected, which keeps large text/JSON columns out of
+# the query unless asked for. Exports walk the same keyset pages with a fresh
+# session per page, so memory stays flat for any table size.
+
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "100"))
+LIST_MAX_PAGE_SIZE = int(os.getenv("LIST_MAX_PAGE_SIZE", "1000"))
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "1000"))
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def select_columns(model, fields: Optional[str], allowed: Sequence[str], default: Sequence[str]) -> List:
+    if not fields:
+        names = list(default)
+    else:
+        names = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+        unknown = [n for n in names if n not in allowed]
+        if unknown:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    # The primary key is always selected since it is the cursor
+    if "id" not in names:
+        names.insert(0, "id")
+    return [getattr(model, n) for n in names]
+
+
+def parse_cursor(cursor: Optional[str]) -> Optional[int]:
+    if cursor is None or cursor == "":
+        return None
+    try:
+        return int(cursor)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def _query(db: Session, model, columns: List, after_id: Optional[int], filters: Sequence, limit: int):
+    query = db.query(*columns).filter(*filters)
+    if after_id is not None:
+        query = query.filter(model.id > after_id)
+    return query.order_by(model.id).limit(limit)
+
+
+def fetch_page(db: Session, model, columns: List, after_id: Optional[int], limit: int,
+               filters: Sequence = ()) -> tuple:
+    # One extra row tells whether another page exists without a COUNT(*)
+    rows = _query(db, model, columns, after_id, filters, limit + 1).all()
+    has_more = len(rows) > limit
+    rows = [dict(row._mapping) for row in rows[:limit]]
+    next_cursor = str(rows[-1]["id"]) if has_more else None
+    return rows, next_cursor
+
+
+def iter_rows(model, columns: List, after_id: Optional[int] = None, filters: Sequence = (),
+              page_size: int = EXPORT_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+    while True:
+        with SessionLocal() as db:
+            page = [dict(row._mapping) for row in _query(db, model, columns, after_id, filters, page_size)]
+        if not page:
+            return
+        yield from page
+        after_id = page[-1]["id"]
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def _csv_cell(value: Any) -> Any:
+    value = _plain(value)
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return "" if value is None else value
+
+
+def iter_csv(rows: Iterator[Dict[str, Any]], columns: List) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([c.key for c in columns])
+    for row in rows:
+        writer.writerow([_csv_cell(row[c.key]) for c in columns])
+        # Flush in ~64KB chunks rather than one tiny write per row
+        if buffer.tell() > 65536:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_ndjson(rows: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps({k: _plain(v) for k, v in row.items()}, default=str) + "\n"
+
+
+def export_response(model, columns: List, fmt: str, filename: str, after_id: Optional[int] = None,
+                    filters: Sequence = ()) -> StreamingResponse:
+    rows = iter_rows(model, columns, after_id, filters)
+    if fmt == "csv":
+        body, media_type, extension = iter_csv(rows, columns), "text/csv", "csv"
+    else:
+        body, media_type, extension = iter_ndjson(rows), "application/x-ndjson", "ndjson"
+    return StreamingResponse(body, media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'})
@@ -0,0 +1,54 @@
+from dotenv import load_dotenv
+import os
+import threading
+
+load_dotenv()
+
+## Shared chat model client ##
+# One lazily constructed client for every call site (extraction, user scoring,
+# recruiter ranking) instead of a ChatGroq per module built at import time.
+# The model is wrapped in the LLM gateway (llm_models/gateway.py), which owns
+# rate limiting and retries, so the SDK's own retries are turned off.
+# GROQ_BASE_URL points the client at another endpoint, e.g. the fake server in
+# benchmarks/fake_llm_server.py. get_llm(prompt) hands each call site its own
+# wrapper around the same model, so /metrics can report tokens per prompt.
+
+LLM_MODEL_NAME = os.getenv("LLM_MODEL", "llama3-8b-8192")
+LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.3"))
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL")
+# groq | fake (llm_models/fake_llm.py: deterministic canned answers, for offline runs and load tests)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
+
+_model = None
+_llms = {}
+_llm_lock = threading.Lock()
+
+
+def get_llm(prompt: str = "other"):
+    global _model
+    with _llm_lock:
+        if prompt not in _llms:
+            from llm_models.gateway import GatewayChatModel, get_gateway
+            if _model is None:
+                _model = build_chat_model()
+            _llms[prompt] = GatewayChatModel(_model, get_gateway(), prompt)
+        return _llms[prompt]
+
+
+def build_chat_model():
+    if LLM_BACKEND == "fake":
+        from llm_models.fake_llm import FakeChatModel
+        return FakeChatModel()
+    if LLM_BACKEND != "groq":
+        raise ValueError(f"Unknown LLM backend: {LLM_BACKEND}")
+    # langchain_groq pulls in the groq SDK and httpx; only pay for that on first use
+    from langchain_groq import ChatGroq
+    return ChatGroq(api_key=os.getenv("GROQ_API_KEY"),
+                    model=LLM_MODEL_NAME,
+                    temperature=LLM_TEMPERATURE,
+                    max_retries=0,
+                    base_url=GROQ_BASE_URL)
+
+
+def llm_initialized() -> bool:
+    return _model is not None
@@ -0,0 +1,210 @@
+from llm_models.text_normalizer import RESUME_MAX_TOKENS, prepare_resume_text
+from executors import CPU_POOL_SIZE, run_cpu
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+import asyncio
+import io
+import logging
+import math
+import mmap
+import os
+
+# Kept free of LLM/embedding imports: this runs inside the CPU process pool,
+# where every worker process imports it on first use. The parser libraries are
+# imported inside the parser functions so importing the app doesn't load them.
+
+## Parsers ##
+# Documents are parsed straight from the upload buffer: bytes, or a memoryview
+# over the spooled upload (an mmap when it spilled to disk, see uploads.py), so
+# parsing never copies the file. Work sent to the CPU pool gets the spool path
+# and maps it in the worker instead of pickling the bytes. PDF_PARSER picks the PDF backend: "pymupdf" (default) or "pypdf" (what
+# the app used before, now also in-memory). PDFs with more than
+# PARALLEL_PAGE_THRESHOLD pages are split into page ranges parsed concurrently
+# on the CPU pool. Uploads over MAX_DOCUMENT_BYTES or MAX_DOCUMENT_PAGES are
+# rejected before any text is extracted.
+
+PDF_PARSER = os.getenv("PDF_PARSER", "pymupdf")
+MAX_DOCUMENT_BYTES = int(os.getenv("MAX_DOCUMENT_BYTES", str(10 * 1024 * 1024)))
+MAX_DOCUMENT_PAGES = int(os.getenv("MAX_DOCUMENT_PAGES", "30"))
+PARALLEL_PAGE_THRESHOLD = int(os.getenv("PARALLEL_PAGE_THRESHOLD", "8"))
+
+SUPPORTED_EXTENSIONS = ('pdf', 'docx')
+
+Buffer = Union[bytes, memoryview]
+
+
+class DocumentLimitError(ValueError):
+    # The document is too large (bytes or pages) to parse
+    pass
+
+
+@contextmanager
+def mapped_file(path: str) -> Iterator[memoryview]:
+    # Read-only, zero-copy view of a file; released (and unmapped) on exit
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield memoryview(b"")
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                yield view
+            finally:
+                view.release()
+
+
+def with_mapped_file(fn: Callable, path: str, *args):
+    # CPU pool entry point: run fn(view, *args) over the mapped file
+    with mapped_file(path) as view:
+        return fn(view, *args)
+
+
+def _stream(data: Buffer):
+    # File-like access for parsers that want one; an mmap already is one
+    source = data.obj if isinstance(data, memoryview) else data
+    if isinstance(source, mmap.mmap):
+        source.seek(0)
+        return source
+    return io.BytesIO(data)
+
+
+def _check_size(size: int):
+    if size > MAX_DOCUMENT_BYTES:
+        raise DocumentLimitError(f"Document is {size} bytes; the limit is {MAX_DOCUMENT_BYTES} bytes.")
+
+
+def _check_pages(page_count: int):
+    if page_count > MAX_DOCUMENT_PAGES:
+        raise DocumentLimitError(f"Document has {page_count} pages; the limit is {MAX_DOCUMENT_PAGES} pages.")
+
+
+def _open_pymupdf(data: Buffer):
+    import pymupdf
+    if not len(data):
+        raise ValueError("Uploaded file is empty.")
+    doc = pymupdf.open(stream=data, filetype="pdf")
+    if doc.needs_pass:
+        doc.close()
+        raise ValueError("Password-protected PDFs are not supported.")
+    return doc
+
+
+def pymupdf_page_count(data: Buffer) -> int:
+    doc = _open_pymupdf(data)
+    try:
+        return doc.page_count
+    finally:
+        # The document holds on to the buffer; drop it so a mapped file can be unmapped
+        doc.close()
+        doc.stream = None
+
+
+def pymupdf_pages(data: Buffer, start: int = 0, stop: Optional[int] = None) -> List[str]:
+    doc = _open_pymupdf(data)
+    try:
+        _check_pages(doc.page_count)
+        stop = doc.page_count if stop is None else min(stop, doc.page_count)
+        return [doc[i].get_text("text") for i in range(start, stop)]
+    finally:
+        doc.close()
+        doc.stream = None
+
+
+def pypdf_page_count(data: Buffer) -> int:
+    from pypdf import PdfReader
+    return len(PdfReader(_stream(data)).pages)
+
+
+def pypdf_pages(data: Buffer, start: int = 0, stop: Optional[int] = None) -> List[str]:
+    from pypdf import PdfReader
+    reader = PdfReader(_stream(data))
+    _check_pages(len(reader.pages))
+    stop = len(reader.pages) if stop is None else min(stop, len(reader.pages))
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def docx_pages(data: Buffer) -> List[str]:
+    from docx import Document
+    doc = Document(_stream(data))
+    # DOCX has no fixed pages; keep paragraphs on their own lines for section detection
+    return ['\n'.join([para.text for para in doc.paragraphs])]
+
+
+# name -> (page count, page range extractor)
+PDF_PARSERS: Dict[str, Tuple[Callable[[Buffer], int], Callable[..., List[str]]]] = {
+    "pymupdf": (pymupdf_page_count, pymupdf_pages),
+    "pypdf": (pypdf_page_count, pypdf_pages),
+}
+
+
+def _pdf_parser(name: Optional[str] = None):
+    name = name or PDF_PARSER
+    if name not in PDF_PARSERS:
+        raise ValueError(f"Unknown PDF parser {name!r}; expected one of {sorted(PDF_PARSERS)}")
+    return PDF_PARSERS[name]
+
+
+def file_extension(filename: str) -> str:
+    extension = filename.split('.')[-1].lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise ValueError("Unsupported file type. Please upload a PDF or DOCX file.")
+    return extension
+
+
+def parse_document_pages(filename: str, data: Buffer, pdf_parser: Optional[str] = None) -> List[str]:
+    extension = file_extension(filename)
+    _check_size(len(data))
+    try:
+        if extension == 'pdf':
+            return _pdf_parser(pdf_parser)[1](data)
+        return docx_pages(data)
+    except DocumentLimitError:
+        raise
+    except Exception as e:
+        logging.error(f"Error loading file: {e}")
+        raise
+
+
+def page_ranges(page_count: int, workers: int = CPU_POOL_SIZE,
+                threshold: int = PARALLEL_PAGE_THRESHOLD) -> List[Tuple[int, int]]:
+    if page_count <= threshold or workers <= 1:
+        return [(0, page_count)]
+    size = math.ceil(page_count / workers)
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+async def parse_document_pages_async(filename: str, data: Optional[bytes] = None, path: Optional[str] = None,
+                                     pdf_parser: Optional[str] = None) -> List[str]:
+    # Pass the upload as bytes or, when it is spooled on disk, as its path.
+    # Small documents take one trip to the CPU pool; large PDFs fan out by page range.
+    extension = file_extension(filename)
+
+    async def on_pool(fn, *args):
+        if path is not None:
+            return await run_cpu(with_mapped_file, fn, path, *args)
+        return await run_cpu(fn, data, *args)
+
+    _check_size(os.path.getsize(path) if path is not None else len(data))
+    if extension != 'pdf':
+        return await on_pool(docx_pages)
+
+    count_pages, extract = _pdf_parser(pdf_parser)
+    page_count = await on_pool(count_pages)
+    _check_pages(page_count)
+    ranges = page_ranges(page_count)
+    if len(ranges) == 1:
+        return await on_pool(extract)
+    chunks = await asyncio.gather(*(on_pool(extract, start, stop) for start, stop in ranges))
+    return [page for chunk in chunks for page in chunk]
+
+
+def parse_resume_text(filename: str, data: Buffer,
+                      max_tokens: int = RESUME_MAX_TOKENS) -> Tuple[str, Dict[str, Any]]:
+    # Parsed, normalized and capped text plus its token accounting
+    return prepare_resume_text(parse_document_pages(filename, data), max_tokens)
+
+
+async def parse_resume_text_async(filename: str, data: Optional[bytes] = None, path: Optional[str] = None,
+                                  max_tokens: int = RESUME_MAX_TOKENS) -> Tuple[str, Dict[str, Any]]:
+    pages = await parse_document_pages_async(filename, data, path)
+    return await run_cpu(prepare_resume_text, pages, max_tokens)
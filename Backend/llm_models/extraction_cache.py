@@ -0,0 +1,141 @@
+from typing import Any, Dict, Optional
+import json
+import logging
+import os
+import threading
+import time
+
+## Bounded on-disk LRU cache for parsed resume text and LLM extraction JSON ##
+# Entries are keyed by the sha256 of the uploaded file bytes. Reads bump the
+# file's mtime, and when the directory grows past its byte or entry budget the
+# least recently used files are evicted. The directory's size and entry count
+# are kept in memory, so a write only scans it when over budget; the totals are
+# seeded by a scan on the first write and re-synced every
+# EXTRACTION_CACHE_RESCAN_SECONDS to pick up what other processes wrote.
+
+EXTRACTION_CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR", "extraction_cache")
+EXTRACTION_CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "20000"))
+EXTRACTION_CACHE_RESCAN_SECONDS = float(os.getenv("EXTRACTION_CACHE_RESCAN_SECONDS", "300"))
+# Eviction frees down to this fraction of the budgets, so a full cache isn't rescanned on every write
+EXTRACTION_CACHE_EVICT_TO = float(os.getenv("EXTRACTION_CACHE_EVICT_TO", "0.9"))
+
+_lock = threading.Lock()
+# Bytes and entries in EXTRACTION_CACHE_DIR as this process last knew them; None until the first scan
+_usage: Optional[Dict[str, int]] = None
+_scanned_at = 0.0
+_stats = {"text_hits": 0, "text_misses": 0, "extraction_hits": 0, "extraction_misses": 0, "evictions": 0}
+
+
+def _path(content_hash: str, kind: str) -> str:
+    return os.path.join(EXTRACTION_CACHE_DIR, f"{content_hash}.{kind}")
+
+
+def _read(content_hash: str, kind: str) -> Optional[str]:
+    path = _path(content_hash, kind)
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = f.read()
+        os.utime(path)
+        return data
+    except OSError:
+        return None
+
+
+def _write(content_hash: str, kind: str, data: str):
+    os.makedirs(EXTRACTION_CACHE_DIR, exist_ok=True)
+    path = _path(content_hash, kind)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(data)
+    size = os.path.getsize(tmp_path)
+    try:
+        replaced = os.path.getsize(path)
+    except OSError:
+        replaced = None
+    os.replace(tmp_path, path)
+    _account(size, replaced)
+
+
+def _account(size: int, replaced: Optional[int]):
+    # Adds a written entry to the running totals, scanning only when over budget or due a re-sync
+    with _lock:
+        if _usage is not None:
+            _usage["bytes"] += size - (replaced or 0)
+            _usage["entries"] += replaced is None
+        within = (_usage is not None and _usage["bytes"] <= EXTRACTION_CACHE_MAX_BYTES
+                  and _usage["entries"] <= EXTRACTION_CACHE_MAX_ENTRIES)
+        if within and time.monotonic() - _scanned_at < EXTRACTION_CACHE_RESCAN_SECONDS:
+            return
+        _evict()
+
+
+def _evict():
+    # Called with _lock held: scans the directory, evicts down to budget and resets the totals
+    global _usage, _scanned_at
+    try:
+        entries = [e for e in os.scandir(EXTRACTION_CACHE_DIR) if e.is_file() and not e.name.endswith(".tmp")]
+    except OSError:
+        return
+    stats = []
+    for e in entries:
+        try:
+            st = e.stat()
+        except OSError:
+            continue
+        stats.append((st.st_mtime, st.st_size, e.path))
+    total = sum(size for _, size, _ in stats)
+    count = len(stats)
+    _scanned_at = time.monotonic()
+    if total > EXTRACTION_CACHE_MAX_BYTES or count > EXTRACTION_CACHE_MAX_ENTRIES:
+        max_bytes = EXTRACTION_CACHE_MAX_BYTES * EXTRACTION_CACHE_EVICT_TO
+        max_entries = EXTRACTION_CACHE_MAX_ENTRIES * EXTRACTION_CACHE_EVICT_TO
+        stats.sort()
+        for _, size, path in stats:
+            if total <= max_bytes and count <= max_entries:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            count -= 1
+            _stats["evictions"] += 1
+    _usage = {"bytes": total, "entries": count}
+
+
+def _count(key: str):
+    with _lock:
+        _stats[key] += 1
+
+
+def get_text(content_hash: str) -> Optional[str]:
+    text = _read(content_hash, "txt")
+    _count("text_hits" if text is not None else "text_misses")
+    return text
+
+
+def put_text(content_hash: str, text: str):
+    _write(content_hash, "txt", text)
+
+
+def get_extraction(content_hash: str) -> Optional[Dict[str, Any]]:
+    raw = _read(content_hash, "json")
+    if raw is not None:
+        try:
+            data = json.loads(raw)
+            _count("extraction_hits")
+            return data
+        except ValueError:
+            logging.warning(f"Discarding corrupt extraction cache entry {content_hash}")
+    _count("extraction_misses")
+    return None
+
+
+def put_extraction(content_hash: str, data: Dict[str, Any]):
+    _write(content_hash, "json", json.dumps(data))
+
+
+def extraction_cache_stats() -> Dict[str, int]:
+    with _lock:
+        return dict(_stats)
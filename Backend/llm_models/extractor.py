@@ -1,25 +1,34 @@
-import tempfile
 # from langchain_ollama import ChatOllama
-from langchain_groq import ChatGroq
-from langchain_community.document_loaders import PyPDFLoader
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-import os
+from llm_models.client import get_llm
+from llm_models.rule_extractor import FIELDS, rule_extract
+from observability import observe_stage
+from functools import lru_cache
 import re
-from docx import Document
 import json
 import logging
-from typing import Dict, Any
+import os
+import threading
+import time
+from typing import Dict, Any, Sequence
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO)
 
-# Initialize AI Model
+# AI Model is created lazily by llm_models.client.get_llm()
 # model = ChatOllama(model="gemma:7b", temperature=0.3)  
-model = ChatGroq(model="llama3-8b-8192", temperature=0.3)
 
 parser = StrOutputParser()
 
+# hybrid: rules first, LLM only for fields they can't resolve; llm: always the
+# LLM for every field; rules: never call the LLM
+EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "hybrid")
+
+_stats_lock = threading.Lock()
+_stats = {"documents": 0, "rules_only": 0, "llm_calls": 0, "rules_ms": 0.0, "llm_ms": 0.0,
+          "llm_fields": {field: 0 for field in FIELDS}}
+
 def extract_contact_info(text: str) -> tuple[list[str], list[str]]:
     email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
     phone_pattern = r'(?:\+\d{1,3}\s?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}'
@@ -29,84 +38,51 @@ def extract_contact_info(text: str) -> tuple[list[str], list[str]]:
     
     return emails, phones
 
-def extract_resume_data(file) -> Dict[str, Any]:
-    file_extension = file.filename.split('.')[-1].lower()
-    
-    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_extension}") as temp_file:
-        temp_file.write(file.file.read())
-        temp_path = temp_file.name
-    
-    try:
-        if file_extension == 'pdf':
-            loader = PyPDFLoader(temp_path)
-            docs = loader.load()
-            content = ' '.join([doc.page_content for doc in docs])
-        elif file_extension == 'docx':
-            doc = Document(temp_path)
-            content = ' '.join([para.text for para in doc.paragraphs])
-        else:
-            raise ValueError("Unsupported file type. Please upload a PDF or DOCX file.")
-    except Exception as e:
-        logging.error(f"Error loading file: {e}")
-        os.remove(temp_path)
-        raise
-
-    # Extract contact info
-    emails, phones = extract_contact_info(content)
-    logging.info(f"Extracted emails: {emails}, phones: {phones}")
-
-    prompt = PromptTemplate(
-    template="""
-    Analyze the following resume text and extract structured information in JSON format:
-
-    Resume Text:
-    {text}
+## Extraction prompt ##
+# Built per set of requested fields so a hybrid call only asks for (and pays
+# output tokens for) what the rules couldn't resolve.
 
-    Extract the following information:
-    - Full name (string)
-    - Skills (list of strings)
-    - Work experience (list of objects with company, role, years)
-    - Projects (list of objects with project_name, tech_stack, description)
-    - Education (list of objects with institution, degree, years, cgpa/marks/percentage)
-
-    IMPORTANT: 
-    - Return ONLY a valid JSON object. Do not include any additional text or explanations. 
-    - If education details contain CGPA, percentage, or marks, include it under the `"cgpa"` field.
-    - If CGPA is missing but marks/percentage exist, include that instead.
-    - If none of these are available, return `"N/A"`.
-    - Make sure to strip the resume text 
-        - Example: 
-            wrong: A n a n d is wrong
-            correct: Anand
+FIELD_INSTRUCTIONS = {
+    "name": "- Full name (string)",
+    "skills": "- Skills (list of strings)",
+    "experience": "- Work experience (list of objects with company, role, years)",
+    "projects": "- Projects (list of objects with project_name, tech_stack, description)",
+    "education": "- Education (list of objects with institution, degree, years, cgpa/marks/percentage)",
+}
 
-    The JSON should follow this exact structure:
-    {{
-        "name": "string",
-        "skills": ["list", "of", "strings"],
-        "experience": [
+FIELD_SCHEMA = {
+    "name": '''"name": "string"''',
+    "skills": '''"skills": ["list", "of", "strings"]''',
+    "experience": '''"experience": [
             {{
                 "company": "string",
                 "role": "string",
                 "years": "string"
             }}
-        ],
-        "projects": [
+        ]''',
+    "projects": '''"projects": [
             {{
                 "project_name": "string",
                 "tech_stack": ["list", "of", "strings"],
                 "description": "string"
             }}
-        ],
-        "education": [
+        ]''',
+    "education": '''"education": [
             {{
                 "institution": "string",
                 "degree": "string",
                 "years": "string",
                 "cgpa": "string"  # Can be CGPA, marks, or percentage
             }}
-        ]
-    }}
+        ]''',
+}
 
+EDUCATION_RULES = """
+    - If education details contain CGPA, percentage, or marks, include it under the `"cgpa"` field.
+    - If CGPA is missing but marks/percentage exist, include that instead.
+    - If none of these are available, return `"N/A"`."""
+
+EDUCATION_EXAMPLE = """
     Example:
     If the education section in the resume says:
     - "B.Tech in Computer Science from XYZ University, 2018-2022, 8.5 CGPA"
@@ -129,16 +105,45 @@ def extract_resume_data(file) -> Dict[str, Any]:
         }}
     ]
     ```
-    
-    Now analyze this resume and return the JSON:
     """
+
+
+@lru_cache(maxsize=32)
+def extraction_prompt(fields: tuple) -> PromptTemplate:
+    education = "education" in fields
+    schema = ",\n        ".join(FIELD_SCHEMA[field] for field in fields)
+    return PromptTemplate(
+    template=f"""
+    Analyze the following resume text and extract structured information in JSON format:
+
+    Resume Text:
+    {{text}}
+
+    Extract the following information:
+    {chr(10).join("    " + FIELD_INSTRUCTIONS[field] for field in fields).lstrip()}
+
+    IMPORTANT: 
+    - Return ONLY a valid JSON object. Do not include any additional text or explanations. {EDUCATION_RULES if education else ""}
+
+    The JSON should follow this exact structure:
+    {{{{
+        {schema}
+    }}}}
+    {EDUCATION_EXAMPLE if education else ""}
+    Now analyze this resume and return the JSON:
+    """,
+    input_variables=["text"]
 )
 
-    chain = prompt | model | parser
-    
+
+def extract_with_llm(content: str, fields: Sequence[str] = FIELDS) -> Dict[str, Any]:
+    chain = extraction_prompt(tuple(fields)) | get_llm("extraction") | parser
+    response_data = None
+
     try:
         response_data = chain.invoke({"text": content})
-        logging.info(f"Raw LLM response: {response_data}")
+        # Token counts and latency are on /metrics; the raw text is only for debugging
+        logging.debug(f"Raw LLM response: {response_data}")
         
         # Clean the response to extract just the JSON
         json_start = response_data.find('{')
@@ -150,14 +155,58 @@ def extract_resume_data(file) -> Dict[str, Any]:
         extracted_data = json.loads(json_str)
         
         # Validate basic structure
-        if not all(key in extracted_data for key in ["name", "skills", "experience", "projects", "education"]):
+        if not all(key in extracted_data for key in fields):
             raise ValueError("Missing required fields in JSON response")
             
     except Exception as e:
         logging.error(f"Error processing LLM response: {e}")
         logging.error(f"Response content: {response_data}")
         raise ValueError(f"Failed to parse resume data: {str(e)}")
-    finally:
-        os.remove(temp_path)  
 
-    return extracted_data
\ No newline at end of file
+    return extracted_data
+
+
+def extract_fields_from_text(content: str) -> Dict[str, Any]:
+    # Extract contact info
+    emails, phones = extract_contact_info(content)
+    logging.info(f"Extracted emails: {emails}, phones: {phones}")
+
+    started = time.perf_counter()
+    if EXTRACTION_MODE == "llm":
+        extracted_data, pending = {}, list(FIELDS)
+    else:
+        extracted_data, confident = rule_extract(content)
+        pending = [] if EXTRACTION_MODE == "rules" else [field for field in FIELDS if not confident[field]]
+    rules_done = time.perf_counter()
+
+    if pending:
+        llm_data = extract_with_llm(content, pending)
+        extracted_data.update({field: llm_data[field] for field in pending})
+        logging.info(f"Rule extraction left {pending} to the LLM")
+    finished = time.perf_counter()
+
+    observe_stage("extract.rules", rules_done - started)
+    if pending:
+        observe_stage("extract.llm", finished - rules_done)
+    with _stats_lock:
+        _stats["documents"] += 1
+        _stats["rules_ms"] += (rules_done - started) * 1000
+        if pending:
+            _stats["llm_calls"] += 1
+            _stats["llm_ms"] += (finished - rules_done) * 1000
+            for field in pending:
+                _stats["llm_fields"][field] += 1
+        else:
+            _stats["rules_only"] += 1
+
+    return extracted_data
+
+
+def extraction_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        stats = {**_stats, "llm_fields": dict(_stats["llm_fields"])}
+    documents, calls = stats["documents"], stats["llm_calls"]
+    stats["mode"] = EXTRACTION_MODE
+    stats["avg_rules_ms"] = round(stats.pop("rules_ms") / documents, 2) if documents else 0.0
+    stats["avg_llm_ms"] = round(stats.pop("llm_ms") / calls, 1) if calls else 0.0
+    return stats
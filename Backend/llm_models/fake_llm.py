@@ -0,0 +1,92 @@
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import Runnable
+from llm_models.gateway import prompt_text
+from typing import Any, Dict, Optional
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+
+## Deterministic fake chat model ##
+# LLM_BACKEND=fake swaps Groq for this model so the app runs and can be load
+# tested offline. Answers are canned JSON shaped for whichever prompt was sent
+# (extraction, user score, recruiter score, listwise ranking); scores are
+# derived from a hash of the prompt, so the same input always gets the same
+# answer. LLM_FAKE_LATENCY_MS adds a fixed delay per call and
+# LLM_FAKE_ERROR_RATE fails that share of calls with a retryable 503 (drawn
+# from a generator seeded with LLM_FAKE_SEED). Usage is reported at ~4 chars a
+# token so the gateway's token accounting still works.
+
+LLM_FAKE_LATENCY_MS = float(os.getenv("LLM_FAKE_LATENCY_MS", "0"))
+LLM_FAKE_ERROR_RATE = float(os.getenv("LLM_FAKE_ERROR_RATE", "0"))
+LLM_FAKE_SEED = int(os.getenv("LLM_FAKE_SEED", "0"))
+
+EXTRACTION = {
+    "name": "Jane Doe",
+    "skills": ["Python", "FastAPI", "SQL", "Docker"],
+    "education": [{"institution": "XYZ University", "degree": "B.Tech Computer Science",
+                   "years": "2016-2020", "cgpa": "8.7"}],
+    "experience": [{"company": "Acme Corp", "role": "Software Engineer", "years": "2021-Present"}],
+    "projects": [{"project_name": "Resume Matcher", "tech_stack": ["Python", "LangChain"],
+                  "description": "Ranks resumes against a job description with an LLM."}],
+}
+
+
+class FakeLLMError(Exception):
+    # Looks like a provider 5xx to the gateway, so it is retried
+    status_code = 503
+
+
+def _score(*parts: Any) -> int:
+    digest = hashlib.sha256("\x00".join(map(str, parts)).encode()).digest()
+    return 40 + digest[0] % 56
+
+
+def answer(prompt: str) -> Dict[str, Any]:
+    resume_ids = re.findall(r"\[resume_id: (\d+)\]", prompt)
+    if resume_ids:
+        return {"results": [{"resume_id": int(i), "match_score": _score(prompt, i),
+                             "summary": "Relevant projects and experience."} for i in resume_ids]}
+    if "missing_skills" in prompt:
+        return {"missing_skills": ["Kubernetes"], "match_score": _score(prompt),
+                "suggestions": "1. Quantify project impact"}
+    if "match_score" in prompt:
+        return {"match_score": _score(prompt), "summary": "Relevant projects and experience."}
+    return EXTRACTION
+
+
+class FakeChatModel(Runnable):
+    def __init__(self, latency_ms: float = LLM_FAKE_LATENCY_MS, error_rate: float = LLM_FAKE_ERROR_RATE,
+                 seed: int = LLM_FAKE_SEED):
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def _fails(self) -> bool:
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+    def _respond(self, input: Any) -> AIMessage:
+        if self._fails():
+            raise FakeLLMError("Injected fake LLM failure")
+        prompt = prompt_text(input)
+        content = json.dumps(answer(prompt))
+        input_tokens, output_tokens = len(prompt) // 4, len(content) // 4
+        return AIMessage(content=content, usage_metadata={"input_tokens": input_tokens,
+                                                          "output_tokens": output_tokens,
+                                                          "total_tokens": input_tokens + output_tokens})
+
+    def invoke(self, input: Any, config: Optional[Dict] = None, **kwargs: Any) -> AIMessage:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(input)
+
+    async def ainvoke(self, input: Any, config: Optional[Dict] = None, **kwargs: Any) -> AIMessage:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(input)
@@ -0,0 +1,436 @@
+from langchain_core.runnables import Runnable
+from llm_models.scheduler import LLMScheduler, get_scheduler
+from llm_models.text_normalizer import estimate_tokens
+from observability import record_llm_call, record_llm_usage
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+
+## LLM gateway ##
+# Every chat model call (extraction, user scoring, recruiter ranking, listwise)
+# goes through one gateway, so the app as a whole respects the provider's
+# limits instead of each call site finding them out by hitting 429s:
+# - token buckets for requests/min (LLM_RPM) and tokens/min (LLM_TPM); a call
+#   reserves its estimated prompt + output tokens up front and the estimate is
+#   settled against the reported usage afterwards,
+# - 429s and 5xx/connection errors are retried with full-jitter exponential
+#   backoff; a 429's Retry-After pauses all callers, not just the one that got it,
+# - a circuit breaker fails calls fast after LLM_CIRCUIT_FAILURES consecutive
+#   provider failures and lets one probe through after LLM_CIRCUIT_RESET_SECONDS,
+# - every call has a deadline (LLM_DEADLINE_SECONDS, or a tighter one from
+#   call_deadline()); waits and retries that can't finish before it aren't started,
+# - when more calls are waiting than there are slots, llm_models/scheduler.py
+#   decides which goes next (interactive before bulk, fair across tenants).
+# 0 disables a bucket.
+
+LLM_RPM = int(os.getenv("LLM_RPM", "30"))
+LLM_TPM = int(os.getenv("LLM_TPM", "30000"))
+# Burst allowance: the buckets hold this many seconds' worth of the per-minute limits
+LLM_BURST_SECONDS = float(os.getenv("LLM_BURST_SECONDS", "60"))
+# Output tokens reserved per call before the provider reports the real usage
+LLM_EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "800"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "20"))
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "60"))
+LLM_CIRCUIT_FAILURES = int(os.getenv("LLM_CIRCUIT_FAILURES", "5"))
+LLM_CIRCUIT_RESET_SECONDS = float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", "30"))
+
+RETRYABLE_STATUS = {408, 409}
+# Exception class names from the provider SDKs that mean "the request never got an answer"
+TRANSIENT_ERRORS = {"APIConnectionError", "APITimeoutError", "ConnectError", "ReadTimeout", "RemoteProtocolError"}
+
+# Absolute time.monotonic() deadline for LLM calls made in this context
+_deadline: ContextVar[Optional[float]] = ContextVar("llm_deadline", default=None)
+
+
+class LLMUnavailable(RuntimeError):
+    # The circuit breaker is open
+    pass
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    pass
+
+
+@contextmanager
+def call_deadline(seconds: float) -> Iterator[None]:
+    # Caps every LLM call made inside the block (same task/thread) at `seconds` from now
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+class TokenBucket:
+    def __init__(self, per_minute: int, burst_seconds: float = 60.0):
+        self.per_minute = per_minute
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, max_wait: float) -> Optional[float]:
+        # Debits `amount` now (the level may go negative) and returns how long the
+        # caller has to wait for it; None, with nothing debited, if that's over max_wait
+        with self.lock:
+            self._refill(time.monotonic())
+            amount = min(amount, self.capacity)
+            wait = max(0.0, (amount - self.level) / self.rate)
+            if wait > max_wait:
+                return None
+            self.level -= amount
+            return wait
+
+    def credit(self, amount: float):
+        with self.lock:
+            self._refill(time.monotonic())
+            self.level = min(self.capacity, self.level + amount)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self.lock:
+            self._refill(time.monotonic())
+            return {"per_minute": self.per_minute, "capacity": round(self.capacity, 1),
+                    "available": round(self.level, 1)}
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = "half_open"
+            if self.state == "half_open" and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.state, self.failures, self.probing = "closed", 0, False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.probing = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.times_opened += 1
+                    logging.warning(f"LLM circuit opened after {self.failures} consecutive failures")
+                self.state, self.opened_at = "open", time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            return {"state": self.state, "consecutive_failures": self.failures, "times_opened": self.times_opened}
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def classify(error: Exception) -> Optional[str]:
+    # "rate_limited" / "server_error" / "transient" for retryable errors, None otherwise
+    status = _status_code(error)
+    if status == 429:
+        return "rate_limited"
+    if status is not None:
+        return "server_error" if status >= 500 or status in RETRYABLE_STATUS else None
+    if isinstance(error, (ConnectionError, TimeoutError)) or type(error).__name__ in TRANSIENT_ERRORS:
+        return "transient"
+    return None
+
+
+class LLMGateway:
+    def __init__(self, rpm: int = LLM_RPM, tpm: int = LLM_TPM, burst_seconds: float = LLM_BURST_SECONDS,
+                 max_retries: int = LLM_MAX_RETRIES, backoff_base: float = LLM_BACKOFF_BASE_SECONDS,
+                 backoff_max: float = LLM_BACKOFF_MAX_SECONDS, deadline_seconds: float = LLM_DEADLINE_SECONDS,
+                 expected_output_tokens: int = LLM_EXPECTED_OUTPUT_TOKENS,
+                 circuit_failures: int = LLM_CIRCUIT_FAILURES, circuit_reset: float = LLM_CIRCUIT_RESET_SECONDS,
+                 scheduler: Optional[LLMScheduler] = None):
+        self.requests = TokenBucket(rpm, burst_seconds) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm, burst_seconds) if tpm > 0 else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.deadline_seconds = deadline_seconds
+        self.expected_output_tokens = expected_output_tokens
+        self.breaker = CircuitBreaker(circuit_failures, circuit_reset)
+        # Orders calls by class and tenant before they reach the buckets; None sends them in arrival order
+        self.scheduler = scheduler
+        self.lock = threading.Lock()
+        self.paused_until = 0.0
+        self.stats = {"calls": 0, "succeeded": 0, "failed": 0, "attempts": 0, "retries": 0, "rate_limited": 0,
+                      "server_errors": 0, "transient_errors": 0, "circuit_rejected": 0, "deadline_exceeded": 0,
+                      "throttled_ms": 0.0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    def _count(self, key: str, amount: float = 1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def deadline(self) -> float:
+        default = time.monotonic() + self.deadline_seconds
+        scoped = _deadline.get()
+        return default if scoped is None else min(default, scoped)
+
+    def _expired(self, what: str) -> LLMDeadlineExceeded:
+        self._count("deadline_exceeded")
+        return LLMDeadlineExceeded(f"LLM call deadline exceeded {what}")
+
+    def _remaining(self, deadline: float, tokens: int, attempt: int) -> float:
+        # The admission wait can use up the last of the deadline; rather than send a
+        # call with no time left, hand back what admit() reserved for it and give up
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            if self.requests:
+                self.requests.credit(1)
+            if self.tokens:
+                self.tokens.credit(tokens)
+            raise self._expired(f"before attempt {attempt + 1}")
+        return remaining
+
+    def admit(self, tokens: int, deadline: float) -> float:
+        # Returns how long to wait before sending; raises if the call can't go out in time
+        if not self.breaker.allow():
+            self._count("circuit_rejected")
+            raise LLMUnavailable("LLM provider is failing; circuit breaker is open")
+        now = time.monotonic()
+        remaining = deadline - now
+        pause = max(0.0, self.paused_until - now)
+        if pause > remaining:
+            raise self._expired("while paused for the provider's Retry-After")
+
+        request_wait = self.requests.reserve(1, remaining) if self.requests else 0.0
+        if request_wait is None:
+            raise self._expired("waiting for the requests/min limit")
+        token_wait = self.tokens.reserve(tokens, remaining) if self.tokens else 0.0
+        if token_wait is None:
+            if self.requests:
+                self.requests.credit(1)
+            raise self._expired("waiting for the tokens/min limit")
+
+        wait = max(pause, request_wait, token_wait)
+        if wait:
+            self._count("throttled_ms", wait * 1000)
+        return wait
+
+    def settle(self, result: Any, reserved: int, prompt: str):
+        # Swap the up-front estimate for what the provider reports it used
+        usage = getattr(result, "usage_metadata", None) or {}
+        used = usage.get("total_tokens")
+        if used is None:
+            return
+        record_llm_usage(prompt, usage)
+        with self.lock:
+            self.stats["prompt_tokens"] += usage.get("input_tokens", 0)
+            self.stats["completion_tokens"] += usage.get("output_tokens", 0)
+        if self.tokens and used < reserved:
+            self.tokens.credit(reserved - used)
+        elif self.tokens and used > reserved:
+            self.tokens.reserve(used - reserved, float("inf"))
+
+    def on_error(self, error: Exception, attempt: int, deadline: float) -> float:
+        # Returns the backoff before the next attempt, or re-raises
+        kind = classify(error)
+        if kind is None:
+            # Bad request, auth, ...: the provider answered, retrying won't help
+            self.breaker.record_success()
+            raise error
+        self._count({"rate_limited": "rate_limited", "server_error": "server_errors",
+                     "transient": "transient_errors"}[kind])
+        if kind == "rate_limited":
+            # The provider is up, just full: don't count it against the breaker
+            self.breaker.record_success()
+            retry_after = _retry_after(error)
+            if retry_after:
+                with self.lock:
+                    self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+        else:
+            self.breaker.record_failure()
+        if attempt >= self.max_retries:
+            raise error
+
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if time.monotonic() + delay >= deadline:
+            raise self._expired(f"after {attempt + 1} attempts") from error
+        self._count("retries")
+        logging.info(f"LLM call failed ({kind}: {error}); retry {attempt + 1} in {delay:.2f}s")
+        return delay
+
+    def _finish(self, succeeded: bool, prompt: str):
+        self._count("succeeded" if succeeded else "failed")
+        record_llm_call(prompt, succeeded)
+
+    def call(self, fn: Callable[[float], Any], text: str, prompt: str = "other") -> Any:
+        # fn(timeout) makes one attempt; runs in the calling thread. prompt labels its metrics
+        self._count("calls")
+        deadline = self.deadline()
+        tokens = estimate_tokens(text) + self.expected_output_tokens
+        try:
+            ticket = None
+            if self.scheduler is not None:
+                try:
+                    ticket = self.scheduler.acquire(tokens, deadline - time.monotonic())
+                except TimeoutError:
+                    raise self._expired("waiting for a scheduler slot") from None
+            try:
+                result = self._attempts(fn, tokens, deadline, prompt)
+            finally:
+                if ticket is not None:
+                    self.scheduler.release(ticket)
+        except BaseException:
+            self._finish(False, prompt)
+            raise
+        self._finish(True, prompt)
+        return result
+
+    def _attempts(self, fn: Callable[[float], Any], tokens: int, deadline: float, prompt: str) -> Any:
+        attempt = 0
+        while True:
+            wait = self.admit(tokens, deadline)
+            if wait:
+                time.sleep(wait)
+            remaining = self._remaining(deadline, tokens, attempt)
+            self._count("attempts")
+            try:
+                result = fn(remaining)
+            except Exception as e:
+                time.sleep(self.on_error(e, attempt, deadline))
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            self.settle(result, tokens, prompt)
+            return result
+
+    async def acall(self, fn: Callable[[float], Any], text: str, prompt: str = "other") -> Any:
+        # Async twin of call(); fn(timeout) returns an awaitable
+        self._count("calls")
+        deadline = self.deadline()
+        tokens = estimate_tokens(text) + self.expected_output_tokens
+        try:
+            ticket = None
+            if self.scheduler is not None:
+                try:
+                    ticket = await self.scheduler.acquire_async(tokens, deadline - time.monotonic())
+                except TimeoutError:
+                    raise self._expired("waiting for a scheduler slot") from None
+            try:
+                result = await self._aattempts(fn, tokens, deadline, prompt)
+            finally:
+                if ticket is not None:
+                    self.scheduler.release(ticket)
+        except BaseException:
+            self._finish(False, prompt)
+            raise
+        self._finish(True, prompt)
+        return result
+
+    async def _aattempts(self, fn: Callable[[float], Any], tokens: int, deadline: float, prompt: str) -> Any:
+        attempt = 0
+        while True:
+            wait = self.admit(tokens, deadline)
+            if wait:
+                await asyncio.sleep(wait)
+            remaining = self._remaining(deadline, tokens, attempt)
+            self._count("attempts")
+            try:
+                result = await asyncio.wait_for(fn(remaining), timeout=remaining)
+            except asyncio.TimeoutError:
+                self.breaker.record_failure()
+                raise self._expired(f"after {attempt + 1} attempts")
+            except Exception as e:
+                await asyncio.sleep(self.on_error(e, attempt, deadline))
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            self.settle(result, tokens, prompt)
+            return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            stats = {k: round(v, 1) if isinstance(v, float) else v for k, v in self.stats.items()}
+            paused = max(0.0, self.paused_until - time.monotonic())
+        return {
+            **stats,
+            "paused_for_s": round(paused, 2),
+            "circuit": self.breaker.snapshot(),
+            "requests_bucket": self.requests.snapshot() if self.requests else None,
+            "tokens_bucket": self.tokens.snapshot() if self.tokens else None,
+            "scheduler": self.scheduler.snapshot() if self.scheduler else None,
+        }
+
+
+def prompt_text(value: Any) -> str:
+    if hasattr(value, "to_string"):
+        return value.to_string()
+    return value if isinstance(value, str) else str(value)
+
+
+class GatewayChatModel(Runnable):
+    # Drop-in for the chat model in `prompt | llm | parser` chains. Each attempt
+    # passes what is left of the deadline to the SDK as its request timeout;
+    # `prompt` names the call site in the token and call metrics.
+    def __init__(self, llm: Runnable, gateway: LLMGateway, prompt: str = "other"):
+        self.llm = llm
+        self.gateway = gateway
+        self.prompt = prompt
+
+    def invoke(self, input: Any, config: Optional[Dict] = None, **kwargs: Any) -> Any:
+        return self.gateway.call(lambda timeout: self.llm.invoke(input, config, timeout=timeout, **kwargs),
+                                 prompt_text(input), self.prompt)
+
+    async def ainvoke(self, input: Any, config: Optional[Dict] = None, **kwargs: Any) -> Any:
+        return await self.gateway.acall(lambda timeout: self.llm.ainvoke(input, config, timeout=timeout, **kwargs),
+                                        prompt_text(input), self.prompt)
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> LLMGateway:
+    # One gateway per process: the provider's limits are per API key, not per call site
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway(scheduler=get_scheduler())
+        return _gateway
+
+
+def gateway_stats() -> Dict[str, Any]:
+    return get_gateway().snapshot()
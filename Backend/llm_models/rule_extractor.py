@@ -0,0 +1,225 @@
+from llm_models.skill_vocabulary import SKILL_ALIASES, SKILL_DISPLAY_NAMES, display_skill
+from llm_models.text_normalizer import split_sections
+from typing import Any, Dict, List, Optional, Tuple
+import re
+
+## Rule-based resume extraction ##
+# Deterministic first pass over the normalized resume text. Sections are found
+# by their headings; skills are matched against a curated dictionary, education
+# lines against degree/institution/CGPA patterns and experience entries by their
+# date ranges. Each field comes back with a confidence flag, and only the fields
+# that aren't confidently resolved are sent to the LLM (see extractor.py).
+# Pure Python with no app imports, so it is safe to run in the CPU pool.
+
+FIELDS = ("name", "skills", "experience", "projects", "education")
+
+# Any spelling of a known skill -> its display name, for finding skills in free
+# text. The names and aliases come from skill_vocabulary, shared with the skill index.
+KNOWN_SKILLS = {**{skill.lower(): skill for skill in SKILL_DISPLAY_NAMES.values()},
+                **{alias: SKILL_DISPLAY_NAMES[key] for alias, key in SKILL_ALIASES.items()
+                   if key in SKILL_DISPLAY_NAMES}}
+_SKILL_SPLIT = re.compile(r"\s*(?:[,;|/•]|\s-\s|\band\b)\s*")
+# "Languages: Python, Java" -> the label is not a skill
+_LABEL = re.compile(r"^[A-Za-z][A-Za-z &/-]{1,40}:\s*")
+# Shortest skill list we trust without the LLM, and the share of it the dictionary must recognise
+MIN_SKILLS = 3
+MIN_KNOWN_SKILL_SHARE = 0.5
+
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+_DATE = rf"(?:{_MONTH}\s*['’]?\d{{2,4}}|\d{{1,2}}[/.-]\d{{4}}|\d{{4}})"
+DATE_RANGE = re.compile(rf"({_DATE})\s*(?:-|–|—|to|till|until)\s*({_DATE}|present|current|now|ongoing|today)",
+                        re.IGNORECASE)
+YEAR = re.compile(r"\b(?:19|20)\d{2}\b")
+
+DEGREE = re.compile(r"\b(?:b\.?\s?tech|m\.?\s?tech|b\.?\s?e\b|m\.?\s?e\b|b\.?\s?sc|m\.?\s?sc|b\.?\s?com|m\.?\s?com|"
+                    r"b\.?\s?a\b|m\.?\s?a\b|bca|mca|bba|mba|ph\.?\s?d|bachelor|master|diploma|doctorate|"
+                    r"higher secondary|senior secondary|secondary school|hsc|ssc|cbse|icse|intermediate|"
+                    r"12th|10th|class\s+(?:x|xii|10|12))\b", re.IGNORECASE)
+INSTITUTION = re.compile(r"\b(?:university|college|institute|school|academy|iit|nit|iiit|bits|vidyalaya|"
+                         r"polytechnic)\b", re.IGNORECASE)
+CGPA = [re.compile(p, re.IGNORECASE) for p in (
+    r"\b(?:c?gpa|cpi|sgpa)\s*(?:of|:|-)?\s*(\d{1,2}(?:\.\d{1,2})?(?:\s*/\s*\d{1,2}(?:\.\d)?)?)",
+    r"(\d{1,2}(?:\.\d{1,2})?(?:\s*/\s*\d{1,2}(?:\.\d)?)?)\s*(?:c?gpa|cpi|sgpa)\b",
+    r"(\d{2,3}(?:\.\d{1,2})?\s*%)",
+    r"\b(?:percentage|marks)\s*(?:of|:|-)?\s*(\d{2,3}(?:\.\d{1,2})?\s*%?)",
+)]
+
+ROLE = re.compile(r"\b(?:engineer|developer|intern|internship|analyst|manager|consultant|scientist|lead|architect|"
+                  r"designer|associate|administrator|specialist|researcher|assistant|trainee|programmer|officer|"
+                  r"founder|director|head|tester|sde)\b", re.IGNORECASE)
+_PARTS = re.compile(r"\s*(?:\||—|–|,|\s-\s|\s@\s|\bat\b|\bfrom\b)\s*", re.IGNORECASE)
+_TECH_LABEL = re.compile(r"^(?:-\s*)?(?:tech(?:nologies|nology| stack)?|tools|stack|built with|skills used)\s*:\s*(.+)$",
+                         re.IGNORECASE)
+_NAME = re.compile(r"^[A-Za-z][A-Za-z.'-]*(?:\s+[A-Za-z][A-Za-z.'-]*){1,3}$")
+_BULLET = re.compile(r"^-\s+")
+
+
+def _unique(items: List[str]) -> List[str]:
+    seen, out = set(), []
+    for item in items:
+        if item and item.lower() not in seen:
+            seen.add(item.lower())
+            out.append(item)
+    return out
+
+
+def _strip_dates(text: str) -> str:
+    return re.sub(r"\s{2,}", " ", DATE_RANGE.sub(" ", text)).strip(" ,|()-–—")
+
+
+def _years(text: str) -> Optional[str]:
+    match = DATE_RANGE.search(text)
+    if match:
+        return f"{match.group(1)} - {match.group(2)}"
+    years = YEAR.findall(text)
+    return years[-1] if years else None
+
+
+def find_skills(text: str) -> List[str]:
+    # Dictionary hits anywhere in free text (project descriptions, tech stacks)
+    lowered = f" {text.lower()} "
+    hits = [display for key, display in KNOWN_SKILLS.items()
+            if len(key) > 2 and re.search(rf"(?<![\w+#.]){re.escape(key)}(?![\w+#])", lowered)]
+    return _unique(hits)
+
+
+## Per-field parsers: each returns (value, confident) ##
+
+def parse_name(header: List[str]) -> Tuple[Optional[str], bool]:
+    for line in header[:3]:
+        candidate = line.strip()
+        if _NAME.match(candidate) and not DEGREE.search(candidate) and not ROLE.search(candidate):
+            return candidate.title() if candidate.isupper() else candidate, True
+    return None, False
+
+
+def parse_skills(lines: List[str]) -> Tuple[List[str], bool]:
+    skills = []
+    for line in lines:
+        line = _LABEL.sub("", _BULLET.sub("", line))
+        for item in _SKILL_SPLIT.split(line):
+            item = item.strip(" ()[]").rstrip(".")
+            if item and len(item.split()) <= 4:
+                skills.append(display_skill(item) or item)
+    skills = _unique(skills)
+    # Unknown items are kept as written; the share the vocabulary recognises decides confidence
+    known = sum(display_skill(skill) is not None for skill in skills)
+    return skills, len(skills) >= MIN_SKILLS and known >= MIN_KNOWN_SKILL_SHARE * len(skills)
+
+
+def _entries(lines: List[str], starts) -> List[List[str]]:
+    entries = []
+    for line in lines:
+        if not entries or starts(line, entries[-1]):
+            entries.append([line])
+        else:
+            entries[-1].append(line)
+    return entries
+
+
+def parse_education(lines: List[str]) -> Tuple[List[Dict[str, str]], bool]:
+    def starts(line, current):
+        # A second degree or institution starts a new entry
+        joined = " ".join(current)
+        return bool((DEGREE.search(line) and DEGREE.search(joined)) or
+                    (INSTITUTION.search(line) and INSTITUTION.search(joined)))
+
+    education, confident = [], bool(lines)
+    for entry in _entries([_BULLET.sub("", line) for line in lines], starts):
+        text = " | ".join(entry)
+        parts = [p for p in _PARTS.split(_strip_dates(text)) if p]
+        institution = next((p for p in parts if INSTITUTION.search(p)), None)
+        degree = next((p for p in parts if DEGREE.search(p) and p != institution), None)
+        if degree is None and institution and DEGREE.search(institution):
+            degree = DEGREE.search(institution).group(0)
+        cgpa = next((m.group(1).replace(" ", "") for p in CGPA for m in [p.search(text)] if m), "N/A")
+        if not institution and not degree:
+            continue
+        confident = confident and bool(institution and degree)
+        education.append({"institution": institution or "N/A", "degree": degree or "N/A",
+                          "years": _years(text) or "N/A", "cgpa": cgpa})
+    return education, confident and bool(education)
+
+
+def parse_experience(lines: List[str]) -> Tuple[List[Dict[str, str]], bool]:
+    def starts(line, current):
+        # Each job carries its own date range; bullets belong to the job above
+        return not _BULLET.match(line) and DATE_RANGE.search(line) and any(DATE_RANGE.search(l) for l in current)
+
+    experience, confident = [], True
+    for entry in _entries(lines, starts):
+        titles = [l for l in entry if not _BULLET.match(l)][:2]
+        years = _years(" ".join(titles))
+        parts = [p for p in _PARTS.split(_strip_dates(" | ".join(titles))) if p]
+        role = next((p for p in parts if ROLE.search(p)), None)
+        company = next((p for p in parts if p != role and not DATE_RANGE.search(p)), None)
+        if not (role or company):
+            continue
+        confident = confident and bool(role and company and years)
+        experience.append({"company": company or "N/A", "role": role or "N/A", "years": years or "N/A"})
+    return experience, confident
+
+
+def parse_projects(lines: List[str]) -> Tuple[List[Dict[str, Any]], bool]:
+    def starts(line, current):
+        # Titles are the un-bulleted lines; a title after some description starts the next project
+        return not _BULLET.match(line) and not _TECH_LABEL.match(line) and len(current) > 1
+
+    projects, confident = [], True
+    for entry in _entries(lines, starts):
+        title = _BULLET.sub("", entry[0])
+        body = [_BULLET.sub("", l) for l in entry[1:]]
+        tech_stack = []
+        for line in body:
+            match = _TECH_LABEL.match(line)
+            if match:
+                tech_stack += [KNOWN_SKILLS.get(t.lower(), t) for t in _SKILL_SPLIT.split(match.group(1)) if t]
+        # "Resume Matcher | Python, LangChain" or "Resume Matcher (React, Node.js)"
+        head = re.split(r"\s*(?:\||—|–|:|\()\s*", title, maxsplit=1)
+        name = _strip_dates(head[0])
+        if len(head) > 1:
+            tech_stack += find_skills(head[1])
+        description = " ".join(l for l in body if not _TECH_LABEL.match(l))
+        tech_stack = _unique(tech_stack or find_skills(description))
+        if not name:
+            continue
+        confident = confident and bool(description and tech_stack) and len(name.split()) <= 8
+        projects.append({"project_name": name, "tech_stack": tech_stack, "description": description})
+    return projects, confident
+
+
+def rule_extract(text: str) -> Tuple[Dict[str, Any], Dict[str, bool]]:
+    # Returns (fields in the extraction JSON schema, field -> resolved with confidence)
+    sections: Dict[str, List[str]] = {}
+    for section in split_sections(text):
+        body = section["lines"] if section["name"] == "header" else section["lines"][1:]
+        sections.setdefault(section["name"], []).extend(body)
+
+    name, name_ok = parse_name(sections.get("header", []))
+    data: Dict[str, Any] = {"name": name or ""}
+    confident = {"name": name_ok}
+
+    if "skills" in sections:
+        data["skills"], confident["skills"] = parse_skills(sections["skills"])
+    else:
+        data["skills"], confident["skills"] = find_skills(text), False
+
+    if "education" in sections:
+        data["education"], confident["education"] = parse_education(sections["education"])
+    else:
+        data["education"], confident["education"] = [], False
+
+    if "experience" in sections:
+        data["experience"], confident["experience"] = parse_experience(sections["experience"])
+    else:
+        # No experience heading: fine for a fresher, unless there are dated roles we couldn't place
+        outside = [l for section, lines in sections.items() if section != "education" for l in lines]
+        data["experience"] = []
+        confident["experience"] = not any(DATE_RANGE.search(l) and ROLE.search(l) for l in outside)
+
+    if "projects" in sections:
+        data["projects"], confident["projects"] = parse_projects(sections["projects"])
+    else:
+        data["projects"], confident["projects"] = [], True
+
+    return data, confident
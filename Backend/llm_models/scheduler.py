@@ -0,0 +1,324 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import collections
+import logging
+import os
+import threading
+import time
+
+## LLM work scheduler ##
+# Decides which LLM call goes next when more are waiting than the gateway has
+# slots for (LLM_SCHEDULER_SLOTS in flight per process). Calls are tagged with a
+# class and a tenant by llm_work(): "interactive" (a user waiting on a score or
+# an upload), "bulk" (recruiter ranking) and "background" (queued jobs).
+# - Classes share the slots by weighted fair queuing on estimated tokens
+#   (LLM_CLASS_WEIGHTS), so a backlog of bulk work can't starve interactive
+#   calls, and LLM_INTERACTIVE_RESERVED_SLOTS are only ever given to interactive.
+# - Within a class, tenants (users/recruiters) take turns the same way, so one
+#   recruiter's 100-resume ranking doesn't queue another's behind it.
+# - While the p95 of recent interactive latency (queue wait + call) is over
+#   LLM_INTERACTIVE_P95_TARGET_MS, other classes are deferred to
+#   LLM_DEGRADED_SLOTS in flight, and new calls to a class that already has
+#   LLM_SHED_QUEUE_DEPTH waiting are shed with LLMOverloaded.
+# Queue waits are recorded per class for scheduler_stats().
+
+LLM_SCHEDULER_SLOTS = int(os.getenv("LLM_SCHEDULER_SLOTS", "8"))
+LLM_CLASS_WEIGHTS = os.getenv("LLM_CLASS_WEIGHTS", "interactive=8,bulk=2,background=1")
+LLM_INTERACTIVE_RESERVED_SLOTS = int(os.getenv("LLM_INTERACTIVE_RESERVED_SLOTS", "2"))
+LLM_INTERACTIVE_P95_TARGET_MS = float(os.getenv("LLM_INTERACTIVE_P95_TARGET_MS", "15000"))
+LLM_DEGRADED_SLOTS = int(os.getenv("LLM_DEGRADED_SLOTS", "1"))
+LLM_SHED_QUEUE_DEPTH = int(os.getenv("LLM_SHED_QUEUE_DEPTH", "50"))
+LLM_DEFAULT_CLASS = os.getenv("LLM_DEFAULT_CLASS", "interactive")
+# Interactive latencies kept for the p95: the last N, no older than the window
+LATENCY_SAMPLES = 100
+LATENCY_WINDOW_SECONDS = 60.0
+WAIT_SAMPLES = 1000
+MAX_IDLE_TENANTS = 1000
+
+INTERACTIVE, BULK, BACKGROUND = "interactive", "bulk", "background"
+
+# (class, tenant) for LLM calls made in this context
+_work: ContextVar[Optional[Tuple[str, str]]] = ContextVar("llm_work", default=None)
+
+
+class LLMOverloaded(RuntimeError):
+    # Shed: the class's queue is full while interactive latency is over target
+    pass
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    weights = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip():
+            weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+@contextmanager
+def llm_work(work_class: str, tenant: Any = None) -> Iterator[None]:
+    # Tags every LLM call made inside the block (same task/thread, or run_io work it starts)
+    token = _work.set((work_class, "-" if tenant is None else str(tenant)))
+    try:
+        yield
+    finally:
+        _work.reset(token)
+
+
+def current_work() -> Tuple[str, str]:
+    return _work.get() or (LLM_DEFAULT_CLASS, "-")
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+class Ticket:
+    def __init__(self, work_class: str, tenant: str, cost: float):
+        self.work_class = work_class
+        self.tenant = tenant
+        self.cost = cost
+        self.enqueued_at = time.monotonic()
+        self.granted_at: Optional[float] = None
+        # Set by whoever waits: a threading.Event, or an asyncio future and its loop
+        self.event: Optional[threading.Event] = None
+        self.future: Optional[asyncio.Future] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def grant(self):
+        self.granted_at = time.monotonic()
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class WorkClass:
+    def __init__(self, name: str, weight: float):
+        self.name = name
+        self.weight = weight
+        self.vtime = 0.0
+        self.tenants: Dict[str, Deque[Ticket]] = {}
+        self.tenant_vtime: Dict[str, float] = {}
+        self.tenant_clock = 0.0
+        self.waiting = 0
+        self.in_flight = 0
+        self.granted = 0
+        self.shed = 0
+        self.deferred = 0
+        self.waits_ms: Deque[float] = collections.deque(maxlen=WAIT_SAMPLES)
+
+    def push(self, ticket: Ticket):
+        if ticket.tenant not in self.tenants:
+            self.tenants[ticket.tenant] = collections.deque()
+            # A tenant joining the queue starts level with the one being served, not with credit for idle time
+            self.tenant_vtime[ticket.tenant] = max(self.tenant_vtime.get(ticket.tenant, 0.0), self.tenant_clock)
+        self.tenants[ticket.tenant].append(ticket)
+        self.waiting += 1
+
+    def pop(self) -> Ticket:
+        tenant = min(self.tenants, key=lambda t: self.tenant_vtime[t])
+        queue = self.tenants[tenant]
+        ticket = queue.popleft()
+        self.tenant_clock = self.tenant_vtime[tenant]
+        self.tenant_vtime[tenant] += ticket.cost
+        if not queue:
+            del self.tenants[tenant]
+            if len(self.tenant_vtime) > MAX_IDLE_TENANTS:
+                # Idle tenants at or behind the clock would rejoin at the clock anyway
+                self.tenant_vtime = {t: v for t, v in self.tenant_vtime.items()
+                                     if t in self.tenants or v > self.tenant_clock}
+        self.waiting -= 1
+        return ticket
+
+    def remove(self, ticket: Ticket) -> bool:
+        queue = self.tenants.get(ticket.tenant)
+        if not queue or ticket not in queue:
+            return False
+        queue.remove(ticket)
+        if not queue:
+            del self.tenants[ticket.tenant]
+        self.waiting -= 1
+        return True
+
+
+class LLMScheduler:
+    def __init__(self, slots: int = LLM_SCHEDULER_SLOTS, weights: Optional[Dict[str, float]] = None,
+                 reserved_slots: int = LLM_INTERACTIVE_RESERVED_SLOTS,
+                 p95_target_ms: float = LLM_INTERACTIVE_P95_TARGET_MS,
+                 degraded_slots: int = LLM_DEGRADED_SLOTS, shed_queue_depth: int = LLM_SHED_QUEUE_DEPTH):
+        self.slots = max(1, slots)
+        self.reserved_slots = min(reserved_slots, self.slots - 1)
+        self.p95_target_ms = p95_target_ms
+        self.degraded_slots = degraded_slots
+        self.shed_queue_depth = shed_queue_depth
+        weights = dict(weights or parse_weights(LLM_CLASS_WEIGHTS))
+        weights.setdefault(INTERACTIVE, 1.0)
+        self.classes = {name: WorkClass(name, weight) for name, weight in weights.items()}
+        self.in_flight = 0
+        self.vclock = 0.0
+        self.latencies: Deque[Tuple[float, float]] = collections.deque(maxlen=LATENCY_SAMPLES)
+        self.lock = threading.Lock()
+
+    def _class(self, name: str) -> WorkClass:
+        if name not in self.classes:
+            raise ValueError(f"Unknown LLM work class {name!r}; expected one of {sorted(self.classes)}")
+        return self.classes[name]
+
+    def _interactive_p95(self) -> Optional[float]:
+        cutoff = time.monotonic() - LATENCY_WINDOW_SECONDS
+        while self.latencies and self.latencies[0][0] < cutoff:
+            self.latencies.popleft()
+        return _percentile([ms for _, ms in self.latencies], 0.95)
+
+    def _degraded(self) -> bool:
+        p95 = self._interactive_p95()
+        return p95 is not None and p95 > self.p95_target_ms
+
+    def _eligible(self, work_class: WorkClass, degraded: bool) -> bool:
+        if work_class.name == INTERACTIVE:
+            return self.in_flight < self.slots
+        if self.in_flight >= self.slots - self.reserved_slots:
+            return False
+        if degraded:
+            others = self.in_flight - self.classes[INTERACTIVE].in_flight
+            return others < self.degraded_slots
+        return True
+
+    def _dispatch(self):
+        # Called with the lock held: grant slots in weighted-fair order while any are free
+        degraded = None
+        while self.in_flight < self.slots:
+            backlogged = [c for c in self.classes.values() if c.waiting]
+            if not backlogged:
+                return
+            if degraded is None:
+                degraded = self._degraded()
+            eligible = [c for c in backlogged if self._eligible(c, degraded)]
+            if not eligible:
+                return
+            work_class = min(eligible, key=lambda c: c.vtime)
+            ticket = work_class.pop()
+            self.vclock = work_class.vtime
+            work_class.vtime += ticket.cost / work_class.weight
+            work_class.in_flight += 1
+            work_class.granted += 1
+            self.in_flight += 1
+            work_class.waits_ms.append((time.monotonic() - ticket.enqueued_at) * 1000)
+            ticket.grant()
+
+    def _enqueue(self, ticket: Ticket):
+        with self.lock:
+            work_class = self._class(ticket.work_class)
+            if ticket.work_class != INTERACTIVE and self._degraded():
+                if work_class.waiting >= self.shed_queue_depth:
+                    work_class.shed += 1
+                    raise LLMOverloaded(f"LLM {ticket.work_class} queue is full while interactive latency is "
+                                        f"over target; try again later")
+                # Queued behind the degraded-mode cap
+                work_class.deferred += 1
+            if not work_class.waiting and not work_class.in_flight:
+                # An idle class rejoins at the current virtual time rather than with banked credit
+                work_class.vtime = max(work_class.vtime, self.vclock)
+            work_class.push(ticket)
+            self._dispatch()
+
+    def _abandon(self, ticket: Ticket):
+        # The waiter gave up (deadline or cancellation); hand back the slot if it was granted meanwhile
+        with self.lock:
+            if self.classes[ticket.work_class].remove(ticket):
+                return
+        self.release(ticket, record=False)
+
+    def acquire(self, cost: float, timeout: float) -> Ticket:
+        work_class, tenant = current_work()
+        ticket = Ticket(work_class, tenant, cost)
+        ticket.event = threading.Event()
+        self._enqueue(ticket)
+        if not ticket.event.wait(max(0.0, timeout)):
+            self._abandon(ticket)
+            raise TimeoutError(f"LLM call deadline exceeded waiting in the {work_class} queue")
+        return ticket
+
+    async def acquire_async(self, cost: float, timeout: float) -> Ticket:
+        work_class, tenant = current_work()
+        ticket = Ticket(work_class, tenant, cost)
+        ticket.loop = asyncio.get_running_loop()
+        ticket.future = ticket.loop.create_future()
+        self._enqueue(ticket)
+        try:
+            await asyncio.wait_for(asyncio.shield(ticket.future), timeout=max(0.001, timeout))
+        except BaseException as e:
+            self._abandon(ticket)
+            if isinstance(e, asyncio.TimeoutError):
+                raise TimeoutError(f"LLM call deadline exceeded waiting in the {work_class} queue") from None
+            raise
+        return ticket
+
+    def release(self, ticket: Ticket, record: bool = True):
+        with self.lock:
+            if ticket.granted_at is None:
+                return
+            work_class = self.classes[ticket.work_class]
+            work_class.in_flight -= 1
+            self.in_flight -= 1
+            if record and ticket.work_class == INTERACTIVE:
+                now = time.monotonic()
+                self.latencies.append((now, (now - ticket.enqueued_at) * 1000))
+            ticket.granted_at = None
+            self._dispatch()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            p95 = self._interactive_p95()
+            classes = {}
+            for name, c in self.classes.items():
+                waits = list(c.waits_ms)
+                classes[name] = {
+                    "weight": c.weight,
+                    "waiting": c.waiting,
+                    "waiting_by_tenant": {tenant: len(queue) for tenant, queue in c.tenants.items()},
+                    "in_flight": c.in_flight,
+                    "granted": c.granted,
+                    "shed": c.shed,
+                    "deferred": c.deferred,
+                    "queue_wait_avg_ms": round(sum(waits) / len(waits), 2) if waits else 0.0,
+                    "queue_wait_p50_ms": round(_percentile(waits, 0.5), 2) if waits else None,
+                    "queue_wait_p95_ms": round(_percentile(waits, 0.95), 2) if waits else None,
+                    "queue_wait_max_ms": round(max(waits), 2) if waits else None,
+                }
+            return {
+                "slots": self.slots,
+                "reserved_interactive_slots": self.reserved_slots,
+                "in_flight": self.in_flight,
+                "interactive_p95_ms": round(p95, 2) if p95 is not None else None,
+                "interactive_p95_target_ms": self.p95_target_ms,
+                "degraded": p95 is not None and p95 > self.p95_target_ms,
+                "classes": classes,
+            }
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler()
+            logging.info(f"LLM scheduler: {_scheduler.slots} slots, weights {LLM_CLASS_WEIGHTS}")
+        return _scheduler
+
+
+def scheduler_stats() -> Dict[str, Any]:
+    return get_scheduler().snapshot()
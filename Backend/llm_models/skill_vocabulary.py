@@ -0,0 +1,96 @@
+from typing import Dict, Optional
+import re
+
+## Skill vocabulary ##
+# The one table of skill names and their alternative spellings. The rule-based
+# extractor uses it to recognise skills and write them consistently; the skill
+# index and the prescorer use canonical_skill() as the key a skill is stored
+# and matched under. Pure Python, so it can be imported in the CPU pool.
+
+# Display names of the skills the extractor recognises. Not exhaustive: unknown
+# skills are kept as written and still indexed under their lowercase name.
+KNOWN_SKILLS = (
+    "Python", "Java", "JavaScript", "TypeScript", "C", "C++", "C#", "Go", "Rust", "Kotlin", "Swift", "Ruby",
+    "PHP", "Scala", "R", "MATLAB", "Dart", "Bash", "Shell", "SQL", "NoSQL", "HTML", "CSS", "Sass", "Tailwind CSS",
+    "Bootstrap", "React", "Angular", "Vue", "Next.js", "Node.js", "Express", "Django", "Flask", "FastAPI",
+    "Spring", "Spring Boot", "Hibernate", ".NET", "ASP.NET", "Laravel", "Rails", "GraphQL", "REST", "gRPC",
+    "Redux", "jQuery", "React Native", "Flutter", "Android", "iOS", "PostgreSQL", "MySQL", "SQLite", "MongoDB",
+    "Redis", "Cassandra", "DynamoDB", "Elasticsearch", "Oracle", "Firebase", "Supabase", "Kafka", "RabbitMQ",
+    "Spark", "Hadoop", "Airflow", "dbt", "Snowflake", "BigQuery", "Pandas", "NumPy", "SciPy", "Matplotlib",
+    "Seaborn", "scikit-learn", "TensorFlow", "Keras", "PyTorch", "OpenCV", "NLTK", "spaCy", "Hugging Face",
+    "Transformers", "LangChain", "LlamaIndex", "Machine Learning", "Deep Learning",
+    "Natural Language Processing", "Computer Vision", "Data Analysis", "Data Science", "Statistics",
+    "LLM", "Generative AI", "Power BI", "Tableau", "Excel", "AWS", "Azure", "Google Cloud Platform", "Docker",
+    "Kubernetes", "Terraform", "Ansible", "Jenkins", "GitHub Actions", "CI-CD", "Git", "GitHub", "GitLab",
+    "Linux", "Nginx", "Microservices", "System Design", "Data Structures", "Algorithms", "OOP", "Figma",
+    "Jira", "Postman", "Selenium", "Jest", "Pytest", "JUnit", "Unity", "Blockchain", "Solidity", "Web3",
+    "Streamlit", "Celery", "Prometheus", "Grafana", "Vercel", "Heroku", "Netlify", "Chroma", "Pinecone",
+    "FAISS", "OpenAI API", "Groq",
+)
+
+# Alternative spelling -> canonical (lowercase) name. Only unambiguous spellings:
+# "cv" is left alone since on a resume it as often means the CV itself.
+SKILL_ALIASES: Dict[str, str] = {
+    "k8s": "kubernetes",
+    "kube": "kubernetes",
+    "golang": "go",
+    "js": "javascript",
+    "es6": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "python3": "python",
+    "postgres": "postgresql",
+    "psql": "postgresql",
+    "mongo": "mongodb",
+    "node": "node.js",
+    "nodejs": "node.js",
+    "expressjs": "express",
+    "express.js": "express",
+    "reactjs": "react",
+    "react.js": "react",
+    "vuejs": "vue",
+    "vue.js": "vue",
+    "nextjs": "next.js",
+    "html5": "html",
+    "css3": "css",
+    "sklearn": "scikit-learn",
+    "scikit learn": "scikit-learn",
+    "tf": "tensorflow",
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "nlp": "natural language processing",
+    "llms": "llm",
+    "large language models": "llm",
+    "genai": "generative ai",
+    "gcp": "google cloud platform",
+    "google cloud": "google cloud platform",
+    "amazon web services": "aws",
+    "azure cloud": "azure",
+    "ci/cd": "ci-cd",
+    "cicd": "ci-cd",
+    "c plus plus": "c++",
+    "csharp": "c#",
+    "dotnet": ".net",
+    "rest api": "rest",
+    "restful apis": "rest",
+    "rest apis": "rest",
+    "dsa": "data structures",
+    "ms excel": "excel",
+    "powerbi": "power bi",
+}
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def canonical_skill(name: str) -> str:
+    key = _WHITESPACE.sub(" ", str(name or "").strip().lower()).strip(" ,;:")
+    return SKILL_ALIASES.get(key, key)
+
+
+# Canonical name -> display name
+SKILL_DISPLAY_NAMES: Dict[str, str] = {canonical_skill(skill): skill for skill in KNOWN_SKILLS}
+
+
+def display_skill(name: str) -> Optional[str]:
+    # The display name of a recognised skill under any of its spellings, None if unknown
+    return SKILL_DISPLAY_NAMES.get(canonical_skill(name))
@@ -0,0 +1,209 @@
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+import math
+import os
+import re
+import unicodedata
+
+## Resume text normalization ##
+# Runs between the document parser and the extraction prompt, inside the CPU
+# process pool (so no LLM/DB imports here). Parser output is cleaned page by
+# page: letter-spaced words are joined ("A n a n d" -> "Anand"), whitespace and
+# hyphenated line breaks are repaired, lines repeated at the top/bottom of
+# every page (headers, footers, page numbers) are kept only where they first
+# appear, so a name/contact header survives once, and boilerplate such
+# as "References available on request" is stripped. The result is then capped
+# at RESUME_MAX_TOKENS by dropping the least useful sections first.
+
+RESUME_MAX_TOKENS = int(os.getenv("RESUME_MAX_TOKENS", "3000"))
+# Lines this far from the top/bottom of a page are header/footer candidates
+EDGE_LINES = 3
+
+_WORD = re.compile(r"\w+|[^\w\s]")
+_SPACED_RUN = re.compile(r"(?<!\S)(?:\w ){2,}\w(?!\S)")
+_INLINE_SPACE = re.compile(r"[ \t\u00a0\u2000-\u200a\u202f\u3000]+")
+_ZERO_WIDTH = re.compile(r"[\u200b-\u200d\u2060\ufeff\u00ad]")
+_BULLET = re.compile(r"^[\u2022\u25cf\u25aa\u25a0\u25e6\u2023\u2043\u27a2*]\s*")
+_PAGE_NUMBER = re.compile(r"^(?:-\s*)?(?:page\s*)?\d{1,3}(?:\s*(?:of|/)\s*\d{1,3})?(?:\s*-)?$", re.IGNORECASE)
+_BOILERPLATE = [re.compile(p, re.IGNORECASE) for p in (
+    r"^(?:curriculum vitae|resume|r[ée]sum[ée]|cv)$",
+    r"^references?\s*(?:are\s*|will be\s*)?(?:available|provided|furnished)\s*(?:up)?on\s*request\.?$",
+    r"^i\s+hereby\s+declare\b.*",
+    r"^(?:place|date)\s*:?\s*[\w ,./-]{0,30}$",
+)]
+
+# Canonical section -> heading words. Priority: lower survives truncation longer.
+SECTIONS = {
+    "skills": (1, ("skills", "technical skills", "key skills", "core competencies", "technologies",
+                   "tech stack", "tools and technologies", "skills and tools")),
+    "experience": (1, ("experience", "work experience", "professional experience", "employment",
+                       "employment history", "work history", "internships", "internship")),
+    "projects": (2, ("projects", "academic projects", "personal projects", "key projects")),
+    "education": (2, ("education", "academics", "academic background", "educational qualifications",
+                      "qualifications")),
+    "summary": (3, ("summary", "professional summary", "profile", "objective", "career objective",
+                    "about me")),
+    "certifications": (4, ("certifications", "certificates", "courses", "training")),
+    "achievements": (4, ("achievements", "awards", "honors", "honours", "accomplishments")),
+    "publications": (5, ("publications", "research")),
+    "activities": (6, ("activities", "extracurricular activities", "extra-curricular activities",
+                       "volunteering", "leadership", "positions of responsibility")),
+    "languages": (7, ("languages",)),
+    "personal": (8, ("personal details", "personal information", "personal profile")),
+    "interests": (8, ("interests", "hobbies", "hobbies and interests")),
+    "references": (9, ("references",)),
+    "declaration": (9, ("declaration",)),
+}
+_HEADINGS = {heading: name for name, (_, headings) in SECTIONS.items() for heading in headings}
+# Below this priority a section is only trimmed, never dropped outright
+CORE_PRIORITY = 2
+
+
+def estimate_tokens(text: str) -> int:
+    # Word/punctuation count scaled for sub-word splits; close enough for budgeting
+    return math.ceil(len(_WORD.findall(text or "")) * 1.3)
+
+
+def _despace(line: str) -> str:
+    return _SPACED_RUN.sub(lambda m: m.group(0).replace(" ", ""), line)
+
+
+def _clean_lines(page: str) -> List[str]:
+    page = _ZERO_WIDTH.sub("", unicodedata.normalize("NFKC", page))
+    lines = []
+    for raw in page.splitlines():
+        # Letter-spaced words are separated by wider gaps than their letters, so join first
+        line = _INLINE_SPACE.sub(" ", _despace(raw.strip())).strip()
+        line = _BULLET.sub("- ", line)
+        if not line:
+            continue
+        # "devel-" + "opment" across a line break
+        if lines and lines[-1].endswith("-") and line[0].islower() and lines[-1][-2:-1].isalpha():
+            lines[-1] = lines[-1][:-1] + line
+            continue
+        lines.append(line)
+    return lines
+
+
+def _edge_key(line: str) -> str:
+    # Page furniture often differs only by the page number
+    return re.sub(r"\d+", "#", line.lower())
+
+
+def _strip_page_furniture(pages: List[List[str]]) -> Tuple[List[List[str]], int]:
+    removed = 0
+    if len(pages) > 1:
+        seen = Counter()
+        for lines in pages:
+            seen.update({_edge_key(line) for line in lines[:EDGE_LINES] + lines[-EDGE_LINES:]})
+        threshold = max(2, math.ceil(len(pages) / 2))
+        repeated = {key for key, count in seen.items() if count >= threshold}
+        if repeated:
+            stripped, first_seen = [], set()
+            for lines in pages:
+                edges = set(range(min(EDGE_LINES, len(lines)))) | set(range(max(0, len(lines) - EDGE_LINES), len(lines)))
+                kept = []
+                for i, line in enumerate(lines):
+                    key = _edge_key(line)
+                    if i in edges and key in repeated:
+                        # The first copy is often the resume's own header (name, email, phone)
+                        if key in first_seen:
+                            continue
+                        first_seen.add(key)
+                    kept.append(line)
+                removed += len(lines) - len(kept)
+                stripped.append(kept)
+            pages = stripped
+    return pages, removed
+
+
+def _is_boilerplate(line: str) -> bool:
+    return bool(_PAGE_NUMBER.match(line)) or any(p.match(line) for p in _BOILERPLATE)
+
+
+def normalize_pages(pages: List[str]) -> Tuple[str, Dict[str, int]]:
+    page_lines, furniture = _strip_page_furniture([_clean_lines(page) for page in pages])
+    lines, boilerplate = [], 0
+    for line in (line for page in page_lines for line in page):
+        if _is_boilerplate(line):
+            boilerplate += 1
+        elif not lines or line != lines[-1]:
+            lines.append(line)
+    return "\n".join(lines), {"furniture_lines_removed": furniture, "boilerplate_lines_removed": boilerplate}
+
+
+def section_of(line: str):
+    heading = re.sub(r"[^a-z& -]", "", line.lower().rstrip(":")).replace("&", "and").strip()
+    if len(heading.split()) > 4:
+        return None
+    return _HEADINGS.get(heading)
+
+
+def split_sections(text: str) -> List[Dict[str, Any]]:
+    # The lines before the first heading are the contact block and are always kept
+    sections = [{"name": "header", "priority": 0, "lines": []}]
+    for line in text.splitlines():
+        name = section_of(line)
+        if name:
+            sections.append({"name": name, "priority": SECTIONS[name][0], "lines": [line]})
+        else:
+            sections[-1]["lines"].append(line)
+    for section in sections:
+        section["tokens"] = [estimate_tokens(line) for line in section["lines"]]
+    return [s for s in sections if s["lines"]]
+
+
+def truncate_sections(text: str, max_tokens: int = RESUME_MAX_TOKENS) -> Tuple[str, Dict[str, Any]]:
+    sections = split_sections(text)
+    total = sum(sum(s["tokens"]) for s in sections)
+    report = {"truncated": total > max_tokens, "dropped_sections": [], "trimmed_sections": []}
+    if total <= max_tokens:
+        return text, report
+
+    # Whole sections go first, least useful (and then latest) first
+    for _, section in sorted(enumerate(sections), key=lambda p: (-p[1]["priority"], -p[0])):
+        if total <= max_tokens or section["priority"] <= CORE_PRIORITY:
+            break
+        total -= sum(section["tokens"])
+        section["lines"], section["tokens"] = [], []
+        report["dropped_sections"].append(section["name"])
+
+    # Then trim the tail of whichever core section is currently longest
+    while total > max_tokens:
+        trimmable = [s for s in sections if s["priority"] > 0 and len(s["lines"]) > 1]
+        if not trimmable:
+            break
+        longest = max(trimmable, key=lambda s: sum(s["tokens"]))
+        longest["lines"].pop()
+        total -= longest["tokens"].pop()
+        if longest["name"] not in report["trimmed_sections"]:
+            report["trimmed_sections"].append(longest["name"])
+
+    truncated = "\n".join(line for s in sections for line in s["lines"])
+    if total > max_tokens:
+        # Only the contact block and headings are left; cut it at the budget
+        kept, used = [], 0
+        for word in truncated.split(" "):
+            used += estimate_tokens(word)
+            if used > max_tokens:
+                break
+            kept.append(word)
+        truncated = " ".join(kept)
+    return truncated, report
+
+
+def prepare_resume_text(pages: List[str], max_tokens: int = RESUME_MAX_TOKENS) -> Tuple[str, Dict[str, Any]]:
+    # Returns (text for the extraction prompt, token accounting for this upload)
+    raw_tokens = sum(estimate_tokens(page) for page in pages)
+    normalized, removed = normalize_pages(pages)
+    normalized_tokens = estimate_tokens(normalized)
+    text, truncation = truncate_sections(normalized, max_tokens)
+    return text, {
+        "pages": len(pages),
+        "raw_tokens": raw_tokens,
+        "normalized_tokens": normalized_tokens,
+        "final_tokens": estimate_tokens(text),
+        "max_tokens": max_tokens,
+        **removed,
+        **truncation,
+    }
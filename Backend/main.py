@@ -1,9 +1,34 @@
 from fastapi import FastAPI
-from routers import admin,recruiter,login, user
+from routers import admin,recruiter,login, user, jobs, health, metrics
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+from executors import run_io, shutdown_executors
+from startup import FAST_STARTUP, init_database, warmup
+from database import dispose_async_engine
+from uploads import UploadLimitMiddleware
+from observability import TraceMiddleware
+import asyncio
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_database()
+    warmup_task = None
+    if not FAST_STARTUP:
+        # Load models in the background; /health/ready reports 503 until this finishes
+        warmup_task = asyncio.create_task(run_io(warmup))
+    yield
+    if warmup_task:
+        warmup_task.cancel()
+    await dispose_async_engine()
+    shutdown_executors()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Rejects oversized upload bodies while they stream in; added first so CORS wraps its 413s
+app.add_middleware(UploadLimitMiddleware)
 
 # Allow frontend dev URL
 origins = [
@@ -17,11 +42,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  
     allow_headers=["*"],  
+    # Lets the frontend read the keyset pagination cursor on admin listings
+    expose_headers=["X-Next-Cursor", "X-Trace-Id"],
 )
 
+# Outermost, so the trace and the request timing cover the other middleware too
+app.add_middleware(TraceMiddleware)
+
 
 
 app.include_router(login.router)
 app.include_router(admin.router)
 app.include_router(user.router)
-app.include_router(recruiter.router)
\ No newline at end of file
+app.include_router(recruiter.router)
+app.include_router(jobs.router)
+app.include_router(health.router)
+app.include_router(metrics.router)
\ No newline at end of file
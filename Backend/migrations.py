@@ -0,0 +1,25 @@
+from sqlalchemy import inspect, text
+from database import Base, engine
+import models  # noqa: F401  (registers the tables on Base.metadata)
+import logging
+
+
+# create_all only creates missing tables, so columns and indexes added to
+# existing models are patched in here for databases created by older versions.
+def _add_missing_columns(conn, table):
+    existing = {col["name"] for col in inspect(conn).get_columns(table.name)}
+    for column in table.columns:
+        if column.name in existing:
+            continue
+        column_type = column.type.compile(dialect=conn.dialect)
+        conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+        logging.info(f"Added column {table.name}.{column.name}")
+
+
+def run_migrations(bind=engine):
+    Base.metadata.create_all(bind=bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            _add_missing_columns(conn, table)
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
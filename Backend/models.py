@@ -1,5 +1,5 @@
 from database import Base
-from sqlalchemy import Column, Float, Integer, ForeignKey, String, Text, Enum as SQLEnum,JSON
+from sqlalchemy import Column, DateTime, Float, Index, Integer, ForeignKey, String, Text, Enum as SQLEnum,JSON
 from sqlalchemy.orm import relationship
 import enum
 
@@ -26,8 +26,9 @@ class Resume(Base):
     __tablename__ = "resumes"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     file_path = Column(String, nullable=False) 
+    content_hash = Column(String, index=True)
     extracted_text = Column(Text) 
     skills = Column(JSON)   
     experience = Column(JSON)   
@@ -36,6 +37,17 @@ class Resume(Base):
 
     user = relationship("User", back_populates="resumes")
     match_results = relationship("JobMatchResult", back_populates="resume", cascade="all, delete")
+    skill_entries = relationship("ResumeSkill", back_populates="resume", cascade="all, delete-orphan")
+
+## Inverted skill index (one row per canonical skill per resume) ##
+class ResumeSkill(Base):
+    __tablename__ = "resume_skills"
+
+    # (skill, resume_id) primary key doubles as the posting list lookup index
+    skill = Column(String, primary_key=True)
+    resume_id = Column(Integer, ForeignKey("resumes.id", ondelete="CASCADE"), primary_key=True, index=True)
+
+    resume = relationship("Resume", back_populates="skill_entries")
 
 ## JobDescription Table ##
 class JobDescription(Base):
@@ -46,6 +58,7 @@ class JobDescription(Base):
     company_name = Column(String)
     description = Column(Text, nullable=False)
     required_skills = Column(JSON)  
+    description_hash = Column(String, unique=True, index=True)
 
     match_results = relationship("JobMatchResult", back_populates="job", cascade="all, delete")
 
@@ -53,12 +66,46 @@ class JobDescription(Base):
 ## JobMatchScore Results Of AI Model ##
 class JobMatchResult(Base):
     __tablename__ = "match_results"
+    # Serves score cache lookups and per-resume invalidation
+    __table_args__ = (Index("ix_match_results_resume_job_prompt", "resume_id", "job_id", "prompt_version"),)
     
     id = Column(Integer, primary_key=True, index=True)
     resume_id = Column(Integer, ForeignKey("resumes.id", ondelete="CASCADE"), nullable=False)
     job_id = Column(Integer, ForeignKey("job_descriptions.id", ondelete="CASCADE"), nullable=False)
     match_score = Column(Float, nullable=False)  
     missing_skills = Column(Text) 
+    resume_hash = Column(String)
+    prompt_version = Column(String)
+    result = Column(JSON)
+    created_at = Column(DateTime)
 
     resume = relationship("Resume", back_populates="match_results")
     job = relationship("JobDescription", back_populates="match_results")
+
+
+## Background Jobs (durable task queue) ##
+class JobStatus(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+class BackgroundJob(Base):
+    __tablename__ = "background_jobs"
+
+    id = Column(String, primary_key=True)
+    kind = Column(String, nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
+    status = Column(SQLEnum(JobStatus), default=JobStatus.queued, nullable=False, index=True)
+    payload = Column(JSON)
+    result = Column(JSON)
+    error = Column(Text)
+    progress = Column(Integer, default=0)
+    stage = Column(String)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    run_after = Column(DateTime, nullable=False)
+    locked_by = Column(String)
+    lease_expires_at = Column(DateTime)
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
@@ -0,0 +1,255 @@
+from prometheus_client import Counter, Histogram, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import logging
+import os
+import random
+import re
+import threading
+import time
+import uuid
+
+## Metrics, trace ids and slow-request profiles ##
+# stage() times one step of a request (parsing, the LLM call, encoding, the
+# Chroma write, a SQLite query) into the resume_stage_duration_seconds
+# histogram, labelled "<operation>.<step>" (extract.parse, embed.encode,
+# score.llm, rank.retrieval, ...). Each request runs under a trace: its id
+# comes from the X-Request-ID / X-Trace-Id header or is generated, is returned
+# in X-Trace-Id, is attached to the stage samples as an exemplar, and the
+# request's stages are logged on one line against it, so a slow upload shows
+# where its time went. run_io copies the context into its threads, so stages
+# timed there land on the same trace; work on the process pool is timed around
+# the run_cpu call. Token usage per prompt comes from the LLM gateway, and the
+# caches' existing hit/miss counters are exported as they are read. All of it
+# is served in Prometheus format on /metrics (per process: with several
+# uvicorn workers, scrape each one).
+#
+# SLOW_REQUEST_PROFILE_MS > 0 turns on the sampling profiler (pyinstrument):
+# SLOW_REQUEST_PROFILE_SAMPLE_RATE of requests are profiled and the ones that
+# take longer than the threshold are written as HTML to SLOW_REQUEST_PROFILE_DIR,
+# keeping the newest SLOW_REQUEST_PROFILE_MAX_FILES. Time spent in run_io/run_cpu
+# workers shows up as the await on them.
+
+TRACE_HEADER = "X-Trace-Id"
+TRACE_REQUEST_HEADERS = (b"x-trace-id", b"x-request-id")
+SLOW_REQUEST_PROFILE_MS = float(os.getenv("SLOW_REQUEST_PROFILE_MS", "0"))
+SLOW_REQUEST_PROFILE_SAMPLE_RATE = float(os.getenv("SLOW_REQUEST_PROFILE_SAMPLE_RATE", "1.0"))
+SLOW_REQUEST_PROFILE_INTERVAL_MS = float(os.getenv("SLOW_REQUEST_PROFILE_INTERVAL_MS", "5"))
+SLOW_REQUEST_PROFILE_DIR = os.getenv("SLOW_REQUEST_PROFILE_DIR", "profiles")
+SLOW_REQUEST_PROFILE_MAX_FILES = int(os.getenv("SLOW_REQUEST_PROFILE_MAX_FILES", "100"))
+
+# Stages run from sub-millisecond cache reads to LLM calls that take tens of seconds
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+STAGE_SECONDS = Histogram("resume_stage_duration_seconds", "Time spent in one stage of an upload, score or ranking",
+                          ["stage"], buckets=STAGE_BUCKETS)
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "HTTP request latency by route",
+                            ["method", "route", "status"], buckets=STAGE_BUCKETS)
+LLM_TOKENS = Counter("llm_tokens", "Tokens reported by the LLM provider", ["prompt", "kind"])
+LLM_CALLS = Counter("llm_calls", "LLM calls through the gateway", ["prompt", "outcome"])
+SLOW_REQUEST_PROFILES = Counter("slow_request_profiles", "Requests profiled, and profiles written for being slow",
+                                ["outcome"])
+
+_trace_id_pattern = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+class Trace:
+    def __init__(self, trace_id: str):
+        self.id = trace_id
+        self.started = time.perf_counter()
+        self.stages: List[Tuple[str, float]] = []
+
+
+_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+
+
+@contextmanager
+def trace_scope(trace_id: Optional[str] = None) -> Iterator[Trace]:
+    # Everything timed inside the block (same task, or threads started via run_io) is recorded on this trace
+    trace = Trace(trace_id or uuid.uuid4().hex)
+    token = _trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
+
+
+def observe_stage(name: str, seconds: float):
+    trace = _trace.get()
+    if trace is None:
+        STAGE_SECONDS.labels(name).observe(seconds)
+        return
+    STAGE_SECONDS.labels(name).observe(seconds, exemplar={"trace_id": trace.id})
+    trace.stages.append((name, seconds))
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - started)
+
+
+def format_stages(trace: Trace) -> str:
+    return " ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in trace.stages)
+
+
+def record_llm_usage(prompt: str, usage: Dict[str, Any]):
+    LLM_TOKENS.labels(prompt, "input").inc(usage.get("input_tokens", 0))
+    LLM_TOKENS.labels(prompt, "output").inc(usage.get("output_tokens", 0))
+
+
+def record_llm_call(prompt: str, succeeded: bool):
+    LLM_CALLS.labels(prompt, "ok" if succeeded else "error").inc()
+
+
+## Cache counters ##
+# The caches keep their own hit/miss stats (shown on /admin/cache-stats); this
+# collector reads them at scrape time rather than counting twice.
+
+class CacheCollector:
+    def __init__(self, sources: Dict[str, Callable[[], Dict[str, Tuple[int, int]]]]):
+        # source name -> fn returning {cache name: (hits, misses)}
+        self.sources = sources
+
+    def collect(self):
+        hits = CounterMetricFamily("cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Cache misses", labels=["cache"])
+        ratio = GaugeMetricFamily("cache_hit_ratio", "Hits over lookups since the process started", labels=["cache"])
+        for source, read in self.sources.items():
+            try:
+                caches = read()
+            except Exception as e:
+                logging.warning(f"Reading {source} cache stats failed: {e}")
+                continue
+            for cache, (hit_count, miss_count) in caches.items():
+                hits.add_metric([cache], hit_count)
+                misses.add_metric([cache], miss_count)
+                lookups = hit_count + miss_count
+                ratio.add_metric([cache], hit_count / lookups if lookups else 0.0)
+        yield hits
+        yield misses
+        yield ratio
+
+
+def _score_caches():
+    from resume_scores.score_cache import cache_stats
+    stats = cache_stats()
+    return {"score": (stats["hits"], stats["misses"])}
+
+
+def _extraction_caches():
+    from llm_models.extraction_cache import extraction_cache_stats
+    stats = extraction_cache_stats()
+    return {"extraction_text": (stats["text_hits"], stats["text_misses"]),
+            "extraction": (stats["extraction_hits"], stats["extraction_misses"])}
+
+
+def _auth_caches():
+    from routers.auth import principal_cache_stats
+    stats = principal_cache_stats()
+    return {"auth_principal": (stats["hits"], stats["misses"])}
+
+
+REGISTRY.register(CacheCollector({"score": _score_caches, "extraction": _extraction_caches, "auth": _auth_caches}))
+
+
+## Slow-request profiles ##
+
+_profiles_lock = threading.Lock()
+
+
+def _start_profiler():
+    if SLOW_REQUEST_PROFILE_MS <= 0 or random.random() >= SLOW_REQUEST_PROFILE_SAMPLE_RATE:
+        return None
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        logging.warning("SLOW_REQUEST_PROFILE_MS is set but pyinstrument isn't installed")
+        return None
+    profiler = Profiler(interval=SLOW_REQUEST_PROFILE_INTERVAL_MS / 1000, async_mode="enabled")
+    profiler.start()
+    SLOW_REQUEST_PROFILES.labels("profiled").inc()
+    return profiler
+
+
+def write_profile(profiler, trace: Trace, method: str, path: str, elapsed_ms: float) -> str:
+    os.makedirs(SLOW_REQUEST_PROFILE_DIR, exist_ok=True)
+    route = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") or "root"
+    file_path = os.path.join(SLOW_REQUEST_PROFILE_DIR,
+                             f"{time.strftime('%Y%m%d-%H%M%S')}-{int(elapsed_ms)}ms-{method}-{route}-{trace.id}.html")
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write(profiler.output_html())
+    SLOW_REQUEST_PROFILES.labels("written").inc()
+    with _profiles_lock:
+        profiles = sorted(e.path for e in os.scandir(SLOW_REQUEST_PROFILE_DIR) if e.name.endswith(".html"))
+        for old in profiles[:max(0, len(profiles) - SLOW_REQUEST_PROFILE_MAX_FILES)]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+    return file_path
+
+
+def _header_trace_id(scope) -> Optional[str]:
+    headers = dict(scope.get("headers") or [])
+    for name in TRACE_REQUEST_HEADERS:
+        value = headers.get(name, b"").decode("latin-1")
+        # Caller-supplied ids end up in logs and file names, so only simple ones are taken
+        if _trace_id_pattern.match(value):
+            return value
+    return None
+
+
+class TraceMiddleware:
+    # Runs each HTTP request under a trace, records its latency and, when enabled, profiles it
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def traced_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", []), (TRACE_HEADER.lower().encode(),
+                                                                    trace.id.encode())]
+            await send(message)
+
+        with trace_scope(_header_trace_id(scope)) as trace:
+            profiler = _start_profiler()
+            try:
+                # Streaming responses are timed until their last chunk is sent
+                await self.app(scope, receive, traced_send)
+            finally:
+                elapsed = time.perf_counter() - trace.started
+                if profiler is not None:
+                    profiler.stop()
+                await self._finish(scope, trace, status, elapsed, profiler)
+
+    @staticmethod
+    async def _finish(scope, trace: Trace, status: int, elapsed: float, profiler):
+        from executors import run_io
+
+        # Route templates rather than raw paths, so ids in URLs don't each become a series
+        route = getattr(scope.get("route"), "path", None) or "unmatched"
+        method, elapsed_ms = scope["method"], elapsed * 1000
+        REQUEST_SECONDS.labels(method, route, str(status)).observe(elapsed, exemplar={"trace_id": trace.id})
+        if trace.stages:
+            logging.info(f"trace={trace.id} {method} {scope['path']} {status} {elapsed_ms:.1f}ms "
+                         f"{format_stages(trace)}")
+        if profiler is not None and elapsed_ms >= SLOW_REQUEST_PROFILE_MS:
+            try:
+                file_path = await run_io(write_profile, profiler, trace, method, route, elapsed_ms)
+                logging.warning(f"trace={trace.id} {method} {scope['path']} took {elapsed_ms:.0f}ms; "
+                                f"profile written to {file_path}")
+            except Exception as e:
+                logging.warning(f"Writing the slow request profile for trace {trace.id} failed: {e}")
@@ -0,0 +1,44 @@
+from passlib.context import CryptContext
+from executors import run_auth
+from typing import Optional, Tuple
+import os
+
+## Password hashing ##
+# bcrypt runs on the dedicated auth process pool so hashing never blocks the
+# event loop. BCRYPT_ROUNDS sets the cost for new hashes; a stored hash with a
+# different cost still verifies, and is re-hashed at the current cost on the
+# next successful login.
+# Kept free of app/DB imports: the functions below run inside the pool workers.
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Pinning min == max == default makes passlib flag any other cost as needing an update
+pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto',
+                           bcrypt__default_rounds=BCRYPT_ROUNDS,
+                           bcrypt__min_rounds=BCRYPT_ROUNDS,
+                           bcrypt__max_rounds=BCRYPT_ROUNDS)
+
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(password, hashed_password)
+
+
+def verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    # (valid, new_hash) where new_hash is set when the stored cost is out of date
+    return pwd_context.verify_and_update(password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    return await run_auth(hash_password, password)
+
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    return await run_auth(verify_password, password, hashed_password)
+
+
+async def verify_and_update_async(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return await run_auth(verify_and_update, password, hashed_password)
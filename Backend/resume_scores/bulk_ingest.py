@@ -0,0 +1,129 @@
+from sqlalchemy.orm import load_only
+from database import SessionLocal
+from models import Resume
+from resume_scores.chroma_db import merge_all, upsert_vectors
+from resume_scores.embeddings import embed_texts
+from resume_scores.hybrid_retriever import invalidate_bm25_index
+from typing import Callable, Optional
+import argparse
+import json
+import logging
+import os
+import time
+
+## Bulk (re)ingestion of resume embeddings into Chroma ##
+# Streams resumes from the DB in keyset-ordered pages, embeds them in batches,
+# upserts each batch in a single Chroma call and persists once per batch. The
+# last fully written resume id is checkpointed so an interrupted run resumes;
+# the checkpoint is removed once a run reaches the end, so the next run starts over.
+
+BULK_PAGE_SIZE = int(os.getenv("BULK_INGEST_PAGE_SIZE", "1000"))
+BULK_BATCH_SIZE = int(os.getenv("BULK_INGEST_BATCH_SIZE", "64"))
+BULK_CHECKPOINT_PATH = os.getenv("BULK_INGEST_CHECKPOINT", "bulk_ingest_checkpoint.json")
+
+
+def load_checkpoint(path: str) -> int:
+    try:
+        with open(path) as f:
+            return int(json.load(f).get("last_resume_id", 0))
+    except (OSError, ValueError):
+        return 0
+
+
+def save_checkpoint(path: str, last_resume_id: int, stats: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"last_resume_id": last_resume_id, **stats}, f)
+    # Atomic swap so a crash mid-write never leaves a corrupt checkpoint
+    os.replace(tmp_path, path)
+
+
+def clear_checkpoint(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def iter_resume_pages(after_id: int, page_size: int):
+    while True:
+        with SessionLocal() as db:
+            page = db.query(Resume).options(load_only(
+                Resume.id, Resume.user_id, Resume.skills, Resume.experience, Resume.projects, Resume.education
+            )).filter(Resume.id > after_id).order_by(Resume.id).limit(page_size).all()
+        if not page:
+            return
+        yield page
+        after_id = page[-1].id
+
+
+def ingest_all(batch_size: int = BULK_BATCH_SIZE, page_size: int = BULK_PAGE_SIZE,
+               checkpoint_path: Optional[str] = BULK_CHECKPOINT_PATH, restart: bool = False,
+               progress: Optional[Callable[[dict], None]] = None) -> dict:
+    last_id = 0 if restart or not checkpoint_path else load_checkpoint(checkpoint_path)
+    stats = {"scanned": 0, "embedded": 0, "skipped": 0, "batches": 0}
+    started = time.perf_counter()
+    embed_seconds = 0.0
+
+    for page in iter_resume_pages(last_id, page_size):
+        for i in range(0, len(page), batch_size):
+            batch = page[i:i + batch_size]
+            ids, docs = [], []
+            for resume in batch:
+                doc = merge_all(resume)
+                if doc and doc.page_content.strip():
+                    ids.append(f"resume_{resume.id}")
+                    docs.append(doc)
+                else:
+                    stats["skipped"] += 1
+
+            if docs:
+                embed_started = time.perf_counter()
+                vectors = embed_texts([doc.page_content for doc in docs])
+                embed_seconds += time.perf_counter() - embed_started
+                upsert_vectors(ids, docs, vectors)
+
+            stats["scanned"] += len(batch)
+            stats["embedded"] += len(docs)
+            stats["batches"] += 1
+            last_id = batch[-1].id
+            if checkpoint_path:
+                save_checkpoint(checkpoint_path, last_id, stats)
+            if progress:
+                progress({**stats, "last_resume_id": last_id})
+
+    if checkpoint_path:
+        # Finished: only an interrupted run should resume, so the next one re-embeds from the start
+        clear_checkpoint(checkpoint_path)
+    # Re-embedding picks up resumes edited in place, which the BM25 signature can't see
+    invalidate_bm25_index()
+    elapsed = time.perf_counter() - started
+    report = {
+        **stats,
+        "last_resume_id": last_id,
+        "seconds": round(elapsed, 2),
+        "embed_seconds": round(embed_seconds, 2),
+        "docs_per_sec": round(stats["embedded"] / elapsed, 1) if elapsed else 0.0,
+    }
+    logging.info(f"Bulk ingest finished: {report}")
+    return report
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Bulk-embed resumes into the Chroma vector store")
+    arg_parser.add_argument("--batch-size", type=int, default=BULK_BATCH_SIZE)
+    arg_parser.add_argument("--page-size", type=int, default=BULK_PAGE_SIZE)
+    arg_parser.add_argument("--checkpoint", default=BULK_CHECKPOINT_PATH)
+    arg_parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from the first resume")
+    args = arg_parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    def log_progress(p):
+        logging.info(f"batch {p['batches']}: {p['embedded']} embedded, last id {p['last_resume_id']}")
+
+    print(json.dumps(ingest_all(args.batch_size, args.page_size, args.checkpoint, args.restart, log_progress), indent=2))
+
+
+if __name__ == "__main__":
+    main()
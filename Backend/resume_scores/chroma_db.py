@@ -1,13 +1,14 @@
-from langchain_chroma import Chroma
-from langchain.schema import Document
-from  langchain_huggingface import HuggingFaceEmbeddings
-from langchain_groq import ChatGroq
+from langchain_core.documents import Document
 from sqlalchemy.orm import Session
 from fastapi import Depends, HTTPException,status
 from typing import Annotated
 from database import get_db, SessionLocal
 from models import Resume
+from resume_scores.embeddings import embed_texts, get_embedding_model
+from executors import run_embed, run_io
+from observability import stage
 import os
+import threading
 from dotenv import load_dotenv
 
 
@@ -15,15 +16,28 @@ load_dotenv()
 
 HF_API = os.getenv("HUGGINGFACE_API_KEY")
 
-embedding_model = HuggingFaceEmbeddings(model_name="intfloat/e5-base-v2",
-                              model_kwargs={'device': 'cuda'},
-                              encode_kwargs={'normalize_embeddings': True})
+CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", "chroma_db")
 
-vector_store = Chroma(
-                      embedding_function=embedding_model,
-                      persist_directory="chroma_db",
-                      collection_name="resume_embeddings"  
-                    )
+_vector_store = None
+_vector_store_lock = threading.Lock()
+
+
+def get_vector_store():
+    # Opening the store loads the embedding model, so it happens on first use rather than at import
+    global _vector_store
+    with _vector_store_lock:
+        if _vector_store is None:
+            from langchain_chroma import Chroma
+            _vector_store = Chroma(
+                embedding_function=get_embedding_model(),
+                persist_directory=CHROMA_PERSIST_DIR,
+                collection_name="resume_embeddings"
+            )
+        return _vector_store
+
+
+def vector_store_initialized() -> bool:
+    return _vector_store is not None
 
 db_dependency = Annotated[Session, Depends(get_db)]
 
@@ -82,7 +96,7 @@ def merge_all(resume_obj) -> Document:
 
 
 
-def store_embeddings(resume_obj):
+def _prepare_embedding_doc(resume_obj):
     if isinstance(resume_obj, Resume):
         resume = resume_obj.__dict__.copy()
     else:
@@ -92,7 +106,7 @@ def store_embeddings(resume_obj):
 
     doc = merge_all(resume)
 
-    if not doc.page_content.strip():
+    if not doc or not doc.page_content.strip():
         raise HTTPException(
             status_code=status.HTTP_204_NO_CONTENT,
             detail="Empty or invalid resume content."
@@ -105,17 +119,56 @@ def store_embeddings(resume_obj):
             detail="Resume ID is missing"
         )
 
-    doc_id = f"resume_{resume_id}"
-    vector_store.add_documents([doc], ids=[doc_id])
-    if hasattr(vector_store,"persist"):
-      vector_store.persist()
+    return f"resume_{resume_id}", doc
+
 
+def store_embeddings(resume_obj):
+    # Encoded and written as separate steps (as store_embeddings_async does) so each is timed on its own
+    doc_id, doc = _prepare_embedding_doc(resume_obj)
+    with stage("embed.encode"):
+        vectors = embed_texts([doc.page_content])
+    upsert_vectors([doc_id], [doc], vectors)
+
+    return {"status": "success"}
+
+
+def upsert_vectors(ids, docs, vectors):
+    vector_store = get_vector_store()
+    with stage("embed.chroma_persist"):
+        vector_store._collection.upsert(
+            ids=ids,
+            embeddings=vectors,
+            documents=[doc.page_content for doc in docs],
+            metadatas=[doc.metadata for doc in docs]
+        )
+        if hasattr(vector_store, "persist"):
+            vector_store.persist()
+
+
+def copy_embedding(source_resume_id: int, resume_obj) -> bool:
+    # Reuse the vector of an identical earlier upload instead of encoding again
+    found = get_vector_store()._collection.get(ids=[f"resume_{source_resume_id}"], include=["embeddings"])
+    embeddings = found.get("embeddings")
+    if embeddings is None or len(embeddings) == 0:
+        return False
+    doc_id, doc = _prepare_embedding_doc(resume_obj)
+    upsert_vectors([doc_id], [doc], [list(embeddings[0])])
+    return True
+
+
+async def store_embeddings_async(resume_obj):
+    # Encoding uses the one in-process model on the embedding thread; the Chroma write is I/O
+    doc_id, doc = _prepare_embedding_doc(resume_obj)
+    with stage("embed.encode"):
+        vectors = await run_embed(embed_texts, [doc.page_content])
+    await run_io(upsert_vectors, [doc_id], [doc], vectors)
     return {"status": "success"}
 
 
 
 def delete_embedding(resume_id: int):
     doc_id = f"resume_{resume_id}"
+    vector_store = get_vector_store()
     vector_store.delete(ids=[doc_id])
 
     # Only persist if persist_directory is set
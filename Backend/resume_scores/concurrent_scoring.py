@@ -0,0 +1,68 @@
+import asyncio
+import logging
+import os
+import time
+from llm_models.gateway import call_deadline
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Sequence
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_CALL_TIMEOUT = float(os.getenv("LLM_CALL_TIMEOUT", "30"))
+
+
+async def _score_one(index: int, item: Any, score_fn: Callable[[Any], Awaitable[Dict]],
+                     semaphore: asyncio.Semaphore, timeout: float) -> Dict[str, Any]:
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            # The deadline lets the LLM gateway skip throttle waits and retries that can't finish in time
+            with call_deadline(timeout):
+                result = await asyncio.wait_for(score_fn(item), timeout=timeout)
+            error = None
+        except asyncio.TimeoutError:
+            result, error = None, f"timed out after {timeout}s"
+        except Exception as e:
+            result, error = None, str(e)
+        latency_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    if error:
+        logging.warning(f"Scoring item {index} failed: {error}")
+    return {"index": index, "item": item, "result": result, "error": error, "latency_ms": latency_ms}
+
+
+async def score_concurrently(items: Sequence[Any],
+                             score_fn: Callable[[Any], Awaitable[Dict]],
+                             max_concurrency: int = LLM_MAX_CONCURRENCY,
+                             timeout: float = LLM_CALL_TIMEOUT) -> List[Dict[str, Any]]:
+    # Outcomes come back in the same order as `items`, whatever order the calls finish in
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    tasks = [_score_one(i, item, score_fn, semaphore, timeout) for i, item in enumerate(items)]
+    return list(await asyncio.gather(*tasks))
+
+
+def summarize_timings(outcomes: List[Dict[str, Any]], wall_time_s: float, max_concurrency: int) -> Dict[str, Any]:
+    latencies = [o["latency_ms"] for o in outcomes]
+    return {
+        "llm_calls": len(outcomes),
+        "failed_calls": sum(1 for o in outcomes if o["error"]),
+        "max_concurrency": max_concurrency,
+        "total_wall_time_ms": round(wall_time_s * 1000, 2),
+        # What the same calls would have cost one after another
+        "sum_llm_latency_ms": round(sum(latencies), 2),
+        "max_llm_latency_ms": max(latencies, default=0),
+    }
+
+
+async def iter_scores_as_completed(items: Sequence[Any],
+                                   score_fn: Callable[[Any], Awaitable[Dict]],
+                                   max_concurrency: int = LLM_MAX_CONCURRENCY,
+                                   timeout: float = LLM_CALL_TIMEOUT) -> AsyncIterator[Dict[str, Any]]:
+    # Same outcomes as score_concurrently, yielded in completion order
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    tasks = [asyncio.create_task(_score_one(i, item, score_fn, semaphore, timeout)) for i, item in enumerate(items)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # The consumer went away (e.g. the client disconnected): stop paying for calls nobody will read
+        for task in tasks:
+            task.cancel()
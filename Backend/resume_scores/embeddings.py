@@ -0,0 +1,185 @@
+from langchain_core.embeddings import Embeddings
+from typing import List, Optional
+import hashlib
+import logging
+import math
+import os
+import platform
+import re
+import threading
+
+# One model per process, loaded on first use (or by startup's warmup). The API
+# encodes uploads with it on the embedding thread (executors.run_embed) rather
+# than in the CPU process pool, so the model is held once, not per worker.
+
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL", "intfloat/e5-base-v2")
+# auto | torch | onnx | fake (hashed bag of words, no model download; for offline runs and load tests)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "auto")
+# auto | cpu | cuda | mps
+EMBEDDING_DEVICE = os.getenv("EMBEDDING_DEVICE", "auto")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+# 0 keeps the runtime default (one thread per core)
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+# auto | avx2 | avx512 | avx512_vnni | arm64 | none (fp32 ONNX)
+EMBEDDING_QUANTIZATION = os.getenv("EMBEDDING_QUANTIZATION", "auto")
+EMBEDDING_ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR", "models/onnx")
+EMBEDDING_FAKE_DIM = int(os.getenv("EMBEDDING_FAKE_DIM", "384"))
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def select_device() -> str:
+    if EMBEDDING_DEVICE != "auto":
+        return EMBEDDING_DEVICE
+    try:
+        import torch
+    except ImportError:
+        return "cpu"
+    if torch.cuda.is_available():
+        return "cuda"
+    if getattr(torch.backends, "mps", None) and torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+def _onnx_available() -> bool:
+    try:
+        import onnxruntime  # noqa: F401
+        import optimum.onnxruntime  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def select_backend(device: str) -> str:
+    if EMBEDDING_BACKEND != "auto":
+        return EMBEDDING_BACKEND
+    # On GPU the fp32 torch model is already fast; the quantized ONNX path only pays off on CPU
+    if device == "cpu" and _onnx_available():
+        return "onnx"
+    return "torch"
+
+
+def _default_quantization() -> str:
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return "arm64"
+    return "avx512_vnni"
+
+
+class OnnxE5Embeddings(Embeddings):
+    # int8 dynamically quantized ONNX export of the e5 model, run with onnxruntime on CPU.
+    # The export is done once and cached under EMBEDDING_ONNX_DIR.
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, batch_size: int = EMBEDDING_BATCH_SIZE,
+                 threads: int = EMBEDDING_THREADS, quantization: Optional[str] = None):
+        from sentence_transformers import SentenceTransformer
+        import onnxruntime
+
+        quantization = quantization or EMBEDDING_QUANTIZATION
+        if quantization == "auto":
+            quantization = _default_quantization()
+
+        model_dir, file_name = self._ensure_export(model_name, quantization)
+
+        session_options = onnxruntime.SessionOptions()
+        if threads:
+            session_options.intra_op_num_threads = threads
+            session_options.inter_op_num_threads = 1
+
+        self.batch_size = batch_size
+        self.quantization = quantization
+        self.model = SentenceTransformer(
+            model_dir,
+            backend="onnx",
+            device="cpu",
+            model_kwargs={
+                "file_name": file_name,
+                "provider": "CPUExecutionProvider",
+                "session_options": session_options
+            }
+        )
+
+    @staticmethod
+    def _ensure_export(model_name: str, quantization: str):
+        from sentence_transformers import SentenceTransformer
+        from sentence_transformers.backend import export_dynamic_quantized_onnx_model
+
+        model_dir = os.path.join(EMBEDDING_ONNX_DIR, model_name.replace("/", "__"))
+        fp32_file = "onnx/model.onnx"
+        file_name = fp32_file if quantization == "none" else f"onnx/model_qint8_{quantization}.onnx"
+        if os.path.exists(os.path.join(model_dir, file_name)):
+            return model_dir, file_name
+
+        logging.info(f"Exporting {model_name} to ONNX ({quantization}) under {model_dir}")
+        if not os.path.exists(os.path.join(model_dir, fp32_file)):
+            SentenceTransformer(model_name, backend="onnx", device="cpu").save(model_dir)
+        if quantization != "none":
+            fp32_model = SentenceTransformer(model_dir, backend="onnx", device="cpu",
+                                             model_kwargs={"file_name": fp32_file})
+            export_dynamic_quantized_onnx_model(fp32_model, quantization, model_dir)
+        return model_dir, file_name
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.model.encode(texts, batch_size=self.batch_size, normalize_embeddings=True,
+                                 convert_to_numpy=True).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class HashingEmbeddings(Embeddings):
+    # Deterministic stand-in for the e5 model: each word is hashed into one of
+    # `dim` buckets and the counts are L2-normalized, so texts sharing words
+    # still come out similar and retrieval has something to rank
+    def __init__(self, dim: int = EMBEDDING_FAKE_DIM):
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for word in re.findall(r"[a-z0-9+#]+", text.lower()):
+            bucket = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "little")
+            vector[bucket % self.dim] += 1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def build_embedding_model(backend: Optional[str] = None, device: Optional[str] = None) -> Embeddings:
+    device = device or select_device()
+    backend = backend or select_backend(device)
+
+    if backend == "fake":
+        model = HashingEmbeddings()
+    elif backend == "onnx":
+        model = OnnxE5Embeddings()
+    elif backend == "torch":
+        from langchain_huggingface import HuggingFaceEmbeddings
+        if device == "cpu" and EMBEDDING_THREADS:
+            import torch
+            torch.set_num_threads(EMBEDDING_THREADS)
+        model = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME,
+                                      model_kwargs={'device': device},
+                                      encode_kwargs={'normalize_embeddings': True,
+                                                     'batch_size': EMBEDDING_BATCH_SIZE})
+    else:
+        raise ValueError(f"Unknown embedding backend: {backend}")
+
+    logging.info(f"Embedding backend: {backend} on {device} ({EMBEDDING_MODEL_NAME})")
+    return model
+
+
+def get_embedding_model() -> Embeddings:
+    global _model
+    with _model_lock:
+        if _model is None:
+            _model = build_embedding_model()
+        return _model
+
+
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    return get_embedding_model().embed_documents(texts)
@@ -0,0 +1,215 @@
+from sqlalchemy import func
+from sqlalchemy.orm import Session, load_only
+from database import SessionLocal
+from models import Resume
+from resume_scores.chroma_db import get_vector_store
+from resume_scores.skill_index import SKILL_PREFILTER_MAX_IDS
+from typing import Dict, List, Optional
+import logging
+import os
+import re
+import threading
+import time
+import numpy as np
+
+## Hybrid BM25 + dense candidate retrieval ##
+# BM25 over each resume's skills/projects text is fused with Chroma similarity,
+# then an adaptive cutoff keeps only the candidates above the biggest score gap,
+# so fewer (and better) resumes reach the LLM scoring stage.
+#
+# The BM25 index is built once synchronously; after that, when uploads or
+# deletes change the resume table, requests keep ranking against the current
+# index while one background thread rebuilds it, at most once every
+# HYBRID_BM25_REBUILD_SECONDS, and swaps the new one in. Changes are noticed
+# through a (count, max id) signature, which also sees other processes' writes,
+# and invalidate_bm25_index(), which the ingest, delete and bulk-ingest paths
+# call next to their Chroma writes so edits and id reuse are caught too.
+
+HYBRID_DENSE_K = int(os.getenv("HYBRID_DENSE_K", "100"))
+HYBRID_BM25_K = int(os.getenv("HYBRID_BM25_K", "100"))
+HYBRID_DENSE_WEIGHT = float(os.getenv("HYBRID_DENSE_WEIGHT", "0.6"))
+HYBRID_MIN_CANDIDATES = int(os.getenv("HYBRID_MIN_CANDIDATES", "5"))
+HYBRID_MAX_CANDIDATES = int(os.getenv("HYBRID_MAX_CANDIDATES", "40"))
+# Cut at the largest drop between neighbouring fused scores if it is at least this big
+HYBRID_MIN_GAP = float(os.getenv("HYBRID_MIN_GAP", "0.08"))
+# Never keep candidates scoring below this fraction of the best one
+HYBRID_MIN_RELATIVE_SCORE = float(os.getenv("HYBRID_MIN_RELATIVE_SCORE", "0.5"))
+# Minimum time between BM25 rebuilds; changes within it are picked up by the next one
+HYBRID_BM25_REBUILD_SECONDS = float(os.getenv("HYBRID_BM25_REBUILD_SECONDS", "30"))
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+_index_lock = threading.Lock()
+# Held for the whole of a build, so the first requests don't each build their own index
+_build_lock = threading.RLock()
+_index = None
+_index_signature = None
+_index_version = 0
+_index_built_at = 0.0
+_rebuild_scheduled = False
+
+
+def tokenize(text: str) -> List[str]:
+    return [t.rstrip(".") for t in TOKEN_PATTERN.findall((text or "").lower())]
+
+
+def skills_projects_text(resume: Resume) -> str:
+    parts = [", ".join(resume.skills or [])]
+    for proj in resume.projects or []:
+        if isinstance(proj, dict):
+            parts.append(proj.get("project_name", "") or "")
+            parts.append(proj.get("description", "") or "")
+            parts.append(", ".join(proj.get("tech_stack", []) or []))
+    return "\n".join(parts)
+
+
+class BM25Index:
+    def __init__(self, resume_ids: List[int], corpus: List[List[str]]):
+        from rank_bm25 import BM25Okapi
+        self.resume_ids = np.asarray(resume_ids)
+        # BM25Okapi divides by the corpus size, so an empty corpus gets a placeholder document
+        self.bm25 = BM25Okapi(corpus or [[""]])
+
+    def top(self, query: str, k: int, allowed_ids: Optional[set] = None) -> Dict[int, float]:
+        if not len(self.resume_ids):
+            return {}
+        scores = self.bm25.get_scores(tokenize(query))
+        if allowed_ids is not None:
+            scores = np.where(np.isin(self.resume_ids, list(allowed_ids)), scores, 0.0)
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        return {int(self.resume_ids[i]): float(scores[i]) for i in best if scores[i] > 0}
+
+
+def invalidate_bm25_index():
+    # Marks this process's index stale; the next ranking request schedules a rebuild
+    global _index_version
+    with _index_lock:
+        _index_version += 1
+
+
+def _signature(db: Session):
+    # Count and max id catch changes made by other workers or processes as well
+    count, max_id = db.query(func.count(Resume.id), func.max(Resume.id)).one()
+    with _index_lock:
+        return count, max_id, _index_version
+
+
+def _build(db: Session):
+    global _index, _index_signature, _index_built_at
+    with _build_lock:
+        # Read before the rows, so anything written during the build still looks stale afterwards
+        signature = _signature(db)
+        started = time.perf_counter()
+        rows = db.query(Resume).options(load_only(Resume.id, Resume.skills, Resume.projects)).all()
+        index = BM25Index([r.id for r in rows], [tokenize(skills_projects_text(r)) for r in rows])
+        with _index_lock:
+            _index, _index_signature, _index_built_at = index, signature, time.monotonic()
+        logging.info(f"Built BM25 index over {len(rows)} resumes in {time.perf_counter() - started:.2f}s")
+        return index
+
+
+def _rebuild_in_background():
+    global _rebuild_scheduled
+    try:
+        with _index_lock:
+            delay = _index_built_at + HYBRID_BM25_REBUILD_SECONDS - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        with SessionLocal() as db:
+            _build(db)
+    except Exception:
+        logging.exception("Rebuilding the BM25 index failed; serving the previous one")
+    finally:
+        with _index_lock:
+            _rebuild_scheduled = False
+
+
+def get_bm25_index(db: Session) -> BM25Index:
+    global _rebuild_scheduled
+    signature = _signature(db)
+    with _index_lock:
+        index = _index
+        if index is not None:
+            if signature != _index_signature and not _rebuild_scheduled:
+                _rebuild_scheduled = True
+                threading.Thread(target=_rebuild_in_background, name="bm25-rebuild", daemon=True).start()
+            return index
+
+    with _build_lock:
+        # Another request may have finished the first build while this one waited
+        if _index is not None:
+            return _index
+        return _build(db)
+
+
+def dense_scores(job_description: str, k: int, allowed_ids: Optional[set] = None) -> Dict[int, float]:
+    search_filter = None
+    if allowed_ids is not None and len(allowed_ids) <= SKILL_PREFILTER_MAX_IDS:
+        # Small enough to hand to Chroma, so the k nearest come only from the allowed set
+        search_filter = {"resume_id": {"$in": sorted(allowed_ids)}}
+    results = get_vector_store().similarity_search_with_score(job_description, k=k, filter=search_filter)
+    if allowed_ids is not None and search_filter is None:
+        results = [(doc, distance) for doc, distance in results if doc.metadata["resume_id"] in allowed_ids]
+    # Embeddings are normalized, so Chroma's squared L2 distance d maps to cosine as 1 - d/2
+    return {doc.metadata["resume_id"]: 1.0 - float(distance) / 2.0 for doc, distance in results}
+
+
+def _min_max(scores: Dict[int, float], ids: List[int]) -> np.ndarray:
+    values = np.asarray([scores.get(i, 0.0) for i in ids], dtype=np.float64)
+    if not scores:
+        return np.zeros_like(values)
+    low, high = min(scores.values()), max(scores.values())
+    if high - low < 1e-12:
+        return np.where(values > 0, 1.0, 0.0)
+    # Candidates missing from one list get that list's floor
+    return np.clip((values - low) / (high - low), 0.0, 1.0) * np.asarray([i in scores for i in ids])
+
+
+def adaptive_cutoff(scores: np.ndarray, min_candidates: int, max_candidates: int,
+                    min_gap: float, min_relative: float) -> int:
+    # scores must be sorted descending; returns how many to keep
+    n = min(len(scores), max_candidates)
+    if n <= min_candidates:
+        return n
+
+    keep = n
+    if scores[0] > 0:
+        above = int(np.sum(scores[:n] >= scores[0] * min_relative))
+        keep = max(min_candidates, above)
+
+    gaps = scores[min_candidates - 1:keep - 1] - scores[min_candidates:keep]
+    if len(gaps) and gaps.max() >= min_gap:
+        keep = min_candidates + int(np.argmax(gaps))
+    return keep
+
+
+def hybrid_retrieve(job_description: str, db: Session,
+                    dense_k: int = HYBRID_DENSE_K, bm25_k: int = HYBRID_BM25_K,
+                    dense_weight: float = HYBRID_DENSE_WEIGHT,
+                    min_candidates: int = HYBRID_MIN_CANDIDATES,
+                    max_candidates: int = HYBRID_MAX_CANDIDATES,
+                    min_gap: float = HYBRID_MIN_GAP,
+                    min_relative: float = HYBRID_MIN_RELATIVE_SCORE,
+                    allowed_ids: Optional[set] = None) -> List[Dict]:
+    dense = dense_scores(job_description, dense_k, allowed_ids)
+    lexical = get_bm25_index(db).top(job_description, bm25_k, allowed_ids)
+
+    ids = list(dict.fromkeys(list(dense) + list(lexical)))
+    if not ids:
+        return []
+
+    fused = dense_weight * _min_max(dense, ids) + (1.0 - dense_weight) * _min_max(lexical, ids)
+    order = np.argsort(-fused, kind="stable")
+    fused_sorted = fused[order]
+    keep = adaptive_cutoff(fused_sorted, min_candidates, max_candidates, min_gap, min_relative)
+
+    return [
+        {
+            "resume_id": ids[i],
+            "score": round(float(fused[i]), 4),
+            "dense_score": round(dense[ids[i]], 4) if ids[i] in dense else None,
+            "bm25_score": round(lexical[ids[i]], 4) if ids[i] in lexical else None,
+        }
+        for i in order[:keep]
+    ]
@@ -0,0 +1,166 @@
+from sqlalchemy.orm import Session
+from models import Resume
+from resume_scores.skill_index import skill_entries_for
+from resume_scores.chroma_db import copy_embedding, store_embeddings, store_embeddings_async
+from resume_scores.hybrid_retriever import invalidate_bm25_index
+from llm_models import extraction_cache
+from llm_models.document_parser import parse_resume_text, parse_resume_text_async
+from llm_models.extractor import extract_fields_from_text
+from llm_models.text_normalizer import prepare_resume_text
+from executors import run_cpu, run_io
+from uploads import SpooledUpload
+from observability import stage
+from typing import Any, Dict, Optional, Tuple
+import logging
+import threading
+
+
+def _new_resume(user_id: int, filename: str, extracted_data: Dict[str, Any],
+                file_hash: Optional[str] = None) -> Resume:
+    # Just simulate a file path reference (not actually stored)
+    return Resume(
+        user_id=user_id,
+        file_path=filename,
+        content_hash=file_hash,
+        extracted_text=extracted_data.get("name", ""),
+        skills=extracted_data.get("skills", []),
+        experience=extracted_data.get("experience", []),
+        projects=extracted_data.get("projects", []),
+        education=extracted_data.get("education", []),
+        skill_entries=skill_entries_for(extracted_data.get("skills", []))
+    )
+
+
+def _extracted_from(resume: Resume) -> Dict[str, Any]:
+    return {
+        "name": resume.extracted_text,
+        "skills": resume.skills,
+        "experience": resume.experience,
+        "projects": resume.projects,
+        "education": resume.education
+    }
+
+
+## Token accounting ##
+# Every upload that reaches the extraction prompt logs how many tokens the
+# parsed text had before and after normalization/truncation; totals are kept
+# for /admin/ingest-stats.
+
+_token_lock = threading.Lock()
+_token_totals = {"uploads": 0, "raw_tokens": 0, "normalized_tokens": 0, "final_tokens": 0, "truncated": 0}
+
+
+def _record_tokens(filename: str, token_stats: Dict[str, Any]):
+    logging.info(f"Resume text for {filename}: {token_stats['raw_tokens']} raw tokens -> "
+                 f"{token_stats['normalized_tokens']} normalized -> {token_stats['final_tokens']} sent"
+                 + (f" (dropped {token_stats['dropped_sections']}, trimmed {token_stats['trimmed_sections']})"
+                    if token_stats["truncated"] else ""))
+    with _token_lock:
+        _token_totals["uploads"] += 1
+        _token_totals["truncated"] += int(token_stats["truncated"])
+        for key in ("raw_tokens", "normalized_tokens", "final_tokens"):
+            _token_totals[key] += token_stats[key]
+
+
+def token_stats() -> Dict[str, Any]:
+    with _token_lock:
+        totals = dict(_token_totals)
+    uploads = totals["uploads"]
+    totals["avg_final_tokens"] = round(totals["final_tokens"] / uploads, 1) if uploads else 0.0
+    totals["tokens_saved"] = totals["raw_tokens"] - totals["final_tokens"]
+    return totals
+
+
+def _insert(db: Session, resume: Resume) -> Resume:
+    with stage("extract.db_insert"):
+        db.add(resume)
+        db.commit()
+        db.refresh(resume)
+    invalidate_bm25_index()
+    return resume
+
+
+## Content-addressed uploads ##
+# An upload whose bytes hash to an existing resume reuses that resume's
+# extraction and embedding: for the same user the existing row is returned,
+# for another user the fields and vector are copied to a new row. Otherwise the
+# on-disk extraction cache can still skip parsing and the LLM call.
+
+def _find_by_hash(db: Session, user_id: int, file_hash: str) -> Tuple[Optional[Resume], Optional[Resume]]:
+    own = db.query(Resume).filter(Resume.content_hash == file_hash, Resume.user_id == user_id).first()
+    if own:
+        return own, None
+    return None, db.query(Resume).filter(Resume.content_hash == file_hash).first()
+
+
+def ingest_upload(db: Session, user_id: int,
+                  upload: SpooledUpload) -> Tuple[Resume, bool, Optional[Dict[str, Any]]]:
+    # Returns (resume, reused, token_stats) where reused means the LLM extraction
+    # was skipped and token_stats is set when the text went to the LLM
+    filename, file_hash = upload.filename, upload.sha256
+    own, other = _find_by_hash(db, user_id, file_hash)
+    if own:
+        return own, True, None
+
+    if other:
+        resume = _insert(db, _new_resume(user_id, filename, _extracted_from(other), file_hash))
+        if not copy_embedding(other.id, resume):
+            store_embeddings(resume)
+        logging.info(f"Upload matched resume {other.id} by content hash; reused extraction")
+        return resume, True, None
+
+    extracted = extraction_cache.get_extraction(file_hash)
+    reused, tokens = extracted is not None, None
+    if extracted is None:
+        content = extraction_cache.get_text(file_hash)
+        if content is None:
+            with stage("extract.parse"), upload.view() as data:
+                content, tokens = parse_resume_text(filename, data)
+            extraction_cache.put_text(file_hash, content)
+        else:
+            # Cached text is already normalized unless it predates normalization; redoing it is cheap
+            with stage("extract.normalize"):
+                content, tokens = prepare_resume_text([content])
+        _record_tokens(filename, tokens)
+        extracted = extract_fields_from_text(content)
+        extraction_cache.put_extraction(file_hash, extracted)
+
+    resume = _insert(db, _new_resume(user_id, filename, extracted, file_hash))
+    store_embeddings(resume)
+    return resume, reused, tokens
+
+
+async def ingest_upload_async(db: Session, user_id: int,
+                              upload: SpooledUpload) -> Tuple[Resume, bool, Optional[Dict[str, Any]]]:
+    filename, file_hash = upload.filename, upload.sha256
+    own, other = await run_io(_find_by_hash, db, user_id, file_hash)
+    if own:
+        return own, True, None
+
+    if other:
+        resume = await run_io(_insert, db, _new_resume(user_id, filename, _extracted_from(other), file_hash))
+        if not await run_io(copy_embedding, other.id, resume):
+            await store_embeddings_async(resume)
+        logging.info(f"Upload matched resume {other.id} by content hash; reused extraction")
+        return resume, True, None
+
+    extracted = await run_io(extraction_cache.get_extraction, file_hash)
+    reused, tokens = extracted is not None, None
+    if extracted is None:
+        content = await run_io(extraction_cache.get_text, file_hash)
+        if content is None:
+            # Spilled uploads are mapped by the parser worker from their path instead of pickled
+            with stage("extract.parse"):
+                content, tokens = await parse_resume_text_async(
+                    filename, data=upload.getvalue() if upload.in_memory else None, path=upload.path)
+            await run_io(extraction_cache.put_text, file_hash, content)
+        else:
+            with stage("extract.normalize"):
+                content, tokens = await run_cpu(prepare_resume_text, [content])
+        _record_tokens(filename, tokens)
+        extracted = await run_io(extract_fields_from_text, content)
+        await run_io(extraction_cache.put_extraction, file_hash, extracted)
+
+    resume = await run_io(_insert, db, _new_resume(user_id, filename, extracted, file_hash))
+    await store_embeddings_async(resume)
+    return resume, reused, tokens
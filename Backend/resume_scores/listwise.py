@@ -0,0 +1,211 @@
+from langchain_core.prompts import PromptTemplate
+from langchain_core.output_parsers import SimpleJsonOutputParser
+from functools import lru_cache
+from llm_models.client import LLM_MODEL_NAME, get_llm
+from llm_models.text_normalizer import estimate_tokens
+from resume_scores.concurrent_scoring import iter_scores_as_completed, score_concurrently
+from resume_scores.score_cache import prompt_version
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+import os
+
+## Listwise ranking ##
+# Instead of one call per resume (each repeating the job description), pack as
+# many resume documents as fit in LISTWISE_TOKEN_BUDGET into one prompt with a
+# single copy of the job description and ask for a score per resume id. The
+# batch answers are split back into the same per-resume outcomes the pairwise
+# path produces, so callers don't care which mode ran.
+
+LISTWISE_TOKEN_BUDGET = int(os.getenv("LISTWISE_TOKEN_BUDGET", "6000"))
+LISTWISE_MAX_PER_CALL = int(os.getenv("LISTWISE_MAX_PER_CALL", "10"))
+# Output tokens reserved per resume in the answer (score + one-line summary)
+LISTWISE_OUTPUT_TOKENS_PER_RESUME = int(os.getenv("LISTWISE_OUTPUT_TOKENS_PER_RESUME", "80"))
+# Resumes re-scored pairwise to check listwise agreement; 0 disables the check. The
+# rank correlation needs at least 3 compared resumes, so smaller samples only report score diffs
+LISTWISE_CONSISTENCY_SAMPLE = int(os.getenv("LISTWISE_CONSISTENCY_SAMPLE", "3"))
+
+listwise_prompt = PromptTemplate(
+    template="""
+Compare the following job description against each of the resumes below.
+
+Job Description:
+{job_description}
+
+Resumes:
+{resumes}
+
+Tasks:
+1. Review every resume independently in context of the job description.
+2. Score each one based on:
+    a. Projects (50 pts) — uniqueness and technical difficulty.
+    b. Experience (30 pts) — relevance and depth.
+    c. CGPA (20 pts) — only consider if resumes are similarly strong.
+3. If a resume lacks skills or experience the job description needs, say **No Resume Found** in its summary.
+
+Return only a valid, strict JSON object with one entry per resume, keyed by resume_id:
+{{
+    "results": [
+        {{"resume_id": 12, "match_score": 85, "summary": "Strong technical projects aligned with the role."}}
+    ]
+}}
+DO NOT include any commentary, explanation, or markdown. Include every resume_id exactly once.
+""",
+    input_variables=["job_description", "resumes"]
+)
+
+LISTWISE_PROMPT_VERSION = prompt_version("recruiter-listwise", listwise_prompt.template, LLM_MODEL_NAME)
+
+def format_resume_block(resume_id: int, text: str) -> str:
+    return f"[resume_id: {resume_id}]\n{text}\n[end resume_id: {resume_id}]"
+
+
+@lru_cache(maxsize=1)
+def get_listwise_chain():
+    return listwise_prompt | get_llm("listwise") | SimpleJsonOutputParser()
+
+
+def _base_tokens(job_description: str) -> int:
+    return estimate_tokens(listwise_prompt.template) + estimate_tokens(job_description)
+
+
+def pack_batches(job_description: str, candidates: Sequence[Tuple[Any, Any]],
+                 token_budget: int = LISTWISE_TOKEN_BUDGET,
+                 max_per_call: int = LISTWISE_MAX_PER_CALL) -> List[List[Tuple[Any, Any]]]:
+    # Greedy, in candidate order; a resume too big for any batch gets one to itself
+    base = _base_tokens(job_description)
+    batches, current, used = [], [], base
+    for resume, doc in candidates:
+        cost = estimate_tokens(format_resume_block(resume.id, doc.page_content)) + LISTWISE_OUTPUT_TOKENS_PER_RESUME
+        if current and (used + cost > token_budget or len(current) >= max_per_call):
+            batches.append(current)
+            current, used = [], base
+        current.append((resume, doc))
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _prompt_tokens(job_description: str, batch) -> int:
+    return _base_tokens(job_description) + sum(
+        estimate_tokens(format_resume_block(resume.id, doc.page_content)) for resume, doc in batch)
+
+
+def _split_results(response: Any) -> Dict[int, Dict]:
+    rows = response.get("results", []) if isinstance(response, dict) else response
+    results = {}
+    for row in rows if isinstance(rows, list) else []:
+        if not isinstance(row, dict):
+            continue
+        try:
+            resume_id = int(row.get("resume_id"))
+        except (TypeError, ValueError):
+            continue
+        results[resume_id] = row
+    return results
+
+
+def make_listwise_scorer(job_description: str) -> Callable[[List], Awaitable[Dict[int, Dict]]]:
+    async def score_batch(batch):
+        response = await get_listwise_chain().ainvoke({
+            "job_description": job_description,
+            "resumes": "\n\n".join(format_resume_block(resume.id, doc.page_content) for resume, doc in batch)
+        })
+        return _split_results(response)
+    return score_batch
+
+
+def _expand(batch_outcome: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # One batch outcome -> the per-resume outcomes score_concurrently would have produced
+    outcomes = []
+    results = batch_outcome["result"] or {}
+    for resume, doc in batch_outcome["item"]:
+        result, error = results.get(resume.id), batch_outcome["error"]
+        if result is not None:
+            # Same shape as a pairwise answer
+            result = {"match_score": result.get("match_score", 0), "summary": result.get("summary", ""),
+                      "file_path": resume.file_path}
+        elif not error:
+            error = "missing from listwise response"
+        outcomes.append({"index": None, "item": (resume, doc), "result": result, "error": error,
+                         "latency_ms": batch_outcome["latency_ms"]})
+    return outcomes
+
+
+def savings_report(job_description: str, candidates: Sequence, batches: List, pairwise_template: str) -> Dict:
+    pairwise_base = estimate_tokens(pairwise_template) + estimate_tokens(job_description)
+    pairwise_tokens = sum(pairwise_base + estimate_tokens(doc.page_content) for _, doc in candidates)
+    listwise_tokens = sum(_prompt_tokens(job_description, batch) for batch in batches)
+    return {
+        "mode": "listwise",
+        "llm_calls": len(batches),
+        "pairwise_llm_calls": len(candidates),
+        "llm_calls_saved": len(candidates) - len(batches),
+        "prompt_tokens": listwise_tokens,
+        "pairwise_prompt_tokens": pairwise_tokens,
+        "prompt_tokens_saved": pairwise_tokens - listwise_tokens,
+        "batch_sizes": [len(batch) for batch in batches],
+    }
+
+
+def add_consistency(report: Dict, consistency: Optional[Dict]) -> Dict:
+    # The check's pairwise calls are spent on top of the listwise ones, so they come off the savings
+    report["consistency"] = consistency
+    extra_calls = (consistency or {}).get("extra_llm_calls", 0)
+    report["llm_calls"] += extra_calls
+    report["llm_calls_saved"] -= extra_calls
+    return report
+
+
+async def score_listwise(job_description: str, candidates: Sequence, max_concurrency: int, timeout: float,
+                         token_budget: int = LISTWISE_TOKEN_BUDGET,
+                         max_per_call: int = LISTWISE_MAX_PER_CALL) -> Tuple[List[Dict], List[Dict], List]:
+    # Returns (per-resume outcomes in candidate order, per-call outcomes, batches)
+    batches = pack_batches(job_description, candidates, token_budget, max_per_call)
+    batch_outcomes = await score_concurrently(batches, make_listwise_scorer(job_description),
+                                              max_concurrency=max_concurrency, timeout=timeout)
+    outcomes = [o for batch_outcome in batch_outcomes for o in _expand(batch_outcome)]
+    return outcomes, batch_outcomes, batches
+
+
+async def iter_listwise(job_description: str, batches: List, max_concurrency: int,
+                        timeout: float) -> AsyncIterator[Tuple[Dict, List[Dict]]]:
+    # Yields (call outcome, its per-resume outcomes) as each batch finishes
+    async for batch_outcome in iter_scores_as_completed(batches, make_listwise_scorer(job_description),
+                                                        max_concurrency=max_concurrency, timeout=timeout):
+        yield batch_outcome, _expand(batch_outcome)
+
+
+def _ranks(values: List[float]) -> List[float]:
+    order = sorted(range(len(values)), key=lambda i: values[i])
+    ranks = [0.0] * len(values)
+    for rank, i in enumerate(order):
+        ranks[i] = float(rank)
+    return ranks
+
+
+async def consistency_check(outcomes: List[Dict], pairwise_scorer: Callable[[Any], Awaitable[Dict]],
+                            is_match: Callable[[Dict], bool], sample: int, max_concurrency: int,
+                            timeout: float) -> Dict[str, Any]:
+    # Re-scores the first `sample` listwise-scored resumes one at a time and compares
+    scored = [o for o in outcomes if not o["error"]][:sample]
+    if not scored:
+        return {"sampled": 0}
+
+    pairwise = await score_concurrently([o["item"] for o in scored], pairwise_scorer,
+                                        max_concurrency=max_concurrency, timeout=timeout)
+    pairs = [(o["result"], p["result"]) for o, p in zip(scored, pairwise)
+             if not p["error"] and isinstance(p["result"], dict)]
+    report = {"sampled": len(scored), "compared": len(pairs), "extra_llm_calls": len(scored)}
+    if not pairs:
+        return report
+
+    listwise_scores = [float(lw.get("match_score", 0) or 0) for lw, _ in pairs]
+    pairwise_scores = [float(pw.get("match_score", 0) or 0) for _, pw in pairs]
+    report["mean_abs_score_diff"] = round(
+        sum(abs(a - b) for a, b in zip(listwise_scores, pairwise_scores)) / len(pairs), 2)
+    report["match_agreement"] = round(sum(is_match(lw) == is_match(pw) for lw, pw in pairs) / len(pairs), 3)
+    if len(pairs) >= 3:
+        a, b = _ranks(listwise_scores), _ranks(pairwise_scores)
+        n = len(pairs)
+        report["spearman"] = round(1 - 6 * sum((x - y) ** 2 for x, y in zip(a, b)) / (n * (n * n - 1)), 3)
+    return report
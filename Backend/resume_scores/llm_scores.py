@@ -1,4 +1,3 @@
-from langchain_groq import ChatGroq
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import SimpleJsonOutputParser
 from models import Resume
@@ -6,17 +5,14 @@ from database import get_db
 from typing import Annotated
 from fastapi import Depends
 from sqlalchemy.orm import Session
+from llm_models.client import LLM_MODEL_NAME, get_llm
+from resume_scores.score_cache import get_or_create_job, lookup, prompt_version, store
+from observability import stage
 from dotenv import load_dotenv
-import os
 
 load_dotenv()
 
 db_dependency = Annotated[Session, Depends(get_db)]
-groq_api = os.getenv("GROQ_API_KEY")
-
-model = ChatGroq(api_key=groq_api,
-                 model="llama3-8b-8192",
-                 temperature=0.3)
 
 prompt = PromptTemplate(
     template="""
@@ -52,21 +48,38 @@ prompt = PromptTemplate(
 
 parser = SimpleJsonOutputParser()
 
+USER_SCORE_PROMPT_VERSION = prompt_version("user-score", prompt.template, LLM_MODEL_NAME)
+
 def llm_score_user(job_desc: str, db: db_dependency, resume_id: int):
-    resumes = db.query(Resume).filter(Resume.id == resume_id).all()
+    with stage("score.db_load"):
+        resumes = db.query(Resume).filter(Resume.id == resume_id).all()
     if not resumes:
         return {"error": "No resumes found"}
 
-    chain = prompt | model | parser
+    chain = prompt | get_llm("user_score") | parser
+    with stage("score.cache_lookup"):
+        job_id = get_or_create_job(job_desc)
 
     results = []
     for resume in resumes:
         if resume.extracted_text and resume.extracted_text.strip():
-            try:
-                result = chain.invoke({
-                    "job_description": job_desc,
-                    "resume_text": resume.extracted_text
+            with stage("score.cache_lookup"):
+                cached = lookup(job_id, resume, USER_SCORE_PROMPT_VERSION)
+            if cached is not None:
+                results.append({
+                    "resume_id": resume.id,
+                    "file_path": resume.file_path,
+                    **cached
                 })
+                continue
+            try:
+                with stage("score.llm"):
+                    result = chain.invoke({
+                        "job_description": job_desc,
+                        "resume_text": resume.extracted_text
+                    })
+                with stage("score.cache_store"):
+                    store(job_id, resume, USER_SCORE_PROMPT_VERSION, result)
                 results.append({
                     "resume_id": resume.id,
                     "file_path": resume.file_path,
@@ -0,0 +1,140 @@
+from models import Resume
+from llm_models.skill_vocabulary import canonical_skill
+from resume_scores.hybrid_retriever import tokenize
+from typing import Dict, List, Optional, Sequence, Set
+import os
+import numpy as np
+
+## Local pre-scorer cascade ##
+# Cheap first stage in front of the LLM. Each candidate is scored from its
+# Resume.skills overlap with the skills the job description mentions, keyword
+# hits in its project names/descriptions/tech_stack, and the embedding
+# similarity from retrieval. Candidates lacking every mentioned skill are
+# dropped, and only the best ones that fit the LLM call budget move on.
+
+PRESCORE_LLM_BUDGET = int(os.getenv("PRESCORE_LLM_BUDGET", "15"))
+# Fraction of the job description's recognised skills a resume must have to stay in
+PRESCORE_MIN_SKILL_COVERAGE = float(os.getenv("PRESCORE_MIN_SKILL_COVERAGE", "0.1"))
+PRESCORE_SKILL_WEIGHT = float(os.getenv("PRESCORE_SKILL_WEIGHT", "0.5"))
+PRESCORE_KEYWORD_WEIGHT = float(os.getenv("PRESCORE_KEYWORD_WEIGHT", "0.2"))
+PRESCORE_EMBEDDING_WEIGHT = float(os.getenv("PRESCORE_EMBEDDING_WEIGHT", "0.3"))
+
+# Longest skill name (in tokens) looked up in the job description, e.g. "google cloud platform"
+MAX_SKILL_TOKENS = 4
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it of on or our the their this to we will with you your
+who what which able must should can etc experience years year work working role team strong good
+""".split())
+
+
+def normalize_skill(skill: str) -> str:
+    # Same aliases as the skill index ("k8s" -> "kubernetes"), applied to the tokenized
+    # form so resume skills and job description n-grams are folded alike
+    return canonical_skill(" ".join(tokenize(skill)))
+
+
+def _ngrams(tokens: List[str], max_n: int) -> Set[str]:
+    grams = set()
+    for n in range(1, max_n + 1):
+        for i in range(len(tokens) - n + 1):
+            grams.add(" ".join(tokens[i:i + n]))
+    return grams
+
+
+def _project_tokens(resume: Resume) -> Set[str]:
+    tokens = set()
+    for proj in resume.projects or []:
+        if isinstance(proj, dict):
+            tokens.update(tokenize(proj.get("project_name", "") or ""))
+            tokens.update(tokenize(proj.get("description", "") or ""))
+            for tech in proj.get("tech_stack", []) or []:
+                tokens.update(tokenize(str(tech)))
+    return tokens
+
+
+def _min_max(values: np.ndarray) -> np.ndarray:
+    if not len(values):
+        return values
+    low, high = values.min(), values.max()
+    if high - low < 1e-12:
+        return np.where(values > 0, 1.0, 0.0)
+    return (values - low) / (high - low)
+
+
+def prescore(job_description: str, resumes: Sequence[Resume],
+             similarity: Optional[Dict[int, float]] = None) -> Dict[str, np.ndarray]:
+    jd_tokens = tokenize(job_description)
+    jd_grams = {normalize_skill(gram) for gram in _ngrams(jd_tokens, MAX_SKILL_TOKENS)}
+
+    # Skill vocabulary is every skill listed on the candidate resumes; the job
+    # description "requires" the ones it mentions
+    resume_skills = [{normalize_skill(str(s)) for s in r.skills or []} - {""} for r in resumes]
+    vocab = sorted(set().union(*resume_skills)) if resume_skills else []
+    column = {skill: j for j, skill in enumerate(vocab)}
+    has_skill = np.zeros((len(resumes), len(vocab)), dtype=bool)
+    for i, skills in enumerate(resume_skills):
+        has_skill[i, [column[s] for s in skills]] = True
+    required = np.fromiter((s in jd_grams for s in vocab), dtype=bool, count=len(vocab))
+
+    n_required = int(required.sum())
+    if n_required:
+        skill_coverage = (has_skill & required).sum(axis=1) / n_required
+    else:
+        skill_coverage = np.zeros(len(resumes))
+
+    keywords = sorted({t for t in jd_tokens if len(t) > 1 and t not in STOPWORDS})
+    if keywords:
+        has_keyword = np.array([[k in tokens for k in keywords] for tokens in map(_project_tokens, resumes)],
+                               dtype=bool).reshape(len(resumes), len(keywords))
+        keyword_score = has_keyword.sum(axis=1) / len(keywords)
+    else:
+        keyword_score = np.zeros(len(resumes))
+
+    similarity = similarity or {}
+    embedding_score = np.array([similarity.get(r.id, 0.0) or 0.0 for r in resumes], dtype=np.float64)
+
+    score = (PRESCORE_SKILL_WEIGHT * skill_coverage
+             + PRESCORE_KEYWORD_WEIGHT * _min_max(keyword_score)
+             + PRESCORE_EMBEDDING_WEIGHT * _min_max(embedding_score))
+    return {
+        "score": score,
+        "skill_coverage": skill_coverage,
+        "keyword_score": keyword_score,
+        "embedding_score": embedding_score,
+        "required_skills": n_required,
+    }
+
+
+def cascade(job_description: str, resumes: Sequence[Resume], similarity: Optional[Dict[int, float]] = None,
+            llm_budget: int = PRESCORE_LLM_BUDGET, min_skill_coverage: float = PRESCORE_MIN_SKILL_COVERAGE,
+            free_ids: Optional[Set[int]] = None) -> Dict:
+    # free_ids are candidates that do not cost an LLM call (already cached); they
+    # still have to pass the skill filter but never count against the budget
+    free_ids = free_ids or set()
+    scores = prescore(job_description, resumes, similarity)
+
+    keep = np.ones(len(resumes), dtype=bool)
+    if scores["required_skills"]:
+        keep = scores["skill_coverage"] >= min_skill_coverage
+    order = [i for i in np.argsort(-scores["score"], kind="stable") if keep[i]]
+
+    selected, over_budget, llm_calls = [], 0, 0
+    for i in order:
+        if resumes[i].id in free_ids:
+            selected.append(i)
+        elif llm_calls < llm_budget:
+            selected.append(i)
+            llm_calls += 1
+        else:
+            over_budget += 1
+
+    return {
+        "resume_ids": [resumes[i].id for i in selected],
+        "prescores": {resumes[i].id: round(float(scores["score"][i]), 4) for i in selected},
+        "stages": {
+            "skill_filter": int(len(resumes) - keep.sum()),
+            "llm_budget": over_budget,
+        },
+        "required_skills": scores["required_skills"],
+    }
@@ -0,0 +1,166 @@
+from sqlalchemy.exc import IntegrityError
+from database import SessionLocal
+from models import JobDescription, JobMatchResult, Resume
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple
+import hashlib
+import json
+import logging
+import re
+import threading
+
+## Persistent (job description, resume, prompt version) -> LLM score cache ##
+# Rows live in match_results. A row is only served when its resume_hash and
+# prompt_version still match, so edited resumes and changed prompts/models miss.
+# Reads and writes use their own session so committing here never expires the
+# Resume objects the calling request is still serializing.
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0}
+
+
+def _bump(key: str, amount: int = 1):
+    with _stats_lock:
+        _stats[key] += amount
+
+
+def cache_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return stats
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def normalize_job_description(job_description: str) -> str:
+    return re.sub(r"\s+", " ", job_description or "").strip().lower()
+
+
+def job_description_hash(job_description: str) -> str:
+    return hash_text(normalize_job_description(job_description))
+
+
+def resume_content_hash(resume: Resume) -> str:
+    content = {
+        "extracted_text": resume.extracted_text,
+        "skills": resume.skills,
+        "experience": resume.experience,
+        "projects": resume.projects,
+        "education": resume.education,
+    }
+    return hash_text(json.dumps(content, sort_keys=True, default=str))
+
+
+def prompt_version(name: str, template: str, model_name: str) -> str:
+    return f"{name}:{hash_text(template)[:12]}:{model_name}"
+
+
+def get_or_create_job(job_description: str) -> int:
+    description_hash = job_description_hash(job_description)
+    with SessionLocal() as db:
+        job = db.query(JobDescription).filter(JobDescription.description_hash == description_hash).first()
+        if job:
+            return job.id
+
+        first_line = job_description.strip().splitlines()[0] if job_description.strip() else "Untitled job"
+        job = JobDescription(
+            job_title=first_line[:120],
+            description=job_description,
+            description_hash=description_hash
+        )
+        db.add(job)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another request stored the same description first
+            db.rollback()
+            return db.query(JobDescription).filter(JobDescription.description_hash == description_hash).one().id
+        return job.id
+
+
+def lookup_many(job_id: int, resumes: Iterable[Resume], version: str) -> Dict[int, Dict]:
+    hashes = {resume.id: resume_content_hash(resume) for resume in resumes}
+    if not hashes:
+        return {}
+
+    hits = {}
+    with SessionLocal() as db:
+        rows = db.query(JobMatchResult).filter(
+            JobMatchResult.job_id == job_id,
+            JobMatchResult.resume_id.in_(list(hashes)),
+            JobMatchResult.prompt_version == version
+        ).all()
+
+        stale = 0
+        for row in rows:
+            if row.resume_hash == hashes.get(row.resume_id) and row.result is not None:
+                hits[row.resume_id] = row.result
+            else:
+                db.delete(row)
+                stale += 1
+        if stale:
+            db.commit()
+            _bump("invalidations", stale)
+
+    _bump("hits", len(hits))
+    _bump("misses", len(hashes) - len(hits))
+    return hits
+
+
+def lookup(job_id: int, resume: Resume, version: str) -> Optional[Dict]:
+    return lookup_many(job_id, [resume], version).get(resume.id)
+
+
+def store_many(job_id: int, scored: Iterable[Tuple[Resume, Dict]], version: str):
+    stored = 0
+    with SessionLocal() as db:
+        for resume, result in scored:
+            try:
+                match_score = float(result.get("match_score", 0))
+            except (TypeError, ValueError):
+                continue
+
+            db.query(JobMatchResult).filter(
+                JobMatchResult.job_id == job_id,
+                JobMatchResult.resume_id == resume.id,
+                JobMatchResult.prompt_version == version
+            ).delete(synchronize_session=False)
+            db.add(JobMatchResult(
+                resume_id=resume.id,
+                job_id=job_id,
+                match_score=match_score,
+                missing_skills=json.dumps(result.get("missing_skills", [])),
+                resume_hash=resume_content_hash(resume),
+                prompt_version=version,
+                result=result,
+                created_at=datetime.now(timezone.utc)
+            ))
+            stored += 1
+        if stored:
+            try:
+                db.commit()
+            except IntegrityError:
+                # A resume was deleted while it was being scored; its scores have nothing to attach to
+                db.rollback()
+                logging.warning(f"Dropped {stored} cached scores for job {job_id}: a resume no longer exists")
+                return
+    if stored:
+        _bump("stores", stored)
+
+
+def store(job_id: int, resume: Resume, version: str, result: Dict):
+    store_many(job_id, [(resume, result)], version)
+
+
+def invalidate_resume(resume_id: int):
+    with SessionLocal() as db:
+        deleted = db.query(JobMatchResult).filter(
+            JobMatchResult.resume_id == resume_id
+        ).delete(synchronize_session=False)
+        db.commit()
+    if deleted:
+        _bump("invalidations", deleted)
@@ -0,0 +1,129 @@
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased, load_only
+from database import SessionLocal
+from llm_models.skill_vocabulary import canonical_skill
+from models import Resume, ResumeSkill
+from typing import Dict, Iterable, List, Optional
+import logging
+import os
+
+## Inverted skill index ##
+# Resume.skills is a free-form JSON list, so every skill is folded to a
+# canonical key (lowercase, collapsed whitespace, aliases resolved by
+# llm_models/skill_vocabulary.py) and stored as a (skill, resume_id) row.
+# Boolean skill queries then become index lookups and set operations in SQL
+# instead of scanning every resume in Python.
+
+# Largest skill-matched id set used as a vector search pre-filter; broader
+# queries fall back to over-fetching and filtering the results
+SKILL_PREFILTER_MAX_IDS = int(os.getenv("SKILL_PREFILTER_MAX_IDS", "5000"))
+
+
+def skill_keys(skills: Optional[Iterable]) -> List[str]:
+    keys = {canonical_skill(s) for s in skills or [] if isinstance(s, str)}
+    keys.discard("")
+    return sorted(keys)
+
+
+def skill_entries_for(skills: Optional[Iterable]) -> List[ResumeSkill]:
+    return [ResumeSkill(skill=key) for key in skill_keys(skills)]
+
+
+def _posting(skills: List[str]):
+    return select(ResumeSkill.resume_id).where(ResumeSkill.skill.in_(skills))
+
+
+def build_skill_query(all_of: Iterable[str] = (), any_of: Iterable[str] = (), none_of: Iterable[str] = ()):
+    # Driven off one posting list, with the other terms as IN / NOT IN semi-joins on
+    # the (skill, resume_id) key; SQLite can't nest INTERSECT/EXCEPT compounds
+    all_of, any_of, none_of = skill_keys(all_of), skill_keys(any_of), skill_keys(none_of)
+    if not all_of and not any_of:
+        return None
+
+    outer = aliased(ResumeSkill)
+    if all_of:
+        query = select(outer.resume_id).where(outer.skill == all_of[0])
+        for skill in all_of[1:]:
+            query = query.where(outer.resume_id.in_(_posting([skill])))
+        if any_of:
+            query = query.where(outer.resume_id.in_(_posting(any_of)))
+    else:
+        query = select(outer.resume_id).where(outer.skill.in_(any_of)).distinct()
+    if none_of:
+        query = query.where(outer.resume_id.not_in(_posting(none_of)))
+    return query
+
+
+def query_resume_ids(db: Session, all_of: Iterable[str] = (), any_of: Iterable[str] = (),
+                     none_of: Iterable[str] = (), limit: Optional[int] = None,
+                     after_id: Optional[int] = None) -> Optional[List[int]]:
+    # None means the query had no positive terms (it would match everyone)
+    query = build_skill_query(all_of, any_of, none_of)
+    if query is None:
+        return None
+
+    ids = query.subquery()
+    stmt = select(ids.c.resume_id)
+    if after_id is not None:
+        stmt = stmt.where(ids.c.resume_id > after_id)
+    stmt = stmt.order_by(ids.c.resume_id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return list(db.execute(stmt).scalars())
+
+
+def filter_resume_ids(db: Session, resume_ids: Iterable[int], all_of: Iterable[str] = (),
+                      any_of: Iterable[str] = (), none_of: Iterable[str] = ()) -> List[int]:
+    # Keeps the given ids that satisfy the query, preserving their order
+    resume_ids = list(resume_ids)
+    query = build_skill_query(all_of, any_of, none_of)
+    if query is None or not resume_ids:
+        return resume_ids
+    ids = query.subquery()
+    matched = set(db.execute(select(ids.c.resume_id).where(ids.c.resume_id.in_(resume_ids))).scalars())
+    return [i for i in resume_ids if i in matched]
+
+
+def skill_counts(db: Session, skills: Iterable[str]) -> Dict[str, int]:
+    keys = skill_keys(skills)
+    if not keys:
+        return {}
+    rows = db.execute(
+        select(ResumeSkill.skill, func.count()).where(ResumeSkill.skill.in_(keys)).group_by(ResumeSkill.skill)
+    ).all()
+    counts = dict.fromkeys(keys, 0)
+    counts.update(dict(rows))
+    return counts
+
+
+def rebuild_skill_index(page_size: int = 1000) -> int:
+    # Backfills resumes created before the index existed; safe to rerun
+    indexed, after_id = 0, 0
+    while True:
+        with SessionLocal() as db:
+            page = db.query(Resume).options(load_only(Resume.id, Resume.skills)) \
+                .filter(Resume.id > after_id).order_by(Resume.id).limit(page_size).all()
+            if not page:
+                break
+            page_ids = [r.id for r in page]
+            db.query(ResumeSkill).filter(ResumeSkill.resume_id.in_(page_ids)).delete(synchronize_session=False)
+            db.add_all(ResumeSkill(skill=key, resume_id=r.id) for r in page for key in skill_keys(r.skills))
+            try:
+                db.commit()
+            except IntegrityError:
+                # A resume in the page was deleted meanwhile; read the page again
+                db.rollback()
+                continue
+        indexed += len(page)
+        after_id = page_ids[-1]
+    logging.info(f"Rebuilt skill index for {indexed} resumes")
+    return indexed
+
+
+def ensure_skill_index():
+    with SessionLocal() as db:
+        has_resumes = db.query(Resume.id).limit(1).first() is not None
+        has_entries = db.query(ResumeSkill.resume_id).limit(1).first() is not None
+    if has_resumes and not has_entries:
+        rebuild_skill_index()
@@ -1,11 +1,21 @@
-from typing import Annotated
+from typing import Annotated, Literal, Optional
 from sqlalchemy.orm import Session
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, status
 from database import get_db
 from models import User, UserRole,Resume
-from .auth import  get_current_user
+from .auth import  Principal, get_current_user, invalidate_principal, principal_cache_stats
 from .login import role_required
 from resume_scores.chroma_db import delete_embedding
+from resume_scores.hybrid_retriever import invalidate_bm25_index
+from resume_scores.score_cache import cache_stats, invalidate_resume
+from executors import executor_stats, run_io
+from llm_models.extraction_cache import extraction_cache_stats
+from llm_models.extractor import extraction_stats
+from llm_models.gateway import gateway_stats
+from resume_scores.ingest import token_stats
+from jobs.queue import enqueue
+from listing import (LIST_MAX_PAGE_SIZE, LIST_PAGE_SIZE, NEXT_CURSOR_HEADER, export_response, fetch_page,
+                     parse_cursor, select_columns)
 
 router = APIRouter(
     prefix="/admin",
@@ -13,12 +23,61 @@ router = APIRouter(
 )
 
 db_dependency = Annotated[Session, Depends(get_db)]
-user_dependency = Annotated[User, Depends(get_current_user)]
+user_dependency = Annotated[Principal, Depends(get_current_user)]
+
+# Password hashes are never listed or exported
+USER_FIELDS = ["id", "full_name", "email", "phone_number", "role"]
+RESUME_FIELDS = ["id", "user_id", "file_path", "content_hash", "extracted_text",
+                 "skills", "experience", "projects", "education"]
+# The columns this endpoint has always returned; fields= narrows them (e.g. to skip extracted_text)
+RESUME_DEFAULT_FIELDS = ["id", "user_id", "file_path", "extracted_text", "skills", "experience", "projects",
+                         "education"]
+
+page_limit = Annotated[int, Query(ge=1, le=LIST_MAX_PAGE_SIZE)]
+list_format = Annotated[Literal["json", "csv", "ndjson"], Query(alias="format")]
+
+
+async def list_rows(response: Response, db: Session, model, columns, cursor: Optional[str], limit: int,
+                    fmt: str, export_name: str):
+    after_id = parse_cursor(cursor)
+    if fmt != "json":
+        # Exports ignore limit and stream every row from the cursor onwards
+        return export_response(model, columns, fmt, export_name, after_id)
+    rows, next_cursor = await run_io(fetch_page, db, model, columns, after_id, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows
 
 @router.get("/all-users", dependencies=[Depends(role_required(UserRole.admin))])
-async def admin_read_all_users(db: db_dependency):
-    users = db.query(User).all()
-    return users
+async def admin_read_all_users(response: Response, db: db_dependency, cursor: Optional[str] = None,
+                               limit: page_limit = LIST_PAGE_SIZE, fields: Optional[str] = None,
+                               fmt: list_format = "json"):
+    columns = select_columns(User, fields, USER_FIELDS, USER_FIELDS)
+    return await list_rows(response, db, User, columns, cursor, limit, fmt, "users")
+
+@router.get("/cache-stats", dependencies=[Depends(role_required(UserRole.admin))])
+async def admin_cache_stats():
+    return {"score_cache": cache_stats(), "extraction_cache": extraction_cache_stats(),
+            "auth_cache": principal_cache_stats()}
+
+@router.get("/ingest-stats", dependencies=[Depends(role_required(UserRole.admin))])
+async def admin_ingest_stats():
+    return {"tokens": token_stats(), "extraction": extraction_stats()}
+
+@router.get("/llm-stats", dependencies=[Depends(role_required(UserRole.admin))])
+async def admin_llm_stats():
+    return gateway_stats()
+
+@router.get("/executor-stats", dependencies=[Depends(role_required(UserRole.admin))])
+async def admin_executor_stats():
+    return executor_stats()
+
+@router.post("/embeddings/reindex", status_code=status.HTTP_202_ACCEPTED)
+async def admin_reindex_embeddings(user: Annotated[Principal, Depends(role_required(UserRole.admin))],
+                                   batch_size: int = 0, page_size: int = 0, restart: bool = False):
+    job_id = enqueue("bulk_ingest", {"batch_size": batch_size, "page_size": page_size, "restart": restart},
+                     owner_id=user.id, max_attempts=5)
+    return {"job_id": job_id, "status_url": f"/jobs/{job_id}"}
 
 @router.get("/{user_id}", dependencies=[Depends(role_required(UserRole.admin))])
 async def admin_read_users_by_id(user_id: int, db: db_dependency):
@@ -32,15 +91,21 @@ async def admin_delete_users_by_id(user_id:int,db:db_dependency):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="user id not found")
+    for resume in user.resumes:
+        invalidate_resume(resume.id)
     db.delete(user)
     db.commit()
+    invalidate_bm25_index()
+    invalidate_principal(user_id)
     return "Successfully Deleleted"
 
 # Resumes
 @router.get("/resumes/",dependencies=[Depends(role_required(UserRole.admin))])
-async def admin_read_all_resumes(db:db_dependency):
-    resume_model = db.query(Resume).all()
-    return resume_model
+async def admin_read_all_resumes(response: Response, db: db_dependency, cursor: Optional[str] = None,
+                                 limit: page_limit = LIST_PAGE_SIZE, fields: Optional[str] = None,
+                                 fmt: list_format = "json"):
+    columns = select_columns(Resume, fields, RESUME_FIELDS, RESUME_DEFAULT_FIELDS)
+    return await list_rows(response, db, Resume, columns, cursor, limit, fmt, "resumes")
 
 @router.get("/resumes/{user_id}",dependencies=[Depends(role_required(UserRole.admin))])
 async def admin_read_resumes_by_id(user_id:int,db:db_dependency,user:user_dependency):
@@ -54,9 +119,11 @@ async def admin_delete_resume(db:db_dependency,user:user_dependency,resume_id: i
     resume_model = db.query(Resume).filter(Resume.id == resume_id).first()
     if not resume_model:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="No Resume found")
+    invalidate_resume(resume_id)
     db.delete(resume_model)
     db.commit()
     delete_embedding(resume_id)
+    invalidate_bm25_index()
     return "Deleted Successfully"
 #anand@gmail.com
 #test@1234!
@@ -1,6 +1,9 @@
-from typing import Annotated
+from typing import Annotated, Any, Dict, Optional, Tuple
+from dataclasses import dataclass
 from datetime import datetime,timedelta,timezone
 import os
+import threading
+import time
 from pydantic import BaseModel
 from jose import jwt,JWTError
 from dotenv import load_dotenv
@@ -8,8 +11,9 @@ from fastapi import HTTPException,Depends,status
 from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordBearer
 from models import User,UserRole
-from database import get_db
-from passlib.context import CryptContext
+from database import get_db, SessionLocal
+from executors import run_io
+from passwords import verify_and_update_async
 
 db_dependency = Annotated[Session,Depends(get_db)]
 
@@ -23,13 +27,30 @@ if not SECRET_KEY:
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 10
 
-bcrypt_context = CryptContext(schemes=['bcrypt'],deprecated='auto')
+# Authenticated principals are cached per (user id, token) for a few seconds so
+# most requests skip the users lookup; deleting a user or changing their role or
+# password drops their entries straight away.
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "30"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+
+_principal_lock = threading.Lock()
+_principals: Dict[Tuple[int, str], Tuple[float, "Principal"]] = {}
+_principal_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 class Token(BaseModel):
     access_token: str
     token_type: str
 
+
+@dataclass(frozen=True)
+class Principal:
+    # The authenticated caller; load the User from the session for anything else
+    id: int
+    email: str
+    role: UserRole
+
 def create_access_token(user_id: int, email: str, role: str, expires_delta: timedelta = None):
     encode = {
         'sub': email,
@@ -43,44 +64,110 @@ def create_access_token(user_id: int, email: str, role: str, expires_delta: time
     return jwt.encode(encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def verify_password(password:str,hashed_password:str) -> bool:
-    return bcrypt_context.verify(password,hashed_password)
+def _cached_principal(key: Tuple[int, str]) -> Optional[Principal]:
+    now = time.monotonic()
+    with _principal_lock:
+        entry = _principals.get(key)
+        if entry and entry[0] > now:
+            _principal_stats["hits"] += 1
+            return entry[1]
+        _principals.pop(key, None)
+        _principal_stats["misses"] += 1
+        return None
+
+
+def _cache_principal(key: Tuple[int, str], principal: Principal):
+    now = time.monotonic()
+    with _principal_lock:
+        if len(_principals) >= AUTH_CACHE_MAX_ENTRIES:
+            for stale in [k for k, (expires, _) in _principals.items() if expires <= now]:
+                del _principals[stale]
+            # Still full: drop the oldest insertions
+            while len(_principals) >= AUTH_CACHE_MAX_ENTRIES:
+                del _principals[next(iter(_principals))]
+        _principals[key] = (now + AUTH_CACHE_TTL_SECONDS, principal)
+
+
+def invalidate_principal(user_id: int):
+    with _principal_lock:
+        keys = [k for k in _principals if k[0] == user_id]
+        for key in keys:
+            del _principals[key]
+        _principal_stats["invalidations"] += len(keys)
+
+
+def principal_cache_stats() -> Dict[str, int]:
+    with _principal_lock:
+        return {**_principal_stats, "entries": len(_principals)}
+
+
+def _load_principal(user_id: int) -> Optional[Principal]:
+    with SessionLocal() as db:
+        row = db.query(User.id, User.email, User.role).filter(User.id == user_id).first()
+        if not row:
+            return None
+        return Principal(id=row.id, email=row.email, role=row.role)
 
-async def get_current_user(token:Annotated[str,Depends(oauth2_bearer)],db:db_dependency):
+
+async def get_token_claims(token: Annotated[str, Depends(oauth2_bearer)]) -> Dict[str, Any]:
     try:
         payload = jwt.decode(token,SECRET_KEY,algorithms=[ALGORITHM])
-        username: str = payload.get('sub')
-        user_id: int = payload.get('id')
-        
-        if username is None or user_id is None:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-        return user
-    
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    if payload.get('sub') is None or payload.get('id') is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    return payload
+
+
+async def resolve_principal(token: str, claims: Dict[str, Any]) -> Principal:
+    key = (claims['id'], token)
+    principal = _cached_principal(key)
+    if principal is None:
+        principal = await run_io(_load_principal, claims['id'])
+        if principal is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        _cache_principal(key, principal)
+    return principal
+
+
+async def get_current_user(token: Annotated[str, Depends(oauth2_bearer)],
+                           claims: Annotated[Dict[str, Any], Depends(get_token_claims)]) -> Principal:
+    return await resolve_principal(token, claims)
 
-def role(required_role:UserRole,user:User = Depends(get_current_user)):
+def role(required_role:UserRole,user:Principal = Depends(get_current_user)):
     if user.role != required_role:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
     return user
 
 
-def authenticate_user(email:str,password:str,db:db_dependency):
-    user = db.query(User).filter(User.email == email).first()
+def _save_rehash(db: Session, user: User, new_hash: str):
+    user.hashed_password = new_hash
+    db.commit()
+
+
+async def authenticate_user(email:str,password:str,db:db_dependency):
+    user = await run_io(lambda: db.query(User).filter(User.email == email).first())
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="User Not Found Please Register")
-    elif verify_password(password,user.hashed_password) == False:
+    valid, new_hash = await verify_and_update_async(password, user.hashed_password)
+    if not valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                             detail="Incorrect Password")
+    if new_hash:
+        # Stored hash used a different BCRYPT_ROUNDS; upgrade it now that we have the password
+        await run_io(_save_rehash, db, user, new_hash)
     return user
     
 # Role-based access control
 def role_required(required_role: UserRole):
-    def role_dependency(current_user: Annotated[User, Depends(get_current_user)]):
+    async def role_dependency(token: Annotated[str, Depends(oauth2_bearer)],
+                              claims: Annotated[Dict[str, Any], Depends(get_token_claims)]) -> Principal:
+        # The signed role claim can only deny: a token minted for another role is
+        # rejected without a lookup, but a grant is always checked against the principal
+        if claims.get('role') not in (None, required_role.value):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Access denied")
+        current_user = await resolve_principal(token, claims)
         if not current_user or not hasattr(current_user, "role"):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid user or missing role")
 
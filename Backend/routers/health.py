@@ -0,0 +1,19 @@
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+from startup import readiness
+
+router = APIRouter(
+    prefix="/health",
+    tags=["Health"]
+)
+
+
+@router.get("/live")
+async def liveness():
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def ready():
+    state = readiness()
+    return JSONResponse(state, status_code=status.HTTP_200_OK if state["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE)
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, HTTPException, Depends, status
+from typing import Annotated
+from models import UserRole
+from .auth import Principal, get_current_user
+from jobs.queue import get_job
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["Jobs"]
+)
+
+user_dependency = Annotated[Principal, Depends(get_current_user)]
+
+
+@router.get("/{job_id}")
+async def read_job(job_id: str, user: user_dependency):
+    job = get_job(job_id)
+    if not job or (job.owner_id != user.id and user.role != UserRole.admin):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status.value,
+        "progress": job.progress,
+        "stage": job.stage,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at
+    }
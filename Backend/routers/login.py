@@ -1,23 +1,21 @@
 from typing import Annotated
 from sqlalchemy.orm import Session
 from fastapi import APIRouter, HTTPException, Depends, status
-from database import Base, engine, get_db
+from database import get_db
 from models import User, UserRole
 from pydantic import BaseModel, EmailStr
-from passlib.context import CryptContext
-from .auth import create_access_token, authenticate_user, get_current_user,role_required
+from passwords import hash_password_async, verify_password_async
+from executors import run_io
+from .auth import (Principal, create_access_token, authenticate_user, get_current_user, invalidate_principal,
+                   role_required)
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta
 
-Base.metadata.create_all(bind=engine)
-
 router = APIRouter(
     prefix="/auth",
     tags=["Authentication"]
 )
-user_dependency = Annotated[dict,Depends(get_current_user)]
-
-bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
+user_dependency = Annotated[Principal,Depends(get_current_user)]
 
 # Schema for Registration
 class UserCreate(BaseModel):
@@ -35,7 +33,7 @@ class UserLogin(BaseModel):
 db_dependency = Annotated[Session, Depends(get_db)]
 
 @router.get("/auth/verify-token")
-async def verify_token(current_user: User = Depends(get_current_user)):
+async def verify_token(current_user: Principal = Depends(get_current_user)):
     return {
         "user": {
             "id": current_user.id,
@@ -46,7 +44,7 @@ async def verify_token(current_user: User = Depends(get_current_user)):
 
 @router.post("/register", status_code=status.HTTP_201_CREATED)
 async def register_user(db: db_dependency, user_data: UserCreate):
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await run_io(lambda: db.query(User).filter(User.email == user_data.email).first())
     if existing_user:
         raise HTTPException(status_code=400, detail='Email already registered')
 
@@ -55,12 +53,15 @@ async def register_user(db: db_dependency, user_data: UserCreate):
         full_name=user_data.full_name,
         email=user_data.email,
         phone_number=user_data.phone_number,
-        hashed_password=bcrypt_context.hash(user_data.password),
+        hashed_password=await hash_password_async(user_data.password),
         role=user_data.role  
     )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    def insert():
+        db.add(new_user)
+        db.commit()
+        db.refresh(new_user)
+
+    await run_io(insert)
     return {
         "message": "User registered successfully",
         "user_id": new_user.id,
@@ -68,11 +69,11 @@ async def register_user(db: db_dependency, user_data: UserCreate):
     }
 
 @router.post("/login")
-def login(
+async def login(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     db: db_dependency
 ):
-    user = authenticate_user(form_data.username, form_data.password, db)    
+    user = await authenticate_user(form_data.username, form_data.password, db)    
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials") 
 
@@ -86,21 +87,21 @@ def login(
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.put("/change-password")
-def change_password(
+async def change_password(
     db: db_dependency,
     current_user: user_dependency,
     new_password: str
 ):
-    user_model = db.query(User).filter(User.id == current_user.id).first()
+    user_model = await run_io(lambda: db.query(User).filter(User.id == current_user.id).first())
     if not user_model:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     
-    if bcrypt_context.verify(new_password, user_model.hashed_password):
+    if await verify_password_async(new_password, user_model.hashed_password):
         raise HTTPException(status_code=400, detail="New password must be different from the old password")
 
-    user_model.hashed_password = bcrypt_context.hash(new_password)
-    db.commit()
-    db.refresh(user_model)
+    user_model.hashed_password = await hash_password_async(new_password)
+    await run_io(db.commit)
+    invalidate_principal(user_model.id)
 
     return {"message": "Password updated successfully"}
 
@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Request, Response
+from prometheus_client import REGISTRY
+from prometheus_client.exposition import choose_encoder
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics")
+async def metrics(request: Request):
+    # OpenMetrics when the scraper asks for it (that format carries the trace id exemplars)
+    encoder, content_type = choose_encoder(request.headers.get("accept"))
+    return Response(encoder(REGISTRY), media_type=content_type)
@@ -1,30 +1,41 @@
 from fastapi import APIRouter, Depends, HTTPException,status
-from typing import Annotated
+from fastapi.responses import StreamingResponse
+from typing import Annotated, List, Literal, Optional
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import SimpleJsonOutputParser
-import os
+from functools import lru_cache
+import json
+import time
 from database import get_db
 from models import Resume, UserRole
-from .auth import role_required
-from pydantic import BaseModel
-from resume_scores.chroma_db import merge_all,vector_store
+from .auth import Principal, role_required
+from jobs.queue import enqueue
+from executors import run_io
+from observability import stage
+from pydantic import BaseModel, Field
+from resume_scores.chroma_db import merge_all,get_vector_store
+from resume_scores.hybrid_retriever import dense_scores, hybrid_retrieve
+from resume_scores.prescorer import PRESCORE_LLM_BUDGET, cascade
+from resume_scores.listwise import (LISTWISE_CONSISTENCY_SAMPLE, LISTWISE_PROMPT_VERSION, LISTWISE_TOKEN_BUDGET,
+                                    add_consistency, consistency_check, iter_listwise, pack_batches, savings_report,
+                                    score_listwise)
+from resume_scores.skill_index import (SKILL_PREFILTER_MAX_IDS, filter_resume_ids, query_resume_ids,
+                                       skill_counts, skill_keys)
+from llm_models.client import LLM_MODEL_NAME, get_llm
+from llm_models.scheduler import BULK, llm_work
+from resume_scores.concurrent_scoring import (LLM_MAX_CONCURRENCY, LLM_CALL_TIMEOUT,
+                                              iter_scores_as_completed, score_concurrently,
+                                              summarize_timings)
+from resume_scores.score_cache import get_or_create_job, lookup_many, prompt_version, store_many
 
 load_dotenv()
 
 router = APIRouter(prefix="/recruiter", tags=["Recruiter"])
 
 db_dependency = Annotated[Session, Depends(get_db)]
-
-groq_api = os.getenv("GROQ_API_KEY")
-
-model = ChatGroq(
-    api_key=groq_api,
-    model="llama3-8b-8192",
-    temperature=0.3
-)
+recruiter_dependency = Annotated[Principal, Depends(role_required(UserRole.recruiter))]
 
 prompt = PromptTemplate(
     template="""
@@ -65,86 +76,426 @@ Example:
 
 
 parser = SimpleJsonOutputParser()
-chain = prompt | model | parser
+
+RECRUITER_PROMPT_VERSION = prompt_version("recruiter", prompt.template, LLM_MODEL_NAME)
+
+
+@lru_cache(maxsize=1)
+def get_chain():
+    return prompt | get_llm("recruiter_score") | parser
 
 
 
 class BestResumesRequest(BaseModel):
     job_description: str
     threshold: int = 70
+    max_concurrency: Optional[int] = Field(default=None, ge=1, le=64)
+    timeout_seconds: Optional[float] = Field(default=None, gt=0, le=300)
+    # hybrid: BM25 + vector search with an adaptive cutoff; dense: fixed top 100 by vector similarity
+    retrieval: Literal["hybrid", "dense"] = "hybrid"
+    # Rank candidates locally first and only send the best llm_budget of them to the LLM
+    prescore: bool = True
+    llm_budget: Optional[int] = Field(default=None, ge=1, le=200)
+    # Only resumes having all of these skills (aliases folded) are considered
+    required_skills: List[str] = Field(default_factory=list)
+    # pairwise: one LLM call per resume; listwise: several resumes per call within token_budget
+    scoring: Literal["pairwise", "listwise"] = "pairwise"
+    token_budget: Optional[int] = Field(default=None, ge=1000, le=128000)
+    # Listwise only: how many resumes to re-score pairwise to check agreement
+    consistency_sample: Optional[int] = Field(default=None, ge=0, le=20)
+
+
+class SkillQuery(BaseModel):
+    all_of: List[str] = Field(default_factory=list)
+    any_of: List[str] = Field(default_factory=list)
+    none_of: List[str] = Field(default_factory=list)
+    limit: int = Field(default=100, ge=1, le=1000)
+    after_id: Optional[int] = None
 
 
 
 
 def filter_top_resumes_with_chroma(job_desc: str, top_k: int = 100):
-    results = vector_store.similarity_search_with_score(job_desc, k=top_k)
+    results = get_vector_store().similarity_search_with_score(job_desc, k=top_k)
     return [doc.metadata["resume_id"] for doc, _ in results]
 
 
-@router.post("/match-best-resumes", dependencies=[Depends(role_required(UserRole.recruiter))])
-async def find_best_resumes(payload: BestResumesRequest, db: db_dependency):
-    job_description = payload.job_description
-
-    # Step 1: Filter relevant resumes via vector search
-    top_resume_ids = filter_top_resumes_with_chroma(job_description)
+def skill_prefilter(payload: BestResumesRequest, db: Session):
+    # Returns (allowed ids, needs post-filter); a set small enough for the vector
+    # store is applied up front, a larger one is checked after retrieval instead
+    if not payload.required_skills:
+        return None, False
+    matched = query_resume_ids(db, all_of=payload.required_skills, limit=SKILL_PREFILTER_MAX_IDS + 1)
+    if len(matched) > SKILL_PREFILTER_MAX_IDS:
+        return None, True
+    return set(matched), False
+
+
+def retrieve_resume_ids(payload: BestResumesRequest, db: Session):
+    # Returns resume ids in rank order and their embedding similarity to the job description
+    allowed_ids, post_filter = skill_prefilter(payload, db)
+    if allowed_ids is not None and not allowed_ids:
+        return [], {}
+
+    if payload.retrieval == "dense":
+        similarity = dense_scores(payload.job_description, 100, allowed_ids)
+        resume_ids = list(similarity)
+    else:
+        hits = hybrid_retrieve(payload.job_description, db, allowed_ids=allowed_ids)
+        resume_ids = [hit["resume_id"] for hit in hits]
+        similarity = {hit["resume_id"]: hit["dense_score"] for hit in hits}
+
+    if post_filter:
+        resume_ids = filter_resume_ids(db, resume_ids, all_of=payload.required_skills)
+    return resume_ids, similarity
+
+
+async def load_candidates(payload: BestResumesRequest, db: Session):
+    # Step 1: Narrow the pool down to the resumes worth sending to the LLM
+    with stage("rank.retrieval"):
+        top_resume_ids, similarity = await run_io(retrieve_resume_ids, payload, db)
     if not top_resume_ids:
-        return {"error": "No relevant resumes found using vector similarity."}
+        return None, None, "No relevant resumes found using vector similarity."
 
-    resumes = db.query(Resume).filter(Resume.id.in_(top_resume_ids)).all()
+    with stage("rank.db_load"):
+        resumes = await run_io(lambda: db.query(Resume).filter(Resume.id.in_(top_resume_ids)).all())
     if not resumes:
-        return {"error": "No resumes found in the database."}
+        return None, None, "No resumes found in the database."
 
-    scored_resumes = []
+    # Keep retrieval rank order so ties in match_score are broken the same way every time
+    rank = {resume_id: i for i, resume_id in enumerate(top_resume_ids)}
+    resumes.sort(key=lambda r: rank.get(r.id, len(rank)))
 
+    candidates = []
     for resume in resumes:
         doc = merge_all(resume)
-        if not doc:
-            continue
+        if doc:
+            candidates.append((resume, doc))
+    return candidates, similarity, None
+
+
+def scoring_version(payload: BestResumesRequest) -> str:
+    return LISTWISE_PROMPT_VERSION if payload.scoring == "listwise" else RECRUITER_PROMPT_VERSION
+
+
+async def load_cached_scores(job_description: str, candidates, version: str):
+    # Step 2: Serve previously scored (job description, resume) pairs from the cache
+    def load():
+        job_id = get_or_create_job(job_description)
+        return job_id, lookup_many(job_id, [resume for resume, _ in candidates], version)
+
+    with stage("rank.cache_lookup"):
+        return await run_io(load)
+
+
+def prescore_candidates(payload: BestResumesRequest, candidates, similarity, cached):
+    # Step 3: Cheap local cascade; cached pairs cost no LLM call so they skip the budget
+    report = {"retrieved": len(candidates), "eliminated": {"skill_filter": 0, "llm_budget": 0}}
+    if not payload.prescore:
+        return candidates, report
+
+    with stage("rank.prescore"):
+        result = cascade(payload.job_description, [resume for resume, _ in candidates], similarity,
+                         llm_budget=payload.llm_budget or PRESCORE_LLM_BUDGET, free_ids=set(cached))
+    kept = set(result["resume_ids"])
+    report["eliminated"] = result["stages"]
+    report["required_skills"] = result["required_skills"]
+    # Survivors stay in retrieval order so tie-breaking matches the un-prescored path
+    return [c for c in candidates if c[0].id in kept], report
+
+
+def make_scorer(job_description: str):
+    async def score_candidate(candidate):
+        resume, doc = candidate
+        return await get_chain().ainvoke({
+            "job_description": job_description,
+            "resume_text": doc.page_content,
+            "resume_file_path": resume.file_path
+        })
+    return score_candidate
+
+
+async def score_candidates(payload: BestResumesRequest, to_score, max_concurrency: int, timeout: float):
+    # Returns (per-resume outcomes, per-LLM-call outcomes, scoring report)
+    job_description = payload.job_description
+    if payload.scoring == "pairwise":
+        outcomes = await score_concurrently(to_score, make_scorer(job_description),
+                                            max_concurrency=max_concurrency, timeout=timeout)
+        return outcomes, outcomes, {"mode": "pairwise", "llm_calls": len(to_score)}
+
+    outcomes, call_outcomes, batches = await score_listwise(job_description, to_score, max_concurrency, timeout,
+                                                            payload.token_budget or LISTWISE_TOKEN_BUDGET)
+    report = savings_report(job_description, to_score, batches, prompt.template)
+    add_consistency(report, await listwise_consistency(payload, outcomes, max_concurrency, timeout))
+    return outcomes, call_outcomes, report
 
-        try:
-            result = chain.invoke({
-                "job_description": job_description,
-                "resume_text": doc.page_content,
-                "resume_file_path": resume.file_path
-            })
 
-            score = result.get("match_score", 0)
+async def listwise_consistency(payload: BestResumesRequest, outcomes, max_concurrency: int, timeout: float):
+    sample = LISTWISE_CONSISTENCY_SAMPLE if payload.consistency_sample is None else payload.consistency_sample
+    if not sample:
+        return None
+    return await consistency_check(outcomes, make_scorer(payload.job_description),
+                                   lambda result: is_match(result, payload.threshold),
+                                   sample, max_concurrency, timeout)
 
-            if score >= payload.threshold and "No Resume Found" not in result.get("summary", "").lower():
-                scored_resumes.append({
-                    "resume":resume,
-                    "match_score": score,
-                    "summary": result.get("summary", "")
-                })
 
-        except Exception as e:
-            print(f"Error scoring resume id {resume.id}: {e}")
+def match_score(result: dict) -> float:
+    # The LLM's score may come back as a number, a numeric string or null; anything else counts as 0
+    try:
+        return float(result.get("match_score") or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def is_match(result: dict, threshold: int) -> bool:
+    return match_score(result) >= threshold and "no resume found" not in (result.get("summary") or "").lower()
+
+
+def format_scored_resume(resume: Resume, result: dict, latency_ms: float, cached: bool) -> dict:
+    return {
+        "resume_data": {
+            "user_id": resume.user_id,
+            "resume_id": resume.id,
+            "file_path": resume.file_path,
+            "extracted_text": resume.extracted_text,
+            "skills": resume.skills,
+            "experience": resume.experience,
+            "projects": resume.projects,
+            "education": resume.education
+        },
+        "match_score": result.get("match_score", 0),
+        "summary": result.get("summary", ""),
+        "latency_ms": latency_ms,
+        "cached": cached
+    }
+
+
+def rank_scored_resumes(scored_resumes: list) -> list:
+    # sorted() is stable, so equal scores keep their retrieval order
+    return sorted(scored_resumes, key=match_score, reverse=True)
+
+
+@router.post("/match-best-resumes")
+async def find_best_resumes(payload: BestResumesRequest, db: db_dependency, recruiter: recruiter_dependency):
+    # Ranking calls queue behind interactive scoring and take turns with other recruiters'
+    with llm_work(BULK, recruiter.id):
+        return await rank_best_resumes(payload, db)
+
+
+async def rank_best_resumes(payload: BestResumesRequest, db: Session):
+    started = time.perf_counter()
+    job_description = payload.job_description
+    max_concurrency = payload.max_concurrency or LLM_MAX_CONCURRENCY
+    timeout = payload.timeout_seconds or LLM_CALL_TIMEOUT
+
+    candidates, similarity, error = await load_candidates(payload, db)
+    if error:
+        return {"error": error}
+
+    version = scoring_version(payload)
+    job_id, cached = await load_cached_scores(job_description, candidates, version)
+    candidates, report = prescore_candidates(payload, candidates, similarity, cached)
+    to_score = [c for c in candidates if c[0].id not in cached]
+
+    # Step 4: Score the rest concurrently with a bounded number of in-flight LLM calls
+    llm_started = time.perf_counter()
+    with stage("rank.llm"):
+        outcomes, call_outcomes, scoring = await score_candidates(payload, to_score, max_concurrency, timeout)
+    timings = summarize_timings(call_outcomes, time.perf_counter() - llm_started, max_concurrency)
+    timings["cache_hits"] = len(cached)
+    timings["retrieval"] = payload.retrieval
+    timings["candidates"] = len(candidates)
+
+    fresh = {
+        o["item"][0].id: (o["result"], o["latency_ms"])
+        for o in outcomes
+        if not o["error"] and isinstance(o["result"], dict)
+    }
+    with stage("rank.cache_store"):
+        await run_io(store_many, job_id,
+                     [(o["item"][0], o["result"]) for o in outcomes if o["item"][0].id in fresh],
+                     version)
+
+    scored_resumes = []
+    for resume, _ in candidates:
+        if resume.id in cached:
+            result, latency_ms = cached[resume.id], 0.0
+        elif resume.id in fresh:
+            result, latency_ms = fresh[resume.id]
+        else:
             continue
 
+        if is_match(result, payload.threshold):
+            scored_resumes.append(format_scored_resume(resume, result, latency_ms, resume.id in cached))
+
+    timings["total_wall_time_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    report["llm_calls"] = len(call_outcomes)
+    report["eliminated"]["llm_errors"] = len(to_score) - len(fresh)
+    report["eliminated"]["below_threshold"] = len(candidates) - report["eliminated"]["llm_errors"] - len(scored_resumes)
+    # Rate limited or timed out candidates are listed rather than silently left out
+    report["llm_failures"] = [{"resume_id": o["item"][0].id, "error": o["error"] or "Invalid LLM response"}
+                              for o in outcomes if o["item"][0].id not in fresh]
+
     if not scored_resumes:
-        return {"error": "No resumes matched the job description well enough."}
+        return {"error": "No resumes matched the job description well enough.", "timings": timings,
+                "cascade": report, "scoring": scoring}
 
-    scored_resumes  = sorted(scored_resumes, key=lambda r: r["match_score"], reverse=True)
-    best_score = scored_resumes[0]["match_score"]
+    scored_resumes = rank_scored_resumes(scored_resumes)
 
     return {
-        "top_resumes": [
-            {
-                "resume_data": {
-                    "user_id": r["resume"].user_id,
-                    "resume_id": r["resume"].id,
-                    "file_path": r["resume"].file_path,
-                    "extracted_text": r["resume"].extracted_text,
-                    "skills": r["resume"].skills,
-                    "experience": r["resume"].experience,
-                    "projects": r["resume"].projects,
-                    "education": r["resume"].education
-                },
-                "match_score": r["match_score"],
-                "summary": r["summary"]
-            }
-            for r in scored_resumes
-        ],
-        "best_match_score": best_score
+        "top_resumes": scored_resumes,
+        "best_match_score": scored_resumes[0]["match_score"],
+        "timings": timings,
+        "cascade": report,
+        "scoring": scoring
     }
 
+
+def encode_frame(frame: dict, fmt: str) -> str:
+    data = json.dumps(frame, default=str)
+    if fmt == "sse":
+        return f"event: {frame['type']}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+@router.post("/match-best-resumes/stream")
+async def stream_best_resumes(payload: BestResumesRequest, db: db_dependency, recruiter: recruiter_dependency,
+                              format: Literal["ndjson", "sse"] = "ndjson"):
+    started = time.perf_counter()
+    job_description = payload.job_description
+    max_concurrency = payload.max_concurrency or LLM_MAX_CONCURRENCY
+    timeout = payload.timeout_seconds or LLM_CALL_TIMEOUT
+
+    # Everything that touches the request's DB session happens before streaming starts
+    candidates, similarity, error = await load_candidates(payload, db)
+    if error:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error)
+
+    version = scoring_version(payload)
+    job_id, cached = await load_cached_scores(job_description, candidates, version)
+    candidates, report = prescore_candidates(payload, candidates, similarity, cached)
+    to_score = [c for c in candidates if c[0].id not in cached]
+    batches = None
+    if payload.scoring == "listwise":
+        batches = pack_batches(job_description, to_score, payload.token_budget or LISTWISE_TOKEN_BUDGET)
+
+    call_outcomes = []
+
+    async def resume_outcomes():
+        # Per-resume outcomes in completion order, whichever scoring mode is used
+        if batches is None:
+            async for outcome in iter_scores_as_completed(to_score, make_scorer(job_description),
+                                                          max_concurrency=max_concurrency, timeout=timeout):
+                call_outcomes.append(outcome)
+                yield outcome
+            return
+        async for call_outcome, outcomes in iter_listwise(job_description, batches, max_concurrency, timeout):
+            call_outcomes.append(call_outcome)
+            for outcome in outcomes:
+                yield outcome
+
+    async def frames():
+        # Set here rather than around the endpoint: the body is iterated after the endpoint returns
+        with llm_work(BULK, recruiter.id):
+            async for frame in scored_frames():
+                yield frame
+
+    async def scored_frames():
+        yield encode_frame({"type": "start", "candidates": len(candidates), "cache_hits": len(cached),
+                            "llm_calls": len(batches) if batches is not None else len(to_score),
+                            "scoring": payload.scoring}, format)
+
+        scored_resumes = []
+        for resume, _ in candidates:
+            if resume.id in cached:
+                scored = format_scored_resume(resume, cached[resume.id], 0.0, True)
+                matched = is_match(cached[resume.id], payload.threshold)
+                if matched:
+                    scored_resumes.append(scored)
+                yield encode_frame({"type": "result", "matched": matched, **scored}, format)
+
+        outcomes, fresh = [], []
+        llm_started = time.perf_counter()
+        async for outcome in resume_outcomes():
+            outcomes.append(outcome)
+            resume = outcome["item"][0]
+            result = outcome["result"]
+            if outcome["error"] or not isinstance(result, dict):
+                yield encode_frame({"type": "error", "resume_id": resume.id, "error": outcome["error"] or "Invalid LLM response",
+                                    "latency_ms": outcome["latency_ms"]}, format)
+                continue
+
+            fresh.append((resume, result))
+            scored = format_scored_resume(resume, result, outcome["latency_ms"], False)
+            matched = is_match(result, payload.threshold)
+            if matched:
+                scored_resumes.append(scored)
+            yield encode_frame({"type": "result", "matched": matched, **scored}, format)
+
+        with stage("rank.cache_store"):
+            await run_io(store_many, job_id, fresh, version)
+
+        timings = summarize_timings(call_outcomes, time.perf_counter() - llm_started, max_concurrency)
+        if batches is None:
+            scoring = {"mode": "pairwise", "llm_calls": len(to_score)}
+        else:
+            scoring = savings_report(job_description, to_score, batches, prompt.template)
+            add_consistency(scoring, await listwise_consistency(payload, outcomes, max_concurrency, timeout))
+        timings["cache_hits"] = len(cached)
+        timings["retrieval"] = payload.retrieval
+        timings["candidates"] = len(candidates)
+        timings["total_wall_time_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        report["llm_calls"] = len(call_outcomes)
+        report["eliminated"]["llm_errors"] = len(to_score) - len(fresh)
+        report["eliminated"]["below_threshold"] = len(candidates) - report["eliminated"]["llm_errors"] - len(scored_resumes)
+
+        # Restore retrieval order before the stable sort so the summary matches /match-best-resumes
+        order = {resume.id: i for i, (resume, _) in enumerate(candidates)}
+        ranked = sorted(scored_resumes, key=lambda r: order[r["resume_data"]["resume_id"]])
+        ranked = rank_scored_resumes(ranked)
+
+        yield encode_frame({
+            "type": "summary",
+            "top_resumes": ranked,
+            "best_match_score": ranked[0]["match_score"] if ranked else None,
+            "timings": timings,
+            "cascade": report,
+            "scoring": scoring
+        }, format)
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(frames(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+
+@router.post("/skills/search", dependencies=[Depends(role_required(UserRole.recruiter))])
+async def search_by_skills(query: SkillQuery, db: db_dependency):
+    if not query.all_of and not query.any_of:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Provide at least one skill in all_of or any_of")
+
+    def search():
+        started = time.perf_counter()
+        resume_ids = query_resume_ids(db, query.all_of, query.any_of, query.none_of,
+                                      limit=query.limit, after_id=query.after_id)
+        counts = skill_counts(db, query.all_of + query.any_of + query.none_of)
+        return resume_ids, counts, round((time.perf_counter() - started) * 1000, 2)
+
+    resume_ids, counts, elapsed_ms = await run_io(search)
+    return {
+        "query": {
+            "all_of": skill_keys(query.all_of),
+            "any_of": skill_keys(query.any_of),
+            "none_of": skill_keys(query.none_of)
+        },
+        "resume_ids": resume_ids,
+        "skill_counts": counts,
+        "next_after_id": resume_ids[-1] if len(resume_ids) == query.limit else None,
+        "elapsed_ms": elapsed_ms
+    }
+
+
+@router.post("/match-best-resumes/async", status_code=status.HTTP_202_ACCEPTED)
+async def find_best_resumes_async(payload: BestResumesRequest,
+                                  user: Annotated[Principal, Depends(role_required(UserRole.recruiter))]):
+    job_id = enqueue("match_best_resumes", payload.model_dump(), owner_id=user.id)
+    return {"job_id": job_id, "status_url": f"/jobs/{job_id}"}
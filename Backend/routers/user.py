@@ -1,17 +1,28 @@
 from fastapi import APIRouter, HTTPException, File, UploadFile, Depends, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from database import get_db
-from llm_models.extractor import extract_resume_data
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db, get_db
+from executors import run_io
+from .auth import Principal
 from .login import get_current_user
-from typing import Annotated, List, Dict, Optional
-from models import Resume, User, UserRole
+from typing import Annotated, Any, List, Dict, Optional
+from models import Resume, UserRole
 from pydantic import BaseModel, ConfigDict, Field
 import json
 import os
 from datetime import datetime
 from .login import role_required
 from resume_scores.llm_scores import llm_score_user
-from resume_scores.chroma_db import store_embeddings,delete_embedding,vector_store
+from resume_scores.chroma_db import delete_embedding,get_vector_store
+from resume_scores.hybrid_retriever import invalidate_bm25_index
+from resume_scores.ingest import ingest_upload_async
+from llm_models.document_parser import DocumentLimitError
+from llm_models.scheduler import INTERACTIVE, llm_work
+from uploads import receive_upload
+from jobs.queue import enqueue
+from jobs.handlers import spool_upload
+from resume_scores.score_cache import invalidate_resume
 
 router = APIRouter(
     prefix="/user",
@@ -19,7 +30,8 @@ router = APIRouter(
 )
 
 db_dependency = Annotated[Session, Depends(get_db)]
-user_dependency = Annotated[dict,Depends(get_current_user)]
+async_db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
+user_dependency = Annotated[Principal,Depends(get_current_user)]
 
 
 UPLOAD_DIR = "uploaded/resumes"  
@@ -49,6 +61,8 @@ class ResumeResponse(BaseModel):
     experience: List[ExperienceItem] = Field(default_factory=list)
     projects: List[ProjectItem] = Field(default_factory=list)
     education: List[EducationItem] = Field(default_factory=list)
+    reused_extraction: bool = False
+    token_stats: Optional[Dict[str, Any]] = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -56,10 +70,11 @@ class ResumeResponse(BaseModel):
 
 @router.get("/get_resume")
 async def get_user_resumes(
-    db:db_dependency,
-    user: User = Depends(get_current_user)
+    db:async_db_dependency,
+    user: Principal = Depends(get_current_user)
 ):
-    resume_instance = db.query(Resume).filter(Resume.user_id == user.id).all()
+    result = await db.execute(select(Resume).where(Resume.user_id == user.id))
+    resume_instance = result.scalars().all()
     if not resume_instance:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="Resume Not Found")
     return resume_instance
@@ -67,31 +82,12 @@ async def get_user_resumes(
 @router.post("/upload_resume", response_model=ResumeResponse, status_code=status.HTTP_201_CREATED)
 async def upload_resume(
     db: db_dependency,
-    user: User = Depends(get_current_user), 
+    user: Principal = Depends(get_current_user), 
     file: UploadFile = File(...)
 ):
     try:
-        extracted_data = extract_resume_data(file)
-        if not extracted_data:
-            raise HTTPException(status_code=400, detail="Failed to extract resume data")
-
-        # Just simulate a file path reference (not actually stored)
-        simulated_path = file.filename
-
-        resume = Resume(
-            user_id=user.id,
-            file_path=simulated_path,
-            extracted_text=extracted_data.get("name", ""),
-            skills=extracted_data.get("skills", []),        
-            experience=extracted_data.get("experience", []), 
-            projects=extracted_data.get("projects", []),
-            education=extracted_data.get("education", [])
-        )
-
-        db.add(resume)
-        db.commit()
-        db.refresh(resume)
-        store_embeddings(resume)
+        with await receive_upload(file) as upload, llm_work(INTERACTIVE, user.id):
+            resume, reused, tokens = await ingest_upload_async(db, user.id, upload)
         return ResumeResponse(
             id=resume.id,
             user_id=resume.user_id,
@@ -101,12 +97,36 @@ async def upload_resume(
             experience=resume.experience,
             projects=resume.projects,
             education=resume.education,
+            reused_extraction=reused,
+            token_stats=tokens,
         )
 
+    except DocumentLimitError as e:
+        db.rollback()
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error processing resume: {str(e)}")
 
+@router.post("/upload_resume/async", status_code=status.HTTP_202_ACCEPTED)
+async def upload_resume_async(
+    user: Principal = Depends(get_current_user),
+    file: UploadFile = File(...)
+):
+    extension = file.filename.split('.')[-1].lower()
+    if extension not in ("pdf", "docx"):
+        raise HTTPException(status_code=400, detail="Unsupported file type. Please upload a PDF or DOCX file.")
+
+    try:
+        with await receive_upload(file) as upload:
+            spool_path = spool_upload(upload)
+    except DocumentLimitError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    job_id = enqueue("upload_resume",
+                     {"user_id": user.id, "filename": file.filename, "spool_path": spool_path},
+                     owner_id=user.id)
+    return {"job_id": job_id, "status_url": f"/jobs/{job_id}"}
+
 @router.delete(
     "/delete-resume/{resume_id}",
     dependencies=[Depends(role_required(UserRole.user))],
@@ -115,9 +135,9 @@ async def upload_resume(
 async def delete_resume(
     db: db_dependency,
     resume_id: int,
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[Principal, Depends(get_current_user)]
 ):
-    resume_instance = db.query(Resume).filter(Resume.id == resume_id).first()
+    resume_instance = await run_io(lambda: db.query(Resume).filter(Resume.id == resume_id).first())
 
     if not resume_instance:
         raise HTTPException(
@@ -131,9 +151,14 @@ async def delete_resume(
             detail="You are not authorized to delete this resume"
         )
 
-    db.delete(resume_instance)
-    db.commit()
-    delete_embedding(resume_id=resume_id)
+    def delete():
+        invalidate_resume(resume_id)
+        db.delete(resume_instance)
+        db.commit()
+        delete_embedding(resume_id=resume_id)
+        invalidate_bm25_index()
+
+    await run_io(delete)
 # User Scoring
 class Description(BaseModel):
     job_description: str
@@ -141,17 +166,28 @@ class Description(BaseModel):
 # user
 @router.post("/get_score/{resume_id}")
 async def score(db:db_dependency,desc:Description,resume_id:int):
-    resume_instance = db.query(Resume).filter(Resume.id == resume_id).first()
+    resume_instance = await run_io(lambda: db.query(Resume).filter(Resume.id == resume_id).first())
     if not resume_instance:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="No resume found")
-    llm_result = llm_score_user(job_desc=desc.job_description,resume_id=resume_id,db=db)
+    with llm_work(INTERACTIVE, resume_instance.user_id):
+        llm_result = await run_io(llm_score_user, job_desc=desc.job_description, resume_id=resume_id, db=db)
     return {"resume_id":resume_id,
             "llm_result":llm_result
             }
+@router.post("/get_score/{resume_id}/async", status_code=status.HTTP_202_ACCEPTED)
+async def score_async(db:db_dependency,desc:Description,resume_id:int,user:user_dependency):
+    resume_instance = await run_io(lambda: db.query(Resume).filter(Resume.id == resume_id).first())
+    if not resume_instance:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="No resume found")
+    job_id = enqueue("score_resume",
+                     {"resume_id": resume_id, "job_description": desc.job_description},
+                     owner_id=user.id)
+    return {"job_id": job_id, "status_url": f"/jobs/{job_id}"}
+
 @router.get("/embedding_count")
 async def get_embedding_count():
     try:
-        count = vector_store._collection.count()
+        count = get_vector_store()._collection.count()
         return {"stored_embeddings": count}
     except Exception as e:
         return {"error": str(e)}
\ No newline at end of file
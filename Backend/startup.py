@@ -0,0 +1,69 @@
+from migrations import run_migrations
+from resume_scores.skill_index import ensure_skill_index
+from typing import Any, Dict
+import logging
+import os
+import threading
+import time
+
+## Startup, warmup and readiness ##
+# Heavy singletons (embedding model, Chroma store, LLM client) are created on
+# first use. warmup() builds them ahead of traffic; with FAST_STARTUP=1 the app
+# skips it and reports ready as soon as the database is migrated.
+
+FAST_STARTUP = os.getenv("FAST_STARTUP", "0") == "1"
+
+_state_lock = threading.Lock()
+_state: Dict[str, Any] = {
+    "database": "pending",
+    "warmup": "skipped" if FAST_STARTUP else "pending",
+    "warmup_seconds": None,
+    "error": None,
+}
+
+
+def _set(**kwargs):
+    with _state_lock:
+        _state.update(kwargs)
+
+
+def init_database():
+    started = time.perf_counter()
+    run_migrations()
+    ensure_skill_index()
+    _set(database="ready")
+    logging.info(f"Database ready in {time.perf_counter() - started:.2f}s")
+
+
+def warmup():
+    from llm_models.client import get_llm
+    from resume_scores.chroma_db import get_vector_store
+
+    _set(warmup="running", error=None)
+    started = time.perf_counter()
+    try:
+        vector_store = get_vector_store()
+        # Force one encode so model weights are loaded and any ONNX export is done
+        vector_store.embeddings.embed_query("warmup")
+        get_llm()
+    except Exception as e:
+        logging.exception("Warmup failed")
+        _set(warmup="failed", error=str(e))
+        return
+    elapsed = round(time.perf_counter() - started, 2)
+    _set(warmup="ready", warmup_seconds=elapsed)
+    logging.info(f"Warmup finished in {elapsed}s")
+
+
+def readiness() -> Dict[str, Any]:
+    from llm_models.client import llm_initialized
+    from resume_scores.chroma_db import vector_store_initialized
+
+    with _state_lock:
+        state = dict(_state)
+    state["ready"] = state["database"] == "ready" and state["warmup"] in ("ready", "skipped")
+    state["components"] = {
+        "vector_store": vector_store_initialized(),
+        "llm_client": llm_initialized(),
+    }
+    return state
@@ -0,0 +1,21 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Settings are read at import time, so point everything at a scratch directory
+# (and the offline backends) before any app module is imported
+_scratch = tempfile.mkdtemp(prefix="resume-analyzer-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_scratch, 'test.db')}")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("EMBEDDING_BACKEND", "fake")
+os.environ.setdefault("FAST_STARTUP", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def migrated_db():
+    from migrations import run_migrations
+    run_migrations()
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from llm_models import gateway
+from llm_models.gateway import CircuitBreaker, LLMDeadlineExceeded, LLMGateway, TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # A hand-advanced time.monotonic(), so refill and reset timings are exact
+    now = [1000.0]
+    monkeypatch.setattr(gateway.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_token_bucket_reserves_up_to_max_wait(clock):
+    bucket = TokenBucket(per_minute=60, burst_seconds=10)  # 1/s, holds 10
+    assert bucket.reserve(10, max_wait=0) == 0.0
+    # Over max_wait: refused and nothing debited
+    assert bucket.reserve(2, max_wait=1) is None
+    assert bucket.snapshot()["available"] == 0.0
+    # Within max_wait: debited now, the caller waits for the deficit to refill
+    assert bucket.reserve(2, max_wait=5) == pytest.approx(2.0)
+    assert bucket.snapshot()["available"] == -2.0
+    bucket.credit(2)
+    assert bucket.snapshot()["available"] == 0.0
+
+
+def test_token_bucket_refills_to_capacity(clock):
+    bucket = TokenBucket(per_minute=60, burst_seconds=10)
+    bucket.reserve(10, max_wait=0)
+    clock[0] += 4
+    assert bucket.snapshot()["available"] == 4.0
+    clock[0] += 100
+    assert bucket.snapshot()["available"] == 10.0
+    # A request bigger than the bucket is capped rather than waiting forever
+    assert bucket.reserve(50, max_wait=0) == 0.0
+    bucket.credit(100)
+    assert bucket.snapshot()["available"] == 10.0
+
+
+def test_circuit_breaker_opens_probes_and_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=30)
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    # After the reset period one probe goes through; the rest wait on its outcome
+    clock[0] += 30
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.snapshot()["times_opened"] == 2
+    assert not breaker.allow()
+
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.snapshot()["consecutive_failures"] == 0
+    assert breaker.allow() and breaker.allow()
+
+
+def test_call_gives_up_when_the_admission_wait_outlasts_the_deadline():
+    llm = LLMGateway(rpm=60, tpm=6000, burst_seconds=60, deadline_seconds=0.05)
+    admit = llm.admit
+    llm.admit = lambda tokens, deadline: admit(tokens, deadline) or 0.1
+    sent = []
+
+    with pytest.raises(LLMDeadlineExceeded):
+        llm.call(sent.append, "hello")
+
+    async def send(timeout):
+        sent.append(timeout)
+
+    with pytest.raises(LLMDeadlineExceeded):
+        asyncio.run(llm.acall(send, "hello"))
+
+    assert sent == []
+    assert llm.stats["attempts"] == 0
+    # Nothing went out, so the reservations were handed back
+    assert llm.requests.snapshot()["available"] == 60.0
+    assert llm.tokens.snapshot()["available"] == 6000.0
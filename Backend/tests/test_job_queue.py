@@ -0,0 +1,103 @@
+import asyncio
+from datetime import timedelta
+import time
+
+import pytest
+
+from database import SessionLocal
+from jobs import queue, worker
+from models import BackgroundJob, JobStatus
+
+
+@pytest.fixture
+def job_id(migrated_db):
+    return queue.enqueue("score_resume", {"resume_id": 1, "job_description": "Python"})
+
+
+def expire_lease(job_id):
+    with SessionLocal() as db:
+        db.query(BackgroundJob).filter(BackgroundJob.id == job_id).update(
+            {BackgroundJob.lease_expires_at: queue._now() - timedelta(seconds=1)}, synchronize_session=False)
+        db.commit()
+
+
+def claim(worker_id, job_id):
+    # Other tests' jobs may still be claimable, so claim until this one comes up
+    while True:
+        job = queue.claim_next(worker_id)
+        assert job is not None
+        if job["id"] == job_id:
+            return job
+
+
+def test_late_complete_after_takeover_is_rejected(job_id):
+    claim("worker-a", job_id)
+    expire_lease(job_id)
+    job = claim("worker-b", job_id)
+    assert job["attempts"] == 2
+
+    with pytest.raises(queue.LeaseLost):
+        queue.complete(job_id, "worker-a", {"stale": True})
+    with pytest.raises(queue.LeaseLost):
+        queue.fail(job_id, "worker-a", "stale failure")
+    with pytest.raises(queue.LeaseLost):
+        queue.renew_lease(job_id, "worker-a")
+
+    queue.complete(job_id, "worker-b", {"fresh": True})
+    job = queue.get_job(job_id)
+    assert job.status == JobStatus.succeeded
+    assert job.result == {"fresh": True}
+    assert job.locked_by is None
+
+
+def test_renewed_lease_is_not_reclaimed(job_id):
+    claim("worker-a", job_id)
+    expire_lease(job_id)
+    queue.renew_lease(job_id, "worker-a")
+    job = queue.claim_next("worker-b")
+    assert job is None or job["id"] != job_id
+    queue.complete(job_id, "worker-a", {"ok": True})
+    assert queue.get_job(job_id).status == JobStatus.succeeded
+
+
+def test_fail_reschedules_for_the_holder(job_id):
+    claim("worker-a", job_id)
+    assert queue.fail(job_id, "worker-a", "provider down") is True
+    job = queue.get_job(job_id)
+    assert job.status == JobStatus.queued
+    assert job.locked_by is None
+    with pytest.raises(queue.LeaseLost):
+        queue.complete(job_id, "worker-a", {"late": True})
+
+
+def test_heartbeat_keeps_a_long_job_leased(job_id, monkeypatch):
+    monkeypatch.setattr(queue, "JOB_LEASE_SECONDS", 1)
+    stolen = []
+
+    def slow_handler(payload, progress):
+        # Runs well past the 1s lease; without the heartbeat another worker would take the job over
+        for _ in range(4):
+            time.sleep(0.5)
+            other = queue.claim_next("worker-b")
+            if other is not None and other["id"] == job_id:
+                stolen.append(other)
+        return {"done": True}
+
+    monkeypatch.setitem(worker.HANDLERS, "score_resume", slow_handler)
+    job = claim("worker-a", job_id)
+    worker.run_job(job, "worker-a", heartbeat_seconds=0.2)
+
+    assert not stolen
+    assert queue.get_job(job_id).status == JobStatus.succeeded
+
+
+def test_async_handlers_share_one_event_loop_per_worker():
+    from jobs.handlers import run_async
+
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    # Cached LLM clients are bound to the loop they first ran on, so it must outlive each job
+    first, second = run_async(current_loop()), run_async(current_loop())
+    assert first is second
+    assert not first.is_closed()
@@ -0,0 +1,79 @@
+import threading
+import time
+
+import pytest
+
+from llm_models.scheduler import BACKGROUND, BULK, INTERACTIVE, LLMOverloaded, LLMScheduler, Ticket
+
+WEIGHTS = {INTERACTIVE: 8, BULK: 2, BACKGROUND: 1}
+
+
+def queue_ticket(scheduler, work_class, tenant="-", cost=100):
+    ticket = Ticket(work_class, tenant, cost)
+    ticket.event = threading.Event()
+    scheduler._enqueue(ticket)
+    return ticket
+
+
+def grant_order(scheduler, holder, tickets):
+    # Releases the running ticket one at a time and returns the tickets in the order they got the slot
+    order = []
+    running = holder
+    while len(order) < len(tickets):
+        scheduler.release(running)
+        running = next(t for t in tickets if t.event.is_set() and t not in order)
+        order.append(running)
+    return order
+
+
+def test_classes_share_slots_by_weight():
+    scheduler = LLMScheduler(slots=1, weights=WEIGHTS, reserved_slots=0)
+    holder = queue_ticket(scheduler, INTERACTIVE)
+    assert holder.event.is_set()
+    bulk = [queue_ticket(scheduler, BULK) for _ in range(4)]
+    interactive = [queue_ticket(scheduler, INTERACTIVE) for _ in range(8)]
+
+    order = grant_order(scheduler, holder, bulk + interactive)
+    # Both backlogged, interactive gets four slots for each one bulk gets
+    first_ten = [t.work_class for t in order[:10]]
+    assert first_ten.count(INTERACTIVE) == 8
+    assert first_ten.count(BULK) == 2
+
+
+def test_tenants_in_a_class_take_turns():
+    scheduler = LLMScheduler(slots=1, weights=WEIGHTS, reserved_slots=0)
+    holder = queue_ticket(scheduler, INTERACTIVE)
+    first = [queue_ticket(scheduler, BULK, tenant="recruiter-a") for _ in range(4)]
+    second = [queue_ticket(scheduler, BULK, tenant="recruiter-b") for _ in range(2)]
+
+    order = grant_order(scheduler, holder, first + second)
+    assert [t.tenant[-1] for t in order] == ["a", "b", "a", "b", "a", "a"]
+
+
+def test_reserved_slots_are_only_given_to_interactive():
+    scheduler = LLMScheduler(slots=3, weights=WEIGHTS, reserved_slots=1)
+    bulk = [queue_ticket(scheduler, BULK) for _ in range(3)]
+    assert [t.event.is_set() for t in bulk] == [True, True, False]
+    background = queue_ticket(scheduler, BACKGROUND)
+    assert not background.event.is_set()
+
+    interactive = queue_ticket(scheduler, INTERACTIVE)
+    assert interactive.event.is_set()
+    assert scheduler.snapshot()["in_flight"] == 3
+
+
+def test_other_classes_are_capped_and_shed_while_interactive_is_slow():
+    scheduler = LLMScheduler(slots=4, weights=WEIGHTS, reserved_slots=0, p95_target_ms=100,
+                             degraded_slots=1, shed_queue_depth=2)
+    scheduler.latencies.append((time.monotonic(), 5000.0))
+    assert scheduler.snapshot()["degraded"]
+
+    bulk = [queue_ticket(scheduler, BULK) for _ in range(3)]
+    assert [t.event.is_set() for t in bulk] == [True, False, False]
+    with pytest.raises(LLMOverloaded):
+        queue_ticket(scheduler, BULK)
+    assert scheduler.snapshot()["classes"][BULK]["shed"] == 1
+
+    # Interactive calls are never shed and still get the free slots
+    interactive = [queue_ticket(scheduler, INTERACTIVE) for _ in range(3)]
+    assert all(t.event.is_set() for t in interactive)
@@ -0,0 +1,23 @@
+from llm_models.rule_extractor import rule_extract
+from llm_models.text_normalizer import normalize_pages
+
+HEADER = "JANE DOE\njane.doe@example.com | +1 555 123 4567\n"
+
+
+def test_repeated_contact_header_is_kept_once():
+    pages = [
+        HEADER + "Skills\nPython, FastAPI, SQL, Docker\nPage 1 of 2",
+        HEADER + "Experience\nSoftware Engineer, Acme Corp Jan 2021 - Present\nPage 2 of 2",
+    ]
+    text, removed = normalize_pages(pages)
+    lines = text.splitlines()
+
+    assert lines[:2] == ["JANE DOE", "jane.doe@example.com | +1 555 123 4567"]
+    assert text.count("jane.doe@example.com") == 1
+    assert "Software Engineer, Acme Corp Jan 2021 - Present" in lines
+    # The second page's copy of the header goes, along with its page footer
+    assert removed["furniture_lines_removed"] >= 2
+
+    fields, confident = rule_extract(text)
+    assert fields["name"] == "Jane Doe"
+    assert confident["name"]
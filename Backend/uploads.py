@@ -0,0 +1,192 @@
+from fastapi import HTTPException, UploadFile
+from llm_models.document_parser import DocumentLimitError, mapped_file
+from contextlib import contextmanager
+from typing import Iterator, Optional
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+## Size-bounded, spooled uploads ##
+# Upload bodies are copied in UPLOAD_CHUNK_BYTES chunks into a SpooledUpload:
+# the first UPLOAD_MEMORY_BYTES stay in memory, anything larger spills to a
+# temp file under UPLOAD_SPOOL_DIR. The UPLOAD_MAX_BYTES cap is checked on
+# every chunk, so an oversized upload is rejected as soon as it crosses the
+# limit rather than after it has been read whole; UploadLimitMiddleware applies
+# the same cap to the raw request body before FastAPI buffers the form. The
+# sha256 is computed while copying. Parsers get a zero-copy memoryview (an mmap
+# for spilled uploads), and close() always removes the temp file.
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_MEMORY_BYTES = int(os.getenv("UPLOAD_MEMORY_BYTES", str(1024 * 1024)))
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(256 * 1024)))
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", tempfile.gettempdir())
+# Request paths whose bodies are capped, and the allowance for multipart framing
+UPLOAD_PATHS = ("/user/upload_resume",)
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+def _too_large(limit: int) -> DocumentLimitError:
+    return DocumentLimitError(f"Upload exceeds the {limit} byte limit.")
+
+
+class SpooledUpload:
+    def __init__(self, filename: str, max_bytes: int = UPLOAD_MAX_BYTES,
+                 memory_bytes: int = UPLOAD_MEMORY_BYTES):
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self.size = 0
+        self.path: Optional[str] = None
+        self._owned = True
+        self._memory = bytearray()
+        self._file = None
+        self._hash = hashlib.sha256()
+
+    @classmethod
+    def from_path(cls, path: str, filename: str) -> "SpooledUpload":
+        # Wrap a file that is already on disk (a queued job's spool); close() leaves it in place
+        upload = cls(filename, max_bytes=os.path.getsize(path))
+        upload.path, upload._owned = path, False
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(UPLOAD_CHUNK_BYTES), b""):
+                upload._hash.update(chunk)
+                upload.size += len(chunk)
+        return upload
+
+    def write(self, chunk: bytes):
+        if self.size + len(chunk) > self.max_bytes:
+            raise _too_large(self.max_bytes)
+        self._hash.update(chunk)
+        self.size += len(chunk)
+        if self._file is None and len(self._memory) + len(chunk) <= self.memory_bytes:
+            self._memory += chunk
+            return
+        if self._file is None:
+            extension = os.path.splitext(self.filename)[1].lower()
+            os.makedirs(UPLOAD_SPOOL_DIR, exist_ok=True)
+            self._file = tempfile.NamedTemporaryFile(dir=UPLOAD_SPOOL_DIR, prefix="upload-", suffix=extension,
+                                                     delete=False)
+            self.path = self._file.name
+            self._file.write(self._memory)
+            self._memory = bytearray()
+        self._file.write(chunk)
+
+    def finish(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    @property
+    def in_memory(self) -> bool:
+        return self.path is None
+
+    def getvalue(self) -> bytes:
+        # Only for in-memory uploads, which are at most UPLOAD_MEMORY_BYTES
+        return bytes(self._memory)
+
+    @contextmanager
+    def view(self) -> Iterator[memoryview]:
+        if self.path is None:
+            view = memoryview(self._memory)
+            try:
+                yield view
+            finally:
+                view.release()
+        else:
+            with mapped_file(self.path) as view:
+                yield view
+
+    def persist(self, path: str):
+        # Hand the bytes over to `path` (moving the spill file when there is one)
+        self.finish()
+        if self.path is not None and self._owned:
+            shutil.move(self.path, path)
+            self.path = None
+        else:
+            with open(path, "wb") as f:
+                if self.path is not None:
+                    with open(self.path, "rb") as src:
+                        shutil.copyfileobj(src, f, UPLOAD_CHUNK_BYTES)
+                else:
+                    f.write(self._memory)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.path is not None and self._owned:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+        self.path = None
+        self._memory = bytearray()
+
+    def __enter__(self) -> "SpooledUpload":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+async def receive_upload(file: UploadFile, max_bytes: int = UPLOAD_MAX_BYTES) -> SpooledUpload:
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+    upload = SpooledUpload(file.filename, max_bytes)
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+            upload.write(chunk)
+        upload.finish()
+    except BaseException:
+        upload.close()
+        raise
+    return upload
+
+
+class UploadLimitMiddleware:
+    # Caps the request body on upload paths while it is being received
+    def __init__(self, app, max_bytes: int = UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD_BYTES,
+                 paths=UPLOAD_PATHS):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            return await self.app(scope, receive, send)
+
+        error = HTTPException(status_code=413,
+                              detail=f"Upload exceeds the {UPLOAD_MAX_BYTES} byte limit.")
+        headers = dict(scope.get("headers") or [])
+        declared = headers.get(b"content-length")
+        if declared and declared.isdigit() and int(declared) > self.max_bytes:
+            await self._reject(send, error)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Raised inside body parsing; FastAPI re-raises HTTPExceptions as they are
+                    raise error
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    async def _reject(send, error: HTTPException):
+        body = json.dumps({"detail": error.detail}).encode()
+        await send({"type": "http.response.start", "status": error.status_code,
+                    "headers": [(b"content-type", b"application/json"),
+                                (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
@@ -24,22 +24,29 @@ const AdminDashboard = () => {
     fetchData();
   }, []);
 
+  // Admin listings are keyset-paginated; follow X-Next-Cursor until the last page
+  const fetchAllPages = async (url, token, fields) => {
+    const rows = [];
+    let cursor = null;
+    do {
+      const response = await axios.get(url, {
+        headers: { Authorization: `Bearer ${token}` },
+        params: { fields, limit: 1000, ...(cursor ? { cursor } : {}) }
+      });
+      rows.push(...response.data);
+      cursor = response.headers['x-next-cursor'];
+    } while (cursor);
+    return rows;
+  };
+
   const fetchData = async () => {
     try {
       setLoading(true);
       const token = localStorage.getItem('authToken');
       if (!token) throw new Error('No authentication token found');
 
-      const usersResponse = await axios.get('http://localhost:8000/admin/all-users', {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      
-      const resumesResponse = await axios.get('http://localhost:8000/admin/resumes/', {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      
-      const usersData = usersResponse.data;
-      const resumesData = resumesResponse.data;
+      const usersData = await fetchAllPages('http://localhost:8000/admin/all-users', token, 'id,full_name,email,role');
+      const resumesData = await fetchAllPages('http://localhost:8000/admin/resumes/', token, 'id,user_id,file_path');
       
       setUsers(usersData);
       setResumes(resumesData);
@@ -8,12 +8,19 @@ const api = axios.create({
   },
 });
 
+// Admin listings are keyset-paginated: each call returns one page as
+// { items, next_cursor }; pass next_cursor back to get the next page (null after the last)
+const toPage = (response) => ({
+  items: response.data,
+  next_cursor: response.headers['x-next-cursor'] || null,
+});
+
 // Admin Routes
-// Get all users
-export const getAllUsers = async () => {
+// Get one page of users
+export const getAllUsers = async ({ cursor, limit, fields } = {}) => {
   try {
-    const response = await api.get('/admin/all-users');
-    return response.data; // Returns the list of users
+    const response = await api.get('/admin/all-users', { params: { cursor, limit, fields } });
+    return toPage(response);
   } catch (error) {
     console.error("Error fetching users:", error);
     throw error;
@@ -42,11 +49,11 @@ export const deleteUser = async (userId) => {
   }
 };
 
-// Get all resumes
-export const getAllResumes = async () => {
+// Get one page of resumes
+export const getAllResumes = async ({ cursor, limit, fields } = {}) => {
   try {
-    const response = await api.get('/admin/resumes/');
-    return response.data; // Returns the list of resumes
+    const response = await api.get('/admin/resumes/', { params: { cursor, limit, fields } });
+    return toPage(response);
   } catch (error) {
     console.error("Error fetching resumes:", error);
     throw error;